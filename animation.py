@@ -0,0 +1,430 @@
+# animation.py
+"""
+Animations des feux, températures et couverture forestière.
+
+Une image par période (jour, semaine, décade, mois ou acquisition, voir
+ANIMATION_DATASETS) est rendue sur le département par getThumbURL, avec la
+visualisation de config.py, puis écrite dans <EXPORT_FOLDER>/<couche>/
+(001.png, 002.png…). Les images manquantes sont demandées au serveur en une
+seule requête (ANIMATION_SERVER_MODE : bande 'filmstrip' ou GIF 'video',
+découpés localement), en plusieurs si leur taille dépasse
+ANIMATION_SERVER_MAX_BYTES. Si le serveur refuse, les vignettes sont
+téléchargées une à une, en parallèle par lots de ANIMATION_WORKERS ; un
+export interrompu reprend là où il s'est arrêté.
+
+Un manifeste (manifest.json) associe chaque image à l'empreinte de sa
+requête et de son contenu : une image déjà sur disque et inchangée n'est
+pas redemandée, même si son numéro a changé (période glissante). Les
+images sont envoyées au fur et à mesure à l'encodeur GIF/MP4 (GIF_PARAMS)
+sans être toutes gardées en mémoire.
+
+Usage :
+    ms.export_animation('fires')
+    python animation.py fires -d Bignona --begin 2024-01-01 --end 2024-08-20
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageSequence
+
+import ee_backend
+from compositing import period_bounds
+from config import (
+    ANIMATION_DATASETS,
+    ANIMATION_DIMENSIONS,
+    ANIMATION_SERVER_MAX_BYTES,
+    ANIMATION_SERVER_MODE,
+    ANIMATION_WORKERS,
+    COUNTRY_CODE,
+    EXPORT_FOLDER,
+    GIF_PARAMS,
+)
+from ee_backend import ee
+from parallel_eval import run_parallel, with_retry
+
+try:
+    import imageio.v2 as imageio
+except ImportError:  # imageio absent : GIF via Pillow, pas de MP4
+    imageio = None
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def frame_periods(dates: List[str], period: str) -> List[Tuple[str, str]]:
+    """Fenêtres [début, fin[ (YYYY-MM-DD) contenant au moins une acquisition."""
+    bounds = {
+        period_bounds(datetime.strptime(d, '%Y-%m-%d').date(), 'day' if period == 'image' else period)
+        for d in dates
+    }
+    return [(start.isoformat(), end.isoformat()) for start, end in sorted(bounds)]
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def _file_sha1(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return _sha1(f.read())
+    except OSError:
+        return None
+
+
+class AnimationWriter:
+    """
+    Encodeurs GIF (et MP4 si imageio-ffmpeg est installé) alimentés image par
+    image. Sans imageio, le GIF est assemblé par Pillow à la fermeture.
+    """
+
+    def __init__(self, gif_path: Optional[str], mp4_path: Optional[str],
+                 duration: float = GIF_PARAMS['duration'], fps: int = GIF_PARAMS['fps']) -> None:
+        self.gif_path = gif_path
+        self.mp4_path = mp4_path
+        self.duration = duration
+        self.frames = 0
+        self._gif = None
+        self._mp4 = None
+        self._pending: List[str] = []  # repli Pillow : chemins des images, lues à la fermeture
+        if imageio is not None:
+            if gif_path:
+                self._gif = imageio.get_writer(gif_path, mode='I', duration=duration * 1000, loop=0)
+            if mp4_path:
+                try:
+                    self._mp4 = imageio.get_writer(mp4_path, fps=fps, macro_block_size=2)
+                except Exception as e:  # imageio-ffmpeg absent
+                    print(f"⚠️ MP4 non généré : {e}")
+                    self.mp4_path = None
+        elif mp4_path:
+            print("⚠️ MP4 non généré : installer imageio et imageio-ffmpeg.")
+            self.mp4_path = None
+
+    @staticmethod
+    def _rgb(path: str):
+        """Image sur fond blanc (la transparence ne passe ni en GIF ni en MP4), dimensions paires."""
+        with Image.open(path) as frame:
+            frame = frame.convert('RGBA')
+            width, height = frame.size
+            canvas = Image.new('RGB', (width + width % 2, height + height % 2), 'white')
+            canvas.paste(frame, (0, 0), frame)
+            return canvas
+
+    def append(self, path: str) -> None:
+        self.frames += 1
+        if imageio is None:
+            self._pending.append(path)
+            return
+        import numpy as np
+        frame = np.asarray(self._rgb(path))
+        if self._gif is not None:
+            self._gif.append_data(frame)
+        if self._mp4 is not None:
+            self._mp4.append_data(frame)
+
+    def close(self) -> None:
+        for writer in (self._gif, self._mp4):
+            if writer is not None:
+                writer.close()
+        if self._pending and self.gif_path:
+            frames = (self._rgb(path) for path in self._pending[1:])
+            self._rgb(self._pending[0]).save(self.gif_path, save_all=True, append_images=frames,
+                                             duration=int(self.duration * 1000), loop=0)
+
+
+class AnimationExporter:
+    """Rendu des images d'une animation ('fires', 'temperature', 'forest') pour le contexte courant."""
+
+    def __init__(
+        self,
+        monitoring_system,
+        name: str,
+        folder: Optional[str] = None,
+        workers: int = ANIMATION_WORKERS,
+        dimensions: int = ANIMATION_DIMENSIONS,
+        period: Optional[str] = None,
+        server_mode: Optional[str] = ANIMATION_SERVER_MODE,
+    ) -> None:
+        if server_mode not in (None, 'filmstrip', 'video'):
+            raise ValueError(f"Mode de rendu serveur inconnu : {server_mode}")
+        if name not in ANIMATION_DATASETS:
+            raise ValueError(f"Animation inconnue : {name} (attendu : {', '.join(ANIMATION_DATASETS)})")
+        self.monitoring_system = monitoring_system
+        self.name = name
+        self.spec = ANIMATION_DATASETS[name]
+        self.folder = folder or os.path.join(EXPORT_FOLDER, name)
+        self.workers = max(1, workers)
+        self.dimensions = dimensions
+        self.period = period or self.spec['period']
+        self.server_mode = server_mode
+
+    # -----------------------------
+    # Images
+    # -----------------------------
+    def periods(self) -> List[Tuple[str, str]]:
+        return frame_periods(self.monitoring_system.collection_metadata[self.name]['dates'], self.period)
+
+    def frame_key(self, start: str, end: str) -> str:
+        """Empreinte de la requête d'une image : change si la période, la zone ou le rendu changent."""
+        ms = self.monitoring_system
+        return _sha1(json.dumps({
+            'dataset': self.spec['dataset'],
+            'reducer': self.spec['reducer'],
+            'visualization': self.spec['visualization'],
+            'period': [start, end],
+            'area': [ms.country_code, ms.department_name],
+            'dimensions': self.dimensions,
+        }, sort_keys=True).encode('utf-8'))
+
+    def frame_image(self, start: str, end: str) -> ee.Image:
+        ms = self.monitoring_system
+        collection = getattr(ms, f"{self.name}_dataset").filterDate(start, end)
+        return getattr(collection, self.spec['reducer'])().clip(ms.department)
+
+    def thumbnail_params(self) -> dict:
+        return {
+            **self.spec['visualization'],
+            'region': self.monitoring_system.department.geometry(),
+            'dimensions': self.dimensions,
+            'format': 'png',
+        }
+
+    def render_frame(self, start: str, end: str) -> bytes:
+        params = self.thumbnail_params()
+        image = self.frame_image(start, end)
+        url = with_retry(lambda: image.getThumbURL(params))
+        return with_retry(lambda: ee_backend.fetch_thumbnail(url))
+
+    # -----------------------------
+    # Rendu côté serveur
+    # -----------------------------
+    def frame_size(self) -> Tuple[int, int]:
+        """Taille estimée (largeur, hauteur) d'une image : plus grand côté = dimensions."""
+        west, south, east, north = self.monitoring_system.get_department_info()['bbox']
+        ratio = (north - south) / ((east - west) or 1.0)
+        if ratio <= 1:
+            return self.dimensions, max(1, round(self.dimensions * ratio))
+        return max(1, round(self.dimensions / ratio)), self.dimensions
+
+    def server_batches(self, frames: List[Tuple[str, str, str, str]]) -> Iterator[List[Tuple[str, str, str, str]]]:
+        """Découpe les images en requêtes serveur de moins de ANIMATION_SERVER_MAX_BYTES."""
+        width, height = self.frame_size()
+        per_request = max(1, ANIMATION_SERVER_MAX_BYTES // (width * height * 4))
+        for start in range(0, len(frames), per_request):
+            yield frames[start:start + per_request]
+
+    def render_server_side(self, frames: List[Tuple[str, str, str, str]]) -> Dict[str, bytes]:
+        """
+        Rend plusieurs images en une requête (getFilmstripThumbURL ou
+        getVideoThumbURL) et les découpe localement. Retourne {nom de fichier: png}.
+        """
+        collection = ee.ImageCollection([self.frame_image(start, end) for _, start, end, _ in frames])
+        if self.server_mode == 'filmstrip':
+            params = self.thumbnail_params()
+            url = with_retry(lambda: collection.getFilmstripThumbURL(params))
+            with Image.open(io.BytesIO(with_retry(lambda: ee_backend.fetch_thumbnail(url)))) as strip:
+                # Images empilées verticalement, de même hauteur
+                height = strip.height // len(frames)
+                images = [strip.crop((0, i * height, strip.width, (i + 1) * height)) for i in range(len(frames))]
+        else:
+            params = {**self.thumbnail_params(), 'format': 'gif', 'framesPerSecond': GIF_PARAMS['fps']}
+            url = with_retry(lambda: collection.getVideoThumbURL(params))
+            base = 1000 / GIF_PARAMS['fps']
+            images = []
+            with Image.open(io.BytesIO(with_retry(lambda: ee_backend.fetch_thumbnail(url)))) as video:
+                for frame in ImageSequence.Iterator(video):
+                    # Un encodeur GIF fusionne les images identiques consécutives (durée cumulée)
+                    repeats = max(1, round(frame.info.get('duration', base) / base))
+                    images.extend([frame.convert('RGBA')] * repeats)
+        if len(images) != len(frames):
+            raise ValueError(f"{len(images)} images reçues pour {len(frames)} demandées")
+
+        results = {}
+        for (filename, _, _, _), image in zip(frames, images):
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG')
+            results[filename] = buffer.getvalue()
+        return results
+
+    # -----------------------------
+    # Manifeste
+    # -----------------------------
+    def manifest_path(self) -> str:
+        return os.path.join(self.folder, MANIFEST_NAME)
+
+    def load_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path(), encoding='utf-8') as f:
+                return json.load(f).get('frames', {})
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, frames: Dict[str, dict]) -> None:
+        tmp = f"{self.manifest_path()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'animation': self.name, 'frames': frames}, f, indent=1)
+        os.replace(tmp, self.manifest_path())
+
+    def _reuse_frames(self, plan: List[Tuple[str, str, str, str]], previous: Dict[str, dict]) -> Dict[str, dict]:
+        """
+        Reprend les images encore valides de l'export précédent (fichier présent,
+        contenu intact) sous leur nouveau nom ; supprime les images périmées.
+        Retourne le manifeste des images reprises.
+        """
+        valid = {}
+        for filename, entry in previous.items():
+            if _file_sha1(os.path.join(self.folder, filename)) == entry.get('sha1'):
+                valid[entry['key']] = (filename, entry)
+        targets = {key: filename for filename, _, _, key in plan}
+
+        staged, manifest = [], {}
+        for key, (filename, entry) in valid.items():
+            if key not in targets:
+                continue
+            if filename == targets[key]:
+                manifest[filename] = entry
+            else:
+                # Deux temps : un nouveau nom peut être l'ancien nom d'une autre image
+                tmp = os.path.join(self.folder, f".{key}.png")
+                os.replace(os.path.join(self.folder, filename), tmp)
+                staged.append((tmp, targets[key], entry))
+        for filename in previous:
+            if filename not in manifest and filename not in targets.values():
+                try:
+                    os.remove(os.path.join(self.folder, filename))
+                except OSError:
+                    pass
+        for tmp, filename, entry in staged:
+            os.replace(tmp, os.path.join(self.folder, filename))
+            manifest[filename] = entry
+        return manifest
+
+    # -----------------------------
+    # Export
+    # -----------------------------
+    def plan(self) -> List[Tuple[str, str, str, str]]:
+        """[(nom de fichier, début, fin, empreinte)] dans l'ordre chronologique."""
+        periods = self.periods()
+        width = max(2, len(str(len(periods))))
+        return [(f"{i:0{width}d}.png", start, end, self.frame_key(start, end))
+                for i, (start, end) in enumerate(periods, start=1)]
+
+    def batches(self, plan: List[Tuple[str, str, str, str]]) -> Iterator[List[Tuple[str, str, str, str]]]:
+        for start in range(0, len(plan), self.workers):
+            yield plan[start:start + self.workers]
+
+    def _write_frames(self, results: Dict[str, bytes], todo: Dict[str, Tuple[str, str, str]],
+                      manifest: Dict[str, dict]) -> None:
+        for filename, data in results.items():
+            start, end, key = todo[filename]
+            with open(os.path.join(self.folder, filename), 'wb') as f:
+                f.write(data)
+            manifest[filename] = {'key': key, 'period': [start, end], 'sha1': _sha1(data)}
+        self.save_manifest(manifest)
+
+    def _export_server_side(self, plan: List[Tuple[str, str, str, str]], manifest: Dict[str, dict]) -> int:
+        """Rend côté serveur les images manquantes ; s'arrête à la première requête refusée."""
+        missing = [frame for frame in plan if manifest.get(frame[0], {}).get('key') != frame[3]]
+        if len(missing) < 2:
+            return 0
+        rendered = 0
+        for frames in self.server_batches(missing):
+            try:
+                results = self.render_server_side(frames)
+            except Exception as e:
+                print(f"⚠️ Rendu serveur ({self.server_mode}) impossible : {e} — rendu image par image.")
+                break
+            self._write_frames(results, {f: (s, e, k) for f, s, e, k in frames}, manifest)
+            rendered += len(results)
+        return rendered
+
+    def export(self, gif: bool = True, mp4: bool = GIF_PARAMS['mp4']) -> dict:
+        """
+        Rend les images manquantes ou périmées (côté serveur si possible,
+        sinon une à une) puis assemble GIF/MP4 (<EXPORT_FOLDER>/<nom>.gif|.mp4).
+        Retourne les statistiques de l'export.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        plan = self.plan()
+        manifest = self._reuse_frames(plan, self.load_manifest())
+        base = os.path.join(os.path.dirname(self.folder.rstrip('/')) or '.', self.name)
+        writer = AnimationWriter(f"{base}.gif" if gif and plan else None,
+                                 f"{base}.mp4" if mp4 and plan else None)
+        rendered = server_rendered = self._export_server_side(plan, manifest) if self.server_mode else 0
+        try:
+            for batch in self.batches(plan):
+                todo = {filename: (start, end, key) for filename, start, end, key in batch
+                        if manifest.get(filename, {}).get('key') != key}
+                results = run_parallel({
+                    filename: (lambda start=start, end=end: self.render_frame(start, end))
+                    for filename, (start, end, key) in todo.items()
+                })
+                if results:
+                    self._write_frames(results, todo, manifest)
+                rendered += len(results)
+                for filename, _, _, _ in batch:
+                    writer.append(os.path.join(self.folder, filename))
+        finally:
+            writer.close()
+        self.save_manifest(manifest)
+
+        stats = {
+            'animation': self.name,
+            'frames': len(plan),
+            'rendered': rendered,
+            'server_rendered': server_rendered,
+            'skipped': len(plan) - rendered,
+            'folder': self.folder,
+            'gif': writer.gif_path,
+            'mp4': writer.mp4_path,
+        }
+        print(f"✅ Animation {self.name} : {stats['frames']} images "
+              f"({rendered} rendues dont {server_rendered} côté serveur, {stats['skipped']} reprises)")
+        return stats
+
+
+# =============================================
+# === CLI ===
+# =============================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from batch import connect
+    from sekhem_utils import FloodMonitoringSystem
+
+    parser = argparse.ArgumentParser(description="Export des animations (images, GIF, MP4)")
+    parser.add_argument('animations', nargs='+', choices=list(ANIMATION_DATASETS))
+    parser.add_argument('--country', default=COUNTRY_CODE)
+    parser.add_argument('-d', '--department', required=True)
+    parser.add_argument('--begin', help="date de début YYYY-MM-DD (défaut : période glissante)")
+    parser.add_argument('--end', help="date de fin YYYY-MM-DD (défaut : hier)")
+    parser.add_argument('--period', choices=['image', 'day', 'week', 'dekad', 'month'],
+                        help="une image par période (défaut : ANIMATION_DATASETS)")
+    parser.add_argument('--workers', type=int, default=ANIMATION_WORKERS)
+    parser.add_argument('--server-mode', choices=['filmstrip', 'video', 'none'], default=ANIMATION_SERVER_MODE or 'none',
+                        help="rendu des images manquantes en une requête serveur ('none' : image par image)")
+    parser.add_argument('--no-mp4', action='store_true')
+    parser.add_argument('--service-account', help="clé JSON du compte de service Earth Engine")
+    parser.add_argument('--offline', action='store_true', help="backend simulé fake_ee (sans connexion)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        from testing.fake_ee import FakeEarthEngine
+        ee_backend.set_backend(FakeEarthEngine())
+    connect(args.service_account)
+
+    ms = FloodMonitoringSystem(args.country, args.department, begin_date=args.begin, end_date=args.end)
+    for name in args.animations:
+        ms.export_animation(name, period=args.period, workers=args.workers,
+                            server_mode=None if args.server_mode == 'none' else args.server_mode,
+                            mp4=GIF_PARAMS['mp4'] and not args.no_mp4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
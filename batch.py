@@ -0,0 +1,259 @@
+# batch.py
+"""
+Traitement national : statistiques inondations + forêts de tous les
+départements (ADM2) en une seule requête.
+
+Au lieu de N appels reduceRegion (un FloodMonitoringSystem par
+département), on construit un seul graphe :
+  1. composites nationaux (WEI médian Sentinel-2, probabilité 'trees' Dynamic World) ;
+  2. reduceRegions (moyennes) sur la FeatureCollection ADM2 ;
+  3. seuil forestier adaptatif par département, peint en image ;
+  4. reduceRegions (surfaces) puis calcul des hectares et pourcentages ;
+et on télécharge le tableau national en un seul aller-retour.
+
+CLI :
+    python batch.py --begin 2024-07-01 --end 2024-09-30
+    python batch.py -d Bignona -d Ziguinchor --output bulletin.csv
+    python batch.py --offline      # backend fake_ee (démonstration, benchmarks)
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+import ee_backend
+from config import (
+    COUNTRY_CODE,
+    DEPARTMENT_DATASET_NAME,
+    EXPORT_FOLDER,
+    FOREST_DATASET_NAME,
+    MAX_CLOUD_PERCENTAGE,
+    PROCESSING_SCALE,
+    PROJECT_NAME,
+    SENTINEL2_DATASET_NAME,
+)
+from ee_backend import ee
+from index_backends import EarthEngineIndexBackend
+from instrumentation import traced
+from parallel_eval import with_retry
+from statistics_engine import adaptive_forest_threshold
+from time_window import default_window
+
+# Colonnes du tableau national (mêmes clés que get_flood/forest_statistics)
+NATIONAL_COLUMNS = [
+    'department', 'total_area_ha',
+    'wei_mean', 'water_area_ha', 'flood_percentage',
+    'trees_mean', 'forest_threshold', 'forest_area_ha', 'forest_percentage',
+]
+BATCH_TILE_SCALE = 4  # découpe des reduceRegions pour rester sous la limite mémoire
+
+
+class NationalBatch:
+    """
+    Statistiques de tous les départements d'un pays (ou d'une sélection)
+    pour une période, calculées par reduceRegions sur la collection ADM2.
+    """
+
+    def __init__(
+        self,
+        country_code: str = COUNTRY_CODE,
+        begin_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        departments: Optional[Sequence[str]] = None,
+        wei_threshold: float = 0.3,
+        max_cloud_percentage: float = MAX_CLOUD_PERCENTAGE,
+        scale: int = PROCESSING_SCALE,
+        tile_scale: int = BATCH_TILE_SCALE,
+    ) -> None:
+        self.country_code = country_code
+        # Même période par défaut que le front et precompute.py (mêmes clés de cache)
+        default_begin, default_end = default_window()
+        self.begining = begin_date or default_begin
+        self.end = end_date or default_end
+        self.departments = list(departments) if departments else None
+        self.wei_threshold = wei_threshold
+        self.max_cloud_percentage = max_cloud_percentage
+        self.scale = scale
+        self.tile_scale = tile_scale
+        self.index_backend = EarthEngineIndexBackend()
+
+    def cache_context(self):
+        """Contexte des spans d'instrumentation (voir instrumentation.traced)."""
+        scope = ','.join(self.departments) if self.departments else '*'
+        return scope, self.begining, self.end, {'country_code': self.country_code}
+
+    # -----------------------------
+    # Graphe Earth Engine
+    # -----------------------------
+    def department_collection(self) -> ee.FeatureCollection:
+        departments = ee.FeatureCollection(DEPARTMENT_DATASET_NAME) \
+            .filter(ee.Filter.eq('shapeGroup', self.country_code))
+        if self.departments:
+            departments = departments.filter(ee.Filter.inList('shapeName', self.departments))
+        return departments
+
+    def wei_composite(self, region) -> ee.Image:
+        """WEI médian national (même chaîne que FloodMonitoringSystem.wei_map)."""
+        return ee.ImageCollection(SENTINEL2_DATASET_NAME) \
+            .filterBounds(region) \
+            .filterDate(self.begining, self.end) \
+            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', self.max_cloud_percentage)) \
+            .map(self.index_backend.mask_clouds) \
+            .map(self.index_backend.calculate_indices) \
+            .select('WEI') \
+            .median() \
+            .rename('WEI')
+
+    def forest_probability(self, region) -> ee.Image:
+        return ee.ImageCollection(FOREST_DATASET_NAME) \
+            .filterBounds(region) \
+            .filterDate(ee.Date(self.begining), ee.Date(self.end)) \
+            .select('trees') \
+            .median() \
+            .rename('trees')
+
+    def build(self) -> ee.FeatureCollection:
+        """FeatureCollection (sans géométrie) d'une ligne par département."""
+        departments = self.department_collection()
+        region = departments.geometry()
+        wei = self.wei_composite(region)
+        trees = self.forest_probability(region)
+
+        # 1. Moyennes WEI et 'trees' par département
+        means = ee.Image.cat([wei, trees]).reduceRegions(
+            collection=departments,
+            reducer=ee.Reducer.mean(),
+            scale=self.scale,
+            tileScale=self.tile_scale,
+        )
+
+        # 2. Seuil forestier adaptatif par département, peint en image
+        def with_threshold(feature):
+            return feature.set('forest_threshold', adaptive_forest_threshold(feature.get('trees')))
+        means = means.map(with_threshold)
+        threshold = ee.Image.constant(0).float().paint(means, 'forest_threshold').rename('forest_threshold')
+
+        # 3. Surfaces (m²) : eau (WEI ≥ seuil), forêt (trees > seuil local), total
+        pixel_area = ee.Image.pixelArea()
+        areas = ee.Image.cat([
+            wei.gte(self.wei_threshold).multiply(pixel_area).rename('water_area'),
+            trees.gt(threshold).multiply(pixel_area).rename('forest_area'),
+            pixel_area.rename('total_area'),
+        ])
+        sums = areas.reduceRegions(
+            collection=means,
+            reducer=ee.Reducer.sum(),
+            scale=self.scale,
+            tileScale=self.tile_scale,
+        )
+
+        # 4. Hectares et pourcentages, sans géométrie (téléchargement léger)
+        def to_row(feature):
+            total_ha = ee.Number(feature.get('total_area')).divide(10000)
+            water_ha = ee.Number(ee.Algorithms.If(feature.get('water_area'), feature.get('water_area'), 0)).divide(10000)
+            forest_ha = ee.Number(ee.Algorithms.If(feature.get('forest_area'), feature.get('forest_area'), 0)).divide(10000)
+            safe_total = total_ha.max(1e-9)
+            return ee.Feature(None, {
+                'department': feature.get('shapeName'),
+                'total_area_ha': total_ha,
+                'wei_mean': feature.get('WEI'),
+                'water_area_ha': water_ha,
+                'flood_percentage': water_ha.divide(safe_total).multiply(100),
+                'trees_mean': feature.get('trees'),
+                'forest_threshold': feature.get('forest_threshold'),
+                'forest_area_ha': forest_ha,
+                'forest_percentage': forest_ha.divide(safe_total).multiply(100),
+            })
+        return sums.map(to_row)
+
+    # -----------------------------
+    # Exécution
+    # -----------------------------
+    @traced('national_batch')
+    def run(self) -> pd.DataFrame:
+        """Calcule le tableau national (une ligne par département) en un seul téléchargement."""
+        collection = self.build()
+        df = with_retry(lambda: ee_backend.ee_to_df(collection))
+        if df.empty:
+            return pd.DataFrame(columns=NATIONAL_COLUMNS)
+        df = df.reindex(columns=NATIONAL_COLUMNS)
+        numeric = NATIONAL_COLUMNS[1:]
+        df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+        return df.sort_values('department').reset_index(drop=True)
+
+    def default_output_path(self) -> str:
+        return os.path.join(EXPORT_FOLDER, f"bulletin_national_{self.country_code}_{self.begining}_{self.end}.csv")
+
+    def export_csv(self, path: Optional[str] = None, df: Optional[pd.DataFrame] = None) -> str:
+        """Écrit le tableau national en CSV et retourne le chemin."""
+        path = path or self.default_output_path()
+        df = self.run() if df is None else df
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        df.to_csv(path, index=False)
+        return path
+
+
+# =============================================
+# === CLI ===
+# =============================================
+
+def connect(service_account_file: Optional[str] = None) -> None:
+    """Connexion Earth Engine hors Streamlit : compte de service (fichier JSON) ou identifiants par défaut."""
+    try:
+        ee.data.getAssetRoots()
+        return
+    except Exception:
+        pass
+    if service_account_file:
+        with open(service_account_file, encoding='utf-8') as f:
+            email = json.load(f)['client_email']
+        ee.Initialize(ee.ServiceAccountCredentials(email=email, key_file=service_account_file))
+    else:
+        ee.Initialize(project=PROJECT_NAME)
+    print("Earth Engine initialisé avec succès!")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulletin national : statistiques de tous les départements")
+    parser.add_argument('--country', default=COUNTRY_CODE, help="code pays geoBoundaries (défaut : %(default)s)")
+    parser.add_argument('--begin', help="date de début YYYY-MM-DD (défaut : il y a 3 mois)")
+    parser.add_argument('--end', help="date de fin YYYY-MM-DD (défaut : hier)")
+    parser.add_argument('-d', '--department', action='append', dest='departments',
+                        help="département à inclure (répétable ; tous par défaut)")
+    parser.add_argument('--wei-threshold', type=float, default=0.3)
+    parser.add_argument('--max-cloud', type=float, default=MAX_CLOUD_PERCENTAGE)
+    parser.add_argument('--scale', type=int, default=PROCESSING_SCALE)
+    parser.add_argument('--output', help="fichier CSV (défaut : Downloads/bulletin_national_…csv)")
+    parser.add_argument('--service-account', help="clé JSON du compte de service Earth Engine")
+    parser.add_argument('--offline', action='store_true', help="backend simulé fake_ee (sans connexion)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        from testing.fake_ee import FakeEarthEngine
+        ee_backend.set_backend(FakeEarthEngine())
+    connect(args.service_account)
+
+    batch = NationalBatch(
+        country_code=args.country,
+        begin_date=args.begin,
+        end_date=args.end,
+        departments=args.departments,
+        wei_threshold=args.wei_threshold,
+        max_cloud_percentage=args.max_cloud,
+        scale=args.scale,
+    )
+    df = batch.run()
+    if df.empty:
+        print("❌ Aucun département trouvé pour cette sélection.")
+        return 1
+    path = batch.export_csv(args.output, df)
+    print(f"✅ {len(df)} départements → {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,370 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmarks du pipeline de surveillance (hors ligne, backend fake_ee).
+
+Chaque scénario rejoue un parcours FloodMonitoringSystem / FrontApp
+(démarrage à froid, changement de département, changement de dates,
+chaque onglet) et mesure :
+  - wall_s      : temps réel d'exécution (calcul local + Streamlit)
+  - ee_time_s   : temps serveur simulé (calcul local + latence par aller-retour)
+  - round_trips : nombre d'allers-retours (détail par type dans 'calls')
+  - bytes       : octets reçus
+  - peak_mb     : pic mémoire Python (tracemalloc)
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/run_benchmarks.py                    # compare à baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline  # enregistre la référence
+    python benchmarks/run_benchmarks.py -s cold_start -s tab_map
+
+Code de sortie 1 si un scénario régresse au-delà des tolérances sur les
+allers-retours ou les octets. Le temps réel et la mémoire dépendent de la
+machine : leurs écarts sont signalés sans faire échouer l'exécution.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Cache disque isolé : les scénarios ne lisent jamais le cache de l'application
+os.environ.setdefault("SEKHEM_CACHE_DIR", tempfile.mkdtemp(prefix="sekhem_bench_"))
+
+import ee_backend  # noqa: E402
+from testing.fake_ee import FakeEarthEngine  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+DEPARTMENT = "Bignona"
+OTHER_DEPARTMENT = "Ziguinchor"
+BEGIN_DATE = "2024-07-01"
+END_DATE = "2024-09-30"
+NEW_BEGIN_DATE = "2024-06-01"
+SLID_WINDOW = ("2024-07-11", "2024-10-10")  # période glissée de 10 jours
+
+# Tolérances bloquantes : ratio maximal par rapport à la référence (+ marge absolue)
+TOLERANCES = {
+    "round_trips": (1.0, 0),
+    "bytes": (1.10, 1024),
+}
+# Métriques dépendantes de la machine : écarts signalés, jamais bloquants
+REPORTED_TOLERANCES = {
+    "wall_s": (1.50, 0.5),
+    "peak_mb": (1.30, 5.0),
+}
+
+# Étapes FrontApp rejouées par onglet
+TAB_STEPS = {
+    "tab_map": ["draw_map", "metrics"],
+    "tab_temporal": ["draw_graphics"],
+    "tab_water": ["draw_flood_dashboard", "draw_water_indices_timeseries"],
+    "tab_forest": ["draw_forest_dashboard"],
+}
+
+
+# =============================================
+# === SCRIPTS STREAMLIT ===
+# =============================================
+
+def _tab_script(root):
+    """Script AppTest : construit FrontApp puis rejoue les étapes de session_state['bench_steps']."""
+    import sys
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    import streamlit as st
+    import front
+
+    app = front.FrontApp()
+    ms = app.monitoring_system
+    for step in st.session_state.get("bench_steps", []):
+        if step == "metrics":
+            front.get_cached_comprehensive_statistics(ms.department_name, ms.begining, ms.end)
+        else:
+            getattr(app, step)()
+
+
+# =============================================
+# === HARNAIS ===
+# =============================================
+
+class BenchContext:
+    """État d'un scénario : backend enregistreur, cache disque dédié, session AppTest."""
+
+    def __init__(self, latency: float, sleep: bool) -> None:
+        self.fake = FakeEarthEngine(latency=latency, sleep=sleep)
+        ee_backend.set_backend(self.fake)
+        self.cache_dir = tempfile.mkdtemp(prefix="sekhem_bench_")
+        self.app = None
+        _reset_streamlit_caches()
+
+    def monitoring_system(self, department: str = DEPARTMENT):
+        from cache_manager import CacheManager
+        from sekhem_utils import FloodMonitoringSystem
+        return FloodMonitoringSystem(
+            department_name=department,
+            begin_date=BEGIN_DATE,
+            end_date=END_DATE,
+            cache=CacheManager(dir=self.cache_dir),
+        )
+
+    def page(self, steps: Optional[List[str]] = None):
+        """Session AppTest sur front.py (page complète) ou sur _tab_script (étapes choisies)."""
+        from streamlit.testing.v1 import AppTest
+        if steps is None:
+            self.app = AppTest.from_file(os.path.join(ROOT, "front.py"), default_timeout=600)
+        else:
+            self.app = AppTest.from_function(_tab_script, args=(ROOT,), default_timeout=600)
+            self.app.session_state["bench_steps"] = steps
+        return self.app
+
+    def run(self, app) -> None:
+        app.run()
+        if app.exception:
+            raise RuntimeError(f"Exception Streamlit : {app.exception[0].value}")
+
+    def close(self) -> None:
+        ee_backend.set_backend(None)
+
+
+def _reset_streamlit_caches() -> None:
+    try:
+        import streamlit as st
+        st.cache_data.clear()
+    except Exception:
+        pass
+
+
+def warm_up() -> None:
+    """Importe les modules lourds hors mesure (sinon imputés au premier scénario)."""
+    import logging
+    import folium, plotly.graph_objects, streamlit_folium  # noqa: F401
+    import sekhem_utils  # noqa: F401
+    from streamlit.testing.v1 import AppTest  # noqa: F401
+    # Avertissements « missing ScriptRunContext » hors session Streamlit
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def _measure(setup: Callable[[BenchContext], object], action: Callable[[BenchContext, object], None],
+             latency: float, sleep: bool, verbose: bool = False) -> dict:
+    ctx = BenchContext(latency, sleep)
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with output:
+            state = setup(ctx)
+            ctx.fake.recorder.reset()
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            action(ctx, state)
+            wall = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        ctx.close()
+
+    summary = ctx.fake.recorder.summary()
+    return {
+        "wall_s": round(wall, 3),
+        "ee_time_s": round(sum(s["duration"] for s in summary.values()), 3),
+        "round_trips": sum(s["count"] for s in summary.values()),
+        "bytes": sum(s["bytes"] for s in summary.values()),
+        "peak_mb": round(peak / 1024 ** 2, 2),
+        "calls": {kind: s["count"] for kind, s in sorted(summary.items())},
+    }
+
+
+# =============================================
+# === SCÉNARIOS ===
+# =============================================
+
+def _fresh_page(ctx: BenchContext):
+    app = ctx.page()
+    app.session_state["monitoring_system"] = ctx.monitoring_system()
+    return app
+
+
+def _loaded_page(ctx: BenchContext):
+    app = _fresh_page(ctx)
+    ctx.run(app)
+    return app
+
+
+def _scenario_cold_start(ctx, _):
+    ctx.run(_fresh_page(ctx))
+
+
+def _setup_warm(ctx):
+    ctx.run(_fresh_page(ctx))
+    _reset_streamlit_caches()
+
+
+def _scenario_department_switch(ctx, app):
+    app.selectbox(key="sel_dep").set_value(OTHER_DEPARTMENT)
+    ctx.run(app)
+
+
+def _scenario_date_change(ctx, app):
+    from datetime import date
+    app.date_input(key="input_begin").set_value(date.fromisoformat(NEW_BEGIN_DATE))
+    ctx.run(app)
+
+
+def _scenario_widget_rerun(ctx, app):
+    """Rerun sans changement de contexte (même département) : la page est reconstruite sans appel serveur."""
+    app.selectbox(key="sel_dep").set_value(DEPARTMENT)
+    ctx.run(app)
+
+
+def _scenario_pipeline(ctx, _):
+    """Sans Streamlit : statistiques, série temporelle, tendance, carte et rapport."""
+    fms = ctx.monitoring_system()
+    fms.get_flood_statistics()
+    fms.get_forest_statistics()
+    fms.get_flood_temporal_data()
+    fms.show_map(show_trend=True)
+    fms.generate_report()
+
+
+def _setup_timeseries(ctx):
+    fms = ctx.monitoring_system()
+    fms.timeseries
+    return fms
+
+
+def _scenario_timeseries_slide(ctx, fms):
+    """Série temporelle après glissement de la période : seules les nouvelles images sont réduites."""
+    fms.set_context(begin_date=SLID_WINDOW[0], end_date=SLID_WINDOW[1])
+    fms.timeseries
+
+
+def _scenario_national_batch(ctx, _):
+    """Tableau national (45 départements) en un seul reduceRegions."""
+    from batch import NationalBatch
+    NationalBatch(begin_date=BEGIN_DATE, end_date=END_DATE).run()
+
+
+def _tab_scenario(steps):
+    def setup(ctx):
+        app = ctx.page(steps=[])
+        app.session_state["monitoring_system"] = ctx.monitoring_system()
+        ctx.run(app)
+        app.session_state["bench_steps"] = steps
+        return app
+    return setup
+
+
+SCENARIOS: Dict[str, tuple] = {
+    "cold_start": (lambda ctx: None, _scenario_cold_start),
+    "warm_start": (_setup_warm, _scenario_cold_start),
+    "department_switch": (_loaded_page, _scenario_department_switch),
+    "date_change": (_loaded_page, _scenario_date_change),
+    "widget_rerun": (_loaded_page, _scenario_widget_rerun),
+    "pipeline": (lambda ctx: None, _scenario_pipeline),
+    "timeseries_slide": (_setup_timeseries, _scenario_timeseries_slide),
+    "national_batch": (lambda ctx: None, _scenario_national_batch),
+}
+for _name, _steps in TAB_STEPS.items():
+    SCENARIOS[_name] = (_tab_scenario(_steps), lambda ctx, app: ctx.run(app))
+
+
+# =============================================
+# === RÉFÉRENCE ET RAPPORT ===
+# =============================================
+
+def compare(results: dict, baseline: dict, tolerances: Dict[str, tuple] = TOLERANCES) -> List[str]:
+    """Liste des régressions (métrique au-delà de référence × ratio + marge)."""
+    failures = []
+    for name, metrics in results.items():
+        ref = baseline.get(name)
+        if not ref:
+            continue
+        for metric, (ratio, slack) in tolerances.items():
+            if metric not in ref:
+                continue
+            limit = ref[metric] * ratio + slack
+            if metrics[metric] > limit:
+                failures.append(f"{name}.{metric} = {metrics[metric]} > {limit:.3f} (référence {ref[metric]})")
+    return failures
+
+
+def print_table(results: dict, baseline: dict) -> None:
+    header = f"{'scénario':<20}{'wall_s':>9}{'ee_time_s':>11}{'allers-retours':>16}{'octets':>10}{'pic_mb':>9}  détail"
+    print(header)
+    print("-" * len(header))
+    for name, m in results.items():
+        ref = baseline.get(name, {})
+        delta = f" ({m['round_trips'] - ref['round_trips']:+d})" if "round_trips" in ref else ""
+        calls = ", ".join(f"{k}={v}" for k, v in m["calls"].items())
+        print(f"{name:<20}{m['wall_s']:>9.3f}{m['ee_time_s']:>11.3f}{str(m['round_trips']) + delta:>16}"
+              f"{m['bytes']:>10}{m['peak_mb']:>9.2f}  {calls}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks SEKHEM (backend Earth Engine simulé)")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scénario à exécuter (répétable ; tous par défaut)")
+    parser.add_argument("--latency", type=float, default=0.25, help="latence simulée par aller-retour (s)")
+    parser.add_argument("--sleep", action="store_true", help="attendre réellement la latence simulée")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="fichier de référence JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="enregistre les résultats comme référence")
+    parser.add_argument("--output", help="écrit les résultats en JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="affiche les sorties du pipeline")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("scenarios", {})
+
+    warm_up()
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        setup, action = SCENARIOS[name]
+        results[name] = _measure(setup, action, args.latency, args.sleep, args.verbose)
+
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"latency": args.latency, "scenarios": merged}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ Référence mise à jour : {args.baseline}")
+        return 0
+
+    drifts = compare(results, baseline, REPORTED_TOLERANCES)
+    if drifts:
+        print("\nℹ️ Écarts de temps / mémoire (dépendent de la machine, non bloquants) :")
+        for drift in drifts:
+            print(f"   - {drift}")
+
+    failures = compare(results, baseline)
+    if failures:
+        print("\n❌ Régressions détectées :")
+        for failure in failures:
+            print(f"   - {failure}")
+        return 1
+    print("\n✅ Aucune régression" if baseline else "\nℹ️ Pas de référence : lancez --update-baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,18 @@
 # cache_manager.py
 from __future__ import annotations
+import functools
+import hashlib
+import json
 import os
-from typing import Callable, Iterable, Optional
+import threading
+from typing import Callable, Iterable, Optional, Sequence
 from diskcache import Cache
+from instrumentation import note_cache_access
+
+# Verrous par clé (répertoire de cache, clé), partagés par toutes les
+# instances du processus : un seul calcul par clé à la fois
+_key_locks: dict = {}
+_key_locks_guard = threading.Lock()
 
 
 class CacheManager:
@@ -12,6 +22,8 @@ class CacheManager:
       - Génération de clés cohérentes (namespace | name | parts…)
       - getset(key, compute_fn, expire) pratique
       - purge par 'scope' (département + période)
+      - empreinte stable de paramètres (clés adressées par contenu)
+      - un seul calcul par clé à la fois dans le processus (key_lock)
     """
 
     def __init__(
@@ -56,6 +68,20 @@ class CacheManager:
             parts.append(f"x={extra}")
         return self.make_key(name, parts)
 
+    @staticmethod
+    def fingerprint(params: dict) -> str:
+        """
+        Empreinte courte et stable d'un dictionnaire de paramètres
+        (seuils, échelle, filtres…) à inclure dans une clé.
+        """
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def key_lock(self, key: str) -> threading.RLock:
+        """Verrou de la clé 'key' : deux threads ne calculent pas la même entrée en même temps."""
+        with _key_locks_guard:
+            return _key_locks.setdefault((os.path.abspath(self.dir), key), threading.RLock())
+
     # -----------------------------
     # Get / Set
     # -----------------------------
@@ -64,21 +90,42 @@ class CacheManager:
         key: str,
         compute_fn: Callable[[], object],
         expire: Optional[int] = None,
+        cache_if: Optional[Callable[[object], bool]] = None,
     ):
         """
         Tente un get() ; sinon compute_fn(), puis set() avec TTL.
         Sérialise automatiquement (pickle).
+        'cache_if' permet de ne pas persister un résultat (ex. valeur de repli).
+        Un thread qui demande une clé en cours de calcul attend ce calcul
+        puis relit le cache.
         """
         val = self._cache.get(key, default=None)
         if val is not None:
+            note_cache_access(True)
+            return val
+        with self.key_lock(key):
+            val = self._cache.get(key, default=None)
+            note_cache_access(val is not None)
+            if val is not None:
+                return val
+            val = compute_fn()
+            if val is None or (cache_if is not None and not cache_if(val)):
+                return val
+            try:
+                self._cache.set(key, val, expire=expire or self.default_ttl)
+            except Exception:
+                # on ne casse pas l'exécution si l'écriture échoue
+                pass
             return val
-        val = compute_fn()
+
+    def get(self, key: str, default=None):
+        return self._cache.get(key, default=default)
+
+    def set(self, key: str, value, expire: Optional[int] = None) -> bool:
         try:
-            self._cache.set(key, val, expire=expire or self.default_ttl)
+            return self._cache.set(key, value, expire=expire or self.default_ttl)
         except Exception:
-            # on ne casse pas l'exécution si l'écriture échoue
-            pass
-        return val
+            return False
 
     # -----------------------------
     # Clear helpers
@@ -103,11 +150,18 @@ class CacheManager:
         """
         Purge tout le cache lié au département + période.
         """
-        # On génère un 'préfixe de scope' stable
-        scope_prefix = self.make_key(
-            "", [f"dpt={dpt}", f"b={begin}", f"e={end}"]
-        ).rstrip("|")
-        return self.clear_prefix(scope_prefix)
+        # Les clés ont la forme namespace|name|dpt=…|b=…|e=…[|x=…] :
+        # on cherche le segment de scope quel que soit 'name'
+        scope = "|" + "|".join([f"dpt={dpt}", f"b={begin}", f"e={end}"]) + "|"
+        count = 0
+        for k in list(self._cache.iterkeys()):
+            if isinstance(k, str) and k.startswith(self.namespace + "|") and scope in k + "|":
+                try:
+                    del self._cache[k]
+                    count += 1
+                except Exception:
+                    pass
+        return count
 
     # -----------------------------
     # Lifecycle
@@ -117,3 +171,44 @@ class CacheManager:
             self._cache.close()
         except Exception:
             pass
+
+
+def cached_method(
+    name: str,
+    depends_on: Sequence[str] = (),
+    expire: Optional[int] = None,
+    cache_if: Optional[Callable[[object], bool]] = None,
+):
+    """
+    Décorateur : met en cache disque le résultat d'une méthode.
+
+    L'instance doit exposer :
+      - `cache` : un CacheManager (si None, la méthode est appelée directement)
+      - `cache_context()` : (dpt, begin, end, params) du contexte courant
+
+    La clé combine le contexte, les attributs listés dans `depends_on`
+    (seuils…) et les arguments scalaires de l'appel, sous forme d'empreinte.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, "cache", None)
+            if cache is None:
+                return fn(self, *args, **kwargs)
+            dpt, begin, end, params = self.cache_context()
+            params = dict(params)
+            params.update({attr: getattr(self, attr, None) for attr in depends_on})
+            # Seuls les arguments simples participent à la clé ; les objets EE
+            # passés en argument sont dérivés du contexte.
+            plain = (str, int, float, bool, type(None))
+            params["args"] = [a for a in args if isinstance(a, plain)]
+            params["kwargs"] = {k: v for k, v in sorted(kwargs.items()) if isinstance(v, plain)}
+            key = cache.key_context(name, dpt, begin, end, extra=cache.fingerprint(params))
+            return cache.getset(
+                key,
+                lambda: fn(self, *args, **kwargs),
+                expire=expire,
+                cache_if=cache_if,
+            )
+        return wrapper
+    return decorator
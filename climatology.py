@@ -0,0 +1,218 @@
+# climatology.py
+"""
+Référence pluriannuelle (climatologie) et anomalies de WEI, MNDWI et NDVI.
+
+Pour un département, les composites Sentinel-2 (voir compositing.py) des
+CLIMATOLOGY_YEARS années précédant la période analysée sont réduits une
+fois, année par année, et stockés localement (CacheManager) : une année
+passée ne change plus, seule l'année qui s'ajoute est calculée. La
+référence donne, par période de l'année (décade par défaut), la moyenne,
+l'écart-type et le nombre d'années de chaque indice.
+
+get_anomalies() compare la série de la période courante à cette référence
+(z-scores) sans recalculer l'historique ; le niveau d'alerte
+(ALERT_MESSAGES) vient alors de l'écart du WEI à la normale de la saison
+plutôt que d'un seuil absolu.
+
+Précalcul :
+    python climatology.py -d Bignona -d Ziguinchor --years 5
+    python climatology.py --offline -d Bignona      # backend fake_ee
+"""
+from __future__ import annotations
+import argparse
+import sys
+from datetime import date, datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+import ee_backend
+from cache_manager import CacheManager
+from collection_registry import fetch_collection_metadata
+from compositing import TemporalCompositor, group_acquisitions
+from config import (
+    ANOMALY_ALERT_THRESHOLDS,
+    CLIMATOLOGY_INDICES,
+    CLIMATOLOGY_MIN_YEARS,
+    CLIMATOLOGY_PERIOD,
+    CLIMATOLOGY_TTL,
+    CLIMATOLOGY_YEARS,
+    COUNTRY_CODE,
+    DEPARTMENT_NAME,
+    PROCESSING_SCALE,
+)
+from ee_backend import ee
+from parallel_eval import run_parallel, with_retry
+
+
+def period_of_year(day: date, period: str = CLIMATOLOGY_PERIOD) -> int:
+    """Rang de la période dans l'année : décade (1-36), semaine ISO, mois ou jour de l'année."""
+    if period == 'dekad':
+        return (day.month - 1) * 3 + min((day.day - 1) // 10, 2) + 1
+    if period == 'week':
+        return day.isocalendar()[1]
+    if period == 'month':
+        return day.month
+    if period == 'day':
+        return day.timetuple().tm_yday
+    raise ValueError(f"Période de climatologie inconnue : {period}")
+
+
+def anomaly_alert_level(z_score: Optional[float], thresholds=ANOMALY_ALERT_THRESHOLDS) -> int:
+    """Niveau d'alerte 0-4 (clés d'ALERT_MESSAGES) pour un écart normalisé du WEI."""
+    if z_score is None or not np.isfinite(z_score):
+        return 0
+    return sum(z_score >= threshold for threshold in thresholds)
+
+
+class Climatology:
+    """Référence pluriannuelle d'un FloodMonitoringSystem (département et filtre nuageux courants)."""
+
+    def __init__(
+        self,
+        monitoring_system,
+        years: int = CLIMATOLOGY_YEARS,
+        period: str = CLIMATOLOGY_PERIOD,
+        cache: Optional[CacheManager] = None,
+    ) -> None:
+        self.monitoring_system = monitoring_system
+        self.years = years
+        self.period = period
+        self.cache = cache or monitoring_system.cache
+
+    # -----------------------------
+    # Clés
+    # -----------------------------
+    def reference_years(self) -> List[int]:
+        """Les 'years' années civiles complètes précédant l'année de fin de la période."""
+        last = int(self.monitoring_system.end[:4]) - 1
+        return list(range(last - self.years + 1, last + 1))
+
+    def params(self) -> dict:
+        ms = self.monitoring_system
+        return {
+            'period': self.period,
+            'indices': CLIMATOLOGY_INDICES,
+            'scale': PROCESSING_SCALE,
+            'max_cloud': ms.max_cloud_percentage,
+        }
+
+    def _key(self, name: str, *parts) -> str:
+        ms = self.monitoring_system
+        return self.cache.make_key(name, [
+            f"cc={ms.country_code}", f"dpt={ms.department_name}", *parts,
+            f"x={self.cache.fingerprint(self.params())}",
+        ])
+
+    def year_key(self, year: int) -> str:
+        return self._key("climatology_year", f"year={year}")
+
+    def baseline_key(self) -> str:
+        years = self.reference_years()
+        return self._key("climatology", f"years={years[0]}-{years[-1]}")
+
+    # -----------------------------
+    # Calcul
+    # -----------------------------
+    def fetch_year(self, year: int) -> pd.DataFrame:
+        """Moyennes régionales des composites d'une année (deux allers-retours)."""
+        ms = self.monitoring_system
+        collection = ms.get_sentinel2_collection(f"{year}-01-01", f"{year + 1}-01-01").map(ms.calculate_indices)
+        metadata = fetch_collection_metadata({'s2': collection})['s2']
+        groups = group_acquisitions(metadata['ids'], metadata['dates'], self.period, 'median')
+        if not groups:
+            return pd.DataFrame(columns=['date'] + CLIMATOLOGY_INDICES)
+        composites = TemporalCompositor(collection, 'median').composites(groups)
+        stats_collection = ee.FeatureCollection(composites.map(ms.extract_image_statistics))
+        df = with_retry(lambda: ee_backend.ee_to_df(stats_collection))
+        return df.reindex(columns=['date'] + CLIMATOLOGY_INDICES)
+
+    def year_series(self, year: int) -> pd.DataFrame:
+        return self.cache.getset(self.year_key(year), lambda: self.fetch_year(year),
+                                 expire=CLIMATOLOGY_TTL, cache_if=lambda df: not df.empty)
+
+    def build(self) -> pd.DataFrame:
+        """
+        Calcule (années manquantes seulement, en parallèle) et stocke la
+        référence : une ligne par période de l'année, colonnes
+        '<indice>_mean', '<indice>_std' et '<indice>_years'.
+        """
+        years = self.reference_years()
+        series = run_parallel({str(year): (lambda year=year: self.year_series(year)) for year in years})
+        frames = [df.assign(year=int(year)) for year, df in series.items() if not df.empty]
+        if not frames:
+            print(f"⚠️ Aucune image Sentinel-2 pour la référence {years[0]}-{years[-1]}.")
+            return pd.DataFrame()
+
+        history = pd.concat(frames, ignore_index=True)
+        history['slot'] = [period_of_year(datetime.strptime(d, '%Y-%m-%d').date(), self.period)
+                           for d in history['date']]
+        # Une valeur par année et par période, puis statistiques entre années
+        yearly = history.groupby(['slot', 'year'])[CLIMATOLOGY_INDICES].mean()
+        grouped = yearly.groupby(level='slot')
+        baseline = pd.concat({
+            **{f"{index}_mean": grouped[index].mean() for index in CLIMATOLOGY_INDICES},
+            **{f"{index}_std": grouped[index].std(ddof=1) for index in CLIMATOLOGY_INDICES},
+            **{f"{index}_years": grouped[index].count() for index in CLIMATOLOGY_INDICES},
+        }, axis=1).reset_index()
+        self.cache.set(self.baseline_key(), baseline, expire=CLIMATOLOGY_TTL)
+        print(f"✅ Référence {years[0]}-{years[-1]} : {len(baseline)} périodes ({self.monitoring_system.department_name})")
+        return baseline
+
+    def load(self) -> Optional[pd.DataFrame]:
+        """Référence stockée pour le contexte courant, sans calcul ; None si absente."""
+        return self.cache.get(self.baseline_key())
+
+    # -----------------------------
+    # Anomalies
+    # -----------------------------
+    def anomalies(self, series: pd.DataFrame, baseline: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ajoute à la série (colonnes date et indices) la normale de chaque
+        indice ('<indice>_mean', '<indice>_std') et son écart normalisé
+        '<indice>_z' ; z vaut NaN si la référence a moins de
+        CLIMATOLOGY_MIN_YEARS années pour cette période.
+        """
+        df = series[['date'] + CLIMATOLOGY_INDICES].copy()
+        df['slot'] = [period_of_year(pd.Timestamp(d).date(), self.period) for d in df['date']]
+        df = df.merge(baseline, on='slot', how='left')
+        for index in CLIMATOLOGY_INDICES:
+            std = df[f"{index}_std"].where(df[f"{index}_years"] >= CLIMATOLOGY_MIN_YEARS)
+            df[f"{index}_z"] = (df[index] - df[f"{index}_mean"]) / std.replace(0, np.nan)
+        return df.drop(columns=[f"{index}_years" for index in CLIMATOLOGY_INDICES])
+
+
+# =============================================
+# === CLI ===
+# =============================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from batch import connect
+    from sekhem_utils import FloodMonitoringSystem
+
+    parser = argparse.ArgumentParser(description="Précalcul des références pluriannuelles (WEI, MNDWI, NDVI)")
+    parser.add_argument('--country', default=COUNTRY_CODE)
+    parser.add_argument('-d', '--department', action='append', dest='departments',
+                        help="département (répétable ; tous par défaut)")
+    parser.add_argument('--end', help="date de fin de la période analysée (défaut : hier)")
+    parser.add_argument('--years', type=int, default=CLIMATOLOGY_YEARS)
+    parser.add_argument('--period', choices=['dekad', 'week', 'month', 'day'], default=CLIMATOLOGY_PERIOD)
+    parser.add_argument('--service-account', help="clé JSON du compte de service Earth Engine")
+    parser.add_argument('--offline', action='store_true', help="backend simulé fake_ee (sans connexion)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        from testing.fake_ee import FakeEarthEngine
+        ee_backend.set_backend(FakeEarthEngine())
+    connect(args.service_account)
+
+    ms = FloodMonitoringSystem(args.country, (args.departments or [DEPARTMENT_NAME])[0], end_date=args.end)
+    for department in args.departments or ms.getAllDepartementsName():
+        ms.set_context(department_name=department)
+        Climatology(ms, years=args.years, period=args.period).build()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
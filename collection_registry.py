@@ -0,0 +1,45 @@
+# collection_registry.py
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from ee_backend import ee
+from parallel_eval import get_info
+
+
+def build_metadata_request(collections: Dict[str, ee.ImageCollection]) -> ee.Dictionary:
+    """
+    Construit un unique ee.Dictionary décrivant chaque collection :
+    nombre d'images, dates d'acquisition, couverture nuageuse et identifiants.
+    """
+    return ee.Dictionary({
+        name: ee.Dictionary({
+            'count': collection.size(),
+            'dates': collection.aggregate_array('system:time_start'),
+            'cloud': collection.aggregate_array('CLOUDY_PIXEL_PERCENTAGE'),
+            'ids': collection.aggregate_array('system:index'),
+        })
+        for name, collection in collections.items()
+        if collection is not None
+    })
+
+
+def fetch_collection_metadata(collections: Dict[str, Optional[ee.ImageCollection]]) -> dict:
+    """
+    Récupère en un seul getInfo les métadonnées de toutes les collections.
+    Retourne {name: {'count', 'dates' (YYYY-MM-DD), 'cloud', 'ids'}} ;
+    une collection absente (None) est décrite comme vide.
+    """
+    info = get_info(build_metadata_request(collections)) or {}
+    metadata = {}
+    for name in collections:
+        entry = info.get(name) or {}
+        metadata[name] = {
+            'count': int(entry.get('count') or 0),
+            'dates': [
+                datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+                for ms in entry.get('dates') or []
+            ],
+            'cloud': entry.get('cloud') or [],
+            'ids': entry.get('ids') or [],
+        }
+    return metadata
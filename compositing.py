@@ -0,0 +1,94 @@
+# compositing.py
+from __future__ import annotations
+import calendar
+import hashlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Sequence, Tuple
+from ee_backend import ee
+
+COMPOSITE_PERIODS = ('day', 'week', 'dekad', 'month')
+COMPOSITE_METHODS = ('median', 'mean', 'greenest')
+
+
+def period_bounds(day: date, period: str) -> Tuple[date, date]:
+    """
+    Période calendaire [début, fin[ contenant 'day' : jour, semaine (lundi),
+    décade (1-10, 11-20, 21-fin du mois) ou mois.
+    """
+    if period == 'day':
+        return day, day + timedelta(days=1)
+    if period == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if period == 'dekad':
+        first = min((day.day - 1) // 10, 2) * 10 + 1
+        start = day.replace(day=first)
+        if first < 21:
+            return start, day.replace(day=first + 10)
+        return start, day.replace(day=calendar.monthrange(day.year, day.month)[1]) + timedelta(days=1)
+    if period == 'month':
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    raise ValueError(f"Période de composite inconnue : {period} (attendu : {', '.join(COMPOSITE_PERIODS)})")
+
+
+def group_acquisitions(image_ids: Sequence[str], dates: Sequence[str], period: str, method: str) -> List[dict]:
+    """
+    Regroupe les acquisitions (identifiants et dates YYYY-MM-DD des métadonnées
+    de collection) par période calendaire, dans l'ordre chronologique.
+    Chaque groupe : {'id', 'start', 'end', 'image_ids'}. L'identifiant dérive
+    de la période et des images membres : il change si une nouvelle
+    acquisition rejoint la période (composite à recalculer), pas sinon.
+    """
+    groups: Dict[date, List[str]] = {}
+    for image_id, day in zip(image_ids, dates):
+        start, _ = period_bounds(datetime.strptime(day, '%Y-%m-%d').date(), period)
+        groups.setdefault(start, []).append(image_id)
+
+    result = []
+    for start in sorted(groups):
+        members = sorted(groups[start])
+        digest = hashlib.sha1(','.join(members).encode('utf-8')).hexdigest()[:10]
+        result.append({
+            'id': f"{method}_{period}_{start.isoformat()}_{digest}",
+            'start': start.isoformat(),
+            'end': period_bounds(start, period)[1].isoformat(),
+            'image_ids': members,
+        })
+    return result
+
+
+class TemporalCompositor:
+    """
+    Composites par période d'une collection d'images (indices déjà calculés) :
+      - 'median' / 'mean' : réduction pixel à pixel des images de la période ;
+      - 'greenest' : mosaïque de qualité (qualityMosaic) sur quality_band,
+        chaque pixel vient de l'image la plus végétalisée (la moins nuageuse).
+    Chaque composite porte la date de début de sa période (system:time_start),
+    l'identifiant du groupe (system:index) et le nombre d'images (image_count).
+    """
+
+    def __init__(self, collection: ee.ImageCollection, method: str = 'median', quality_band: str = 'NDVI') -> None:
+        if method not in COMPOSITE_METHODS:
+            raise ValueError(f"Méthode de composite inconnue : {method} (attendu : {', '.join(COMPOSITE_METHODS)})")
+        self.collection = collection
+        self.method = method
+        self.quality_band = quality_band
+
+    def composite(self, group: dict) -> ee.Image:
+        members = self.collection.filter(ee.Filter.inList('system:index', group['image_ids']))
+        if self.method == 'greenest':
+            image = members.qualityMosaic(self.quality_band)
+        else:
+            image = getattr(members, self.method)()
+        start = datetime.strptime(group['start'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        return image.set({
+            'system:time_start': int(start.timestamp() * 1000),
+            'system:index': group['id'],
+            'period_start': group['start'],
+            'period_end': group['end'],
+            'image_count': len(group['image_ids']),
+        })
+
+    def composites(self, groups: Sequence[dict]) -> ee.ImageCollection:
+        return ee.ImageCollection([self.composite(group) for group in groups])
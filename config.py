@@ -13,6 +13,7 @@ FIRES_SELECTED_BAND = 'Bright_ti4'
 FOREST_SELECTED_BAND = 'label'
 TEMPERATURE_SELECTED_BAND = 'LST_Day_1km'
 SENTINEL2_GREEN_BAND = 'B3'    # Bande verte (560 nm)
+SENTINEL2_RED_BAND = 'B4'      # Bande rouge (665 nm)
 SENTINEL2_NIR_BAND = 'B8'      # Proche infrarouge (842 nm)  
 SENTINEL2_SWIR1_BAND = 'B11'   # SWIR1 (1610 nm)
 SENTINEL2_SWIR2_BAND = 'B12'   # SWIR2 (2190 nm)
@@ -81,6 +82,40 @@ CHANGE_VISUALIZATION = {
     'palette': ['red', 'white', 'blue']
 }
 
+WEI_TREND_VISUALIZATION = {
+    'min': -0.3,
+    'max': 0.3,
+    'palette': ['b2182b', 'f7f7f7', '2166ac'],
+}
+
+# Puissance radiative (FRP, MW) en dessous de laquelle un pixel de feu est masqué
+FIRES_FRP_MIN = 5
+
+# Couches de la carte interactive (show_map), par identifiant de couche
+MAP_LAYER_VISUALIZATIONS = {
+    'fires': {
+        'min': FIRES_FRP_MIN, 'max': 50,
+        'palette': ['#FFFF00', '#FFA500', '#FF0000', '#800000', '#400000'],
+    },
+    'temperature': {
+        'min': 13000, 'max': 16500,
+        'palette': ['#0A4D8C', '#4FA3D1', '#A5E6A3', '#FFE066', '#FF8C42', '#C62828'],
+    },
+    'forest': {
+        'min': 0.15, 'max': 0.8,
+        'palette': ['#CDEAC0', '#7BD389', '#2E7D32', '#1B5E20', '#0B3D0B'],
+    },
+    'water': {
+        'min': 0.05, 'max': 0.8,
+        'palette': ['#CFEFFF', '#8EC9FF', '#4EA3FF', '#1E7AD9', '#0C4A99'],
+    },
+    'trend': WEI_TREND_VISUALIZATION,
+    'sar_flood': {
+        'min': 0, 'max': 1,
+        'palette': ['#1E7AD9'],
+    },
+}
+
 # === PARAMÈTRES DE CLASSIFICATION ===
 forestVisParams = {
     'min': 0,
@@ -103,6 +138,38 @@ SAR_VV_VISUALIZATION = {
     'bands': ['VV']
 }
 
+# === DÉTECTION RADAR (SENTINEL-1, sar_flood.py) ===
+# Source des statistiques d'inondation : 'optical' (WEI Sentinel-2), 'sar'
+# (VV Sentinel-1) ou 'auto' (SAR si moins de SAR_FALLBACK_MIN_S2_IMAGES
+# images Sentinel-2 passent le filtre nuageux)
+FLOOD_DETECTION_SOURCE = 'auto'
+SAR_FALLBACK_MIN_S2_IMAGES = 3
+# 'threshold' (VV < seuil) ou 'change' (idem + baisse de VV par rapport à la référence sèche)
+SAR_FLOOD_METHOD = 'change'
+SAR_WATER_THRESHOLD_DB = -18.0
+SAR_CHANGE_THRESHOLD_DB = -3.0
+# Une baisse ne compte comme eau que si VV reste sous ce seuil plus lâche
+# (sinon cultures, sols ou végétation qui changent seraient comptés)
+SAR_CHANGE_MAX_VV_DB = -15.0
+# Une seule géométrie d'acquisition dans les composites ('ASCENDING' ou 'DESCENDING')
+SAR_ORBIT_PASS = 'DESCENDING'
+SAR_SPECKLE_RADIUS = 50  # mètres (médiane focale contre le chatoiement)
+# Référence sèche : mois [début, fin[ de la dernière saison sèche achevée (février → mai)
+SAR_DRY_SEASON_MONTHS = (2, 6)
+
+# Bornes WEI des classes de risque 1..5 (<= 0.1, ]0.1, 0.3], …, > 0.7)
+WEI_RISK_BREAKS = [0.1, 0.3, 0.5, 0.7]
+
+# Occupation du sol : codes des classes et seuil NDVI bas (sol nu / urbain)
+LAND_COVER_CLASSES = {
+    'bare_soil': 1,
+    'agricultural': 2,
+    'vegetation': 3,
+    'urban': 4,
+    'water': 5
+}
+LAND_COVER_NDVI_LOW = 0.2
+
 FLOOD_RISK_THRESHOLDS = {
     'very_low': 1.0,
     'low': 5.0,
@@ -112,12 +179,37 @@ FLOOD_RISK_THRESHOLDS = {
 }
 
 # === PARAMÈTRES DE TRAITEMENT ===
+TREND_METHOD = 'linear'  # 'linear' (ee.Reducer.linearFit) ou 'sens' (pente de Sen)
 MAX_CLOUD_PERCENTAGE = 20
 FALLBACK_CLOUD_PERCENTAGE = 30 
 PROCESSING_SCALE = 100
 EXPORT_SCALE = 30
 STATISTICS_SCALE = 500
 MAX_PIXELS = 1e9
+# Requêtes Earth Engine concurrentes (pool borné) et relances sur erreur de quota
+EE_MAX_CONCURRENT_REQUESTS = 4
+EE_MAX_RETRIES = 4
+EE_RETRY_BASE_DELAY = 1.0   # secondes, doublé à chaque tentative
+EE_RETRY_MAX_DELAY = 30.0
+DEBUG_PANEL = False  # case « Performance » (coût du dernier rendu de la session) dans la barre latérale
+
+# Série temporelle : indices moyennés par image Sentinel-2
+TIMESERIES_INDICES = ['WEI', 'MNDWI', 'NDWI', 'NDVI', 'NDBI']
+TIMESERIES_COLUMNS = ['date', 'image_id'] + TIMESERIES_INDICES + ['valid_fraction', 'image_count']
+# Composites temporels réduits à la place des acquisitions (compositing.py) :
+# 'image' (une ligne par acquisition), 'day', 'week', 'dekad' ou 'month'
+TIMESERIES_COMPOSITE_PERIOD = 'dekad'
+TIMESERIES_COMPOSITE_METHOD = 'median'   # 'median', 'mean' ou 'greenest' (mosaïque de qualité NDVI)
+
+# === CLIMATOLOGIE ET ANOMALIES (climatology.py) ===
+CLIMATOLOGY_INDICES = ['WEI', 'MNDWI', 'NDVI']
+CLIMATOLOGY_YEARS = 5                    # années de référence précédant la période analysée
+CLIMATOLOGY_PERIOD = 'dekad'             # référence par 'dekad' (36/an), 'week', 'month' ou 'day' (jour de l'année)
+CLIMATOLOGY_TTL = 400 * 24 * 3600        # une année passée ne change plus
+CLIMATOLOGY_MIN_YEARS = 2                # années minimales par période pour un écart-type
+# Écart normalisé (z-score) du WEI à partir duquel on passe aux niveaux 1 à 4 d'ALERT_MESSAGES
+ANOMALY_ALERT_THRESHOLDS = [0.5, 1.0, 2.0, 3.0]
+TIMESERIES_STORE_TTL = 180 * 24 * 3600  # statistiques par image (immuables), réutilisées d'une période à l'autre
 
 EXPORT_SCALE_S2_10M = 10
 EXPORT_SCALE_S2_20M = 20
@@ -127,6 +219,40 @@ EXPORT_SCALE_S2_60M = 60
 DEPARTMENT_NAME = 'Bignona'
 COUNTRY_CODE = 'SEN'
 PREFFIX = 'T28PCU'
+GEOMETRY_SIMPLIFY_TOLERANCE = 50         # mètres, contour affiché sur la carte
+GEOMETRY_CACHE_TTL = 30 * 24 * 3600      # 30 jours : les limites ne changent pas
+
+# === PRÉCALCUL (precompute.py) ===
+DEFAULT_WINDOW_MONTHS = 3                # période glissante par défaut : 3 mois jusqu'à hier
+PRECOMPUTE_TTL = 36 * 3600               # statistiques, séries, tendances : un cycle quotidien + marge
+PRECOMPUTE_INTERVAL_HOURS = 3            # passage du worker en boucle (rafraîchit les tuiles)
+MAP_TILE_TTL = 4 * 3600                  # durée de vie retenue pour les URL de tuiles Earth Engine (jeton)
+MAP_TILE_REFRESH_MARGIN = 15 * 60        # renouvelle une URL un peu avant son expiration
+
+# === PROXY DE TUILES (tile_proxy.py) ===
+TILE_PROXY_ENABLED = False               # True : show_map pointe les couches EE vers le proxy local
+TILE_PROXY_HOST = '127.0.0.1'
+TILE_PROXY_PORT = 8765
+TILE_PROXY_PUBLIC_URL = None             # URL du proxy vue par le navigateur (défaut : http://hôte:port)
+TILE_PROXY_AUTOSTART = True              # démarre le proxy dans le processus Streamlit s'il ne répond pas
+TILE_CACHE_DIR = '.sekhem_tiles'         # tuiles z/x/y sur disque
+TILE_CACHE_MAX_MB = 1024                 # au-delà : éviction des tuiles les moins récemment servies
+TILE_FETCH_TIMEOUT = 20                  # secondes, téléchargement d'une tuile Earth Engine
+
+# === PYRAMIDES DE TUILES HORS LIGNE (offline_tiles.py) ===
+OFFLINE_TILES_FOLDER = 'Downloads/tiles'
+OFFLINE_TILE_FORMAT = 'mbtiles'          # 'mbtiles' (un fichier SQLite par couche) ou 'xyz' (dossiers z/x/y)
+OFFLINE_MIN_ZOOM = 8
+OFFLINE_MAX_ZOOM = 12                    # au-delà, le navigateur agrandit les tuiles du dernier niveau
+OFFLINE_MAP_MODE = False                 # True : show_map sert les couches depuis les pyramides exportées
+# Couches exportées et leur visualisation
+OFFLINE_TILE_LAYERS = {
+    'wei': MAP_LAYER_VISUALIZATIONS['water'],
+    'flood_risk': FLOOD_RISK_VISUALIZATION,
+    'fires': MAP_LAYER_VISUALIZATIONS['fires'],  # FRP masquée comme en ligne
+    'temperature': TEMPERATURE_VISUALIZATION,
+    'trees': MAP_LAYER_VISUALIZATIONS['forest'],
+}
 
 
 # === CHEMINS D'EXPORT ===
@@ -151,6 +277,35 @@ GIF_PARAMS = {
     'duration': 0.5
 }
 
+# === ANIMATIONS (animation.py) ===
+# Une image par période : 'image' (chaque acquisition), 'day', 'week', 'dekad' ou 'month'
+ANIMATION_DATASETS = {
+    'fires': {
+        'dataset': FIRES_DATASET_NAME,
+        'visualization': FIRES_VISUALIZATION,
+        'reducer': 'max',
+        'period': 'day',
+    },
+    'temperature': {
+        'dataset': TEMPERATURE_DATASET_NAME,
+        'visualization': TEMPERATURE_VISUALIZATION,
+        'reducer': 'median',
+        'period': 'image',  # composites 8 jours
+    },
+    'forest': {
+        'dataset': FOREST_DATASET_NAME,
+        'visualization': FOREST_VISUALIZATION,
+        'reducer': 'mode',  # classe 'label' la plus fréquente
+        'period': 'month',
+    },
+}
+ANIMATION_WORKERS = 8                    # vignettes téléchargées en parallèle
+ANIMATION_DIMENSIONS = DEFAULT_EXPORT_PARAMS['dimensions']
+# Rendu côté serveur des images manquantes en une requête :
+# 'filmstrip' (bande PNG découpée localement), 'video' (GIF décomposé) ou None (image par image)
+ANIMATION_SERVER_MODE = 'filmstrip'
+ANIMATION_SERVER_MAX_BYTES = 32 * 1024 ** 2  # par requête (pixels RGBA) ; limite Earth Engine : 48 Mo
+
 # === MESSAGES ET TEXTES ===
 ALERT_MESSAGES = {
     0: "Très faible - Pas de risque immédiat",
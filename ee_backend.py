@@ -0,0 +1,242 @@
+# ee_backend.py
+from __future__ import annotations
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import ee as _earthengine
+except ImportError:  # earthengine-api absent : seul un backend local est utilisable
+    _earthengine = None
+
+
+class RoundTripRecorder:
+    """
+    Journal thread-safe des allers-retours serveur (getInfo, getMapId,
+    ee_to_df…) : type, libellé, durée (réelle ou simulée) et octets reçus.
+    """
+
+    def __init__(self, max_events: Optional[int] = None) -> None:
+        self._lock = threading.Lock()
+        self.events: List[dict] = []
+        self.max_events = max_events
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """Appelle 'listener(event)' à chaque aller-retour (dans le thread appelant)."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def record(self, kind: str, label: str, duration: float, nbytes: int = 0) -> None:
+        event = {
+            'kind': kind,
+            'label': label,
+            'duration': float(duration),
+            'bytes': int(nbytes),
+            'timestamp': time.time(),
+        }
+        with self._lock:
+            self.events.append(event)
+            if self.max_events and len(self.events) > self.max_events:
+                del self.events[:len(self.events) - self.max_events]
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception:
+                pass
+
+    def reset(self) -> None:
+        with self._lock:
+            self.events.clear()
+
+    def count(self, kind: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(1 for e in self.events if kind is None or e['kind'] == kind)
+
+    def summary(self) -> Dict[str, dict]:
+        """{kind: {'count', 'duration', 'bytes'}} agrégé sur tous les événements."""
+        totals: Dict[str, dict] = {}
+        with self._lock:
+            for e in self.events:
+                t = totals.setdefault(e['kind'], {'count': 0, 'duration': 0.0, 'bytes': 0})
+                t['count'] += 1
+                t['duration'] += e['duration']
+                t['bytes'] += e['bytes']
+        return totals
+
+
+class _EarthEngineProxy:
+    """
+    Point d'accès unique à l'API Earth Engine utilisée par le projet.
+    `from ee_backend import ee` puis `ee.Image(...)` : chaque attribut est
+    résolu sur le backend actif (earthengine-api par défaut, ou un
+    backend local comme testing.fake_ee.FakeEarthEngine).
+    """
+
+    def __init__(self) -> None:
+        self._backend = _earthengine
+
+    def __getattr__(self, name: str):
+        backend = self.__dict__.get('_backend')
+        if backend is None:
+            raise ImportError(
+                "earthengine-api n'est pas installé : activez un backend local "
+                "avec ee_backend.set_backend(...)"
+            )
+        return getattr(backend, name)
+
+    def __repr__(self) -> str:
+        return f"<ee backend: {getattr(self._backend, '__name__', type(self._backend).__name__)}>"
+
+
+ee = _EarthEngineProxy()
+
+
+def get_backend():
+    """Retourne le module (ou objet) Earth Engine actif."""
+    return ee._backend
+
+
+def set_backend(backend=None) -> None:
+    """Active un backend ; None rétablit earthengine-api."""
+    ee._backend = backend if backend is not None else _earthengine
+
+
+def is_local_backend() -> bool:
+    """Vrai si le backend actif n'est pas earthengine-api."""
+    return ee._backend is not _earthengine
+
+
+@contextmanager
+def use_backend(backend):
+    """Active temporairement un backend."""
+    previous = ee._backend
+    set_backend(backend)
+    try:
+        yield backend
+    finally:
+        ee._backend = previous
+
+
+# =============================================
+# === ALLERS-RETOURS earthengine-api ===
+# =============================================
+
+# Journal des appels earthengine-api (les backends locaux ont le leur)
+RECORDER = RoundTripRecorder(max_events=10000)
+
+# Fonctions de ee.data qui déclenchent une requête serveur -> type d'aller-retour
+_EE_DATA_CALLS = {
+    'computeValue': 'getInfo',
+    'computeFeatures': 'ee_to_df',
+    'computePixels': 'computePixels',
+    'getMapId': 'getMapId',
+    'getThumbId': 'getThumbURL',
+    'getAssetRoots': 'getAssetRoots',
+    'getDownloadId': 'getDownloadURL',
+}
+_instrumented = False
+
+
+def _payload_size(result) -> int:
+    """Taille approximative (octets) d'une réponse serveur."""
+    try:
+        if hasattr(result, 'memory_usage'):
+            return int(result.memory_usage(deep=True).sum())
+        if isinstance(result, (bytes, bytearray)):
+            return len(result)
+        if isinstance(result, dict) and 'tile_fetcher' in result:
+            return len(str(result.get('mapid', '')))
+        return len(json.dumps(result, default=str))
+    except Exception:
+        return 0
+
+
+def _record_call(recorder: RoundTripRecorder, kind: str, fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        recorder.record(kind, fn.__name__, time.perf_counter() - start, _payload_size(result))
+        return result
+    wrapper._sekhem_recorded = True
+    return wrapper
+
+
+def instrument_earthengine(recorder: Optional[RoundTripRecorder] = None) -> bool:
+    """
+    Enregistre dans 'recorder' (RECORDER par défaut) chaque requête faite
+    par earthengine-api, en enveloppant les fonctions de ee.data.
+    Idempotent ; retourne False si earthengine-api n'est pas installé.
+    """
+    global _instrumented
+    if _earthengine is None:
+        return False
+    if _instrumented:
+        return True
+    recorder = recorder or RECORDER
+    for name, kind in _EE_DATA_CALLS.items():
+        fn = getattr(_earthengine.data, name, None)
+        if fn is not None and not getattr(fn, '_sekhem_recorded', False):
+            setattr(_earthengine.data, name, _record_call(recorder, kind, fn))
+    _instrumented = True
+    return True
+
+
+def get_recorder() -> RoundTripRecorder:
+    """Journal des allers-retours du backend actif."""
+    return getattr(ee._backend, 'recorder', None) or RECORDER
+
+
+def ee_to_df(collection):
+    """
+    Télécharge une FeatureCollection en DataFrame via le backend actif :
+    méthode du backend si elle existe, geemap.ee_to_df sinon.
+    """
+    converter = getattr(ee._backend, 'ee_to_df', None)
+    if converter is not None:
+        return converter(collection)
+    import geemap
+    return geemap.ee_to_df(collection)
+
+
+def fetch_tile(url_format: str, z: int, x: int, y: int, timeout: float = 20) -> bytes:
+    """
+    Télécharge une tuile z/x/y d'une couche getMapId via le backend actif :
+    méthode du backend si elle existe (rendu local), HTTP sinon.
+    """
+    fetcher = getattr(ee._backend, 'fetch_tile', None)
+    if fetcher is not None:
+        return fetcher(url_format, z, x, y)
+    import urllib.request
+    started = time.perf_counter()
+    with urllib.request.urlopen(url_format.format(z=z, x=x, y=y), timeout=timeout) as response:
+        data = response.read()
+    get_recorder().record('getTile', f"{z}/{x}/{y}", time.perf_counter() - started, len(data))
+    return data
+
+
+def fetch_thumbnail(url: str, timeout: float = 60) -> bytes:
+    """
+    Télécharge une vignette (getThumbURL) via le backend actif : méthode du
+    backend si elle existe (rendu local), HTTP sinon.
+    """
+    fetcher = getattr(ee._backend, 'fetch_thumbnail', None)
+    if fetcher is not None:
+        return fetcher(url)
+    import urllib.request
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        data = response.read()
+    get_recorder().record('getThumbnail', url.rsplit('/', 1)[-1], time.perf_counter() - started, len(data))
+    return data
@@ -6,10 +6,11 @@ from config import *
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-import ee
+from ee_backend import ee
 import hashlib
 from datetime import datetime, timedelta
 from streamlit_folium import st_folium
+from instrumentation import METRICS, span
 
 st.set_page_config(
     page_title="SEKHEM - Surveillance Environnementale et Inondations",
@@ -59,6 +60,17 @@ def get_cached_comprehensive_statistics(dept_name: str, begin_date: str, end_dat
         st.error(f"Erreur cache comprehensive stats: {e}")
     return {}
 
+@st.cache_data(ttl=1800)  # Cache pendant 30 minutes
+def get_cached_anomaly_alert(dept_name: str, begin_date: str, end_date: str):
+    """Cache du niveau d'alerte d'après les anomalies (référence pluriannuelle stockée)."""
+    try:
+        monitoring_system = st.session_state.get("monitoring_system")
+        if monitoring_system:
+            return monitoring_system.get_anomaly_alert()
+    except Exception as e:
+        st.error(f"Erreur cache anomalies: {e}")
+    return {'available': False}
+
 @st.cache_data(ttl=1800)  # Cache pendant 30 minutes
 def get_cached_temporal_data(dept_name: str, begin_date: str, end_date: str):
     """Cache des données temporelles."""
@@ -136,8 +148,10 @@ class FrontApp:
         try:
             with st.spinner("Chargement de la carte…"):
                 m = self.monitoring_system.show_map()
-                # Utiliser st_folium pour afficher la carte geemap dans Streamlit
-                return st_folium(m, height=600, width=True)
+                # Carte mémoïsée par contexte (show_map) ; clé stable et aucun objet
+                # renvoyé : déplacer la carte ou cocher une couche (LayerControl,
+                # côté navigateur) ne relance pas le script
+                return st_folium(m, height=600, width=True, key="main_map", returned_objects=[])
         except Exception as e:
             st.error(f"Erreur d'affichage de la carte : {e}")
             # Afficher une carte de base en cas d'erreur
@@ -305,6 +319,11 @@ class FrontApp:
             self.monitoring_system.begining,
             self.monitoring_system.end
         )
+        sar = flood_stats.get('source') == 'sar'
+        detection = "radar Sentinel-1, seuil VV" if sar else "seuil WEI"
+        if sar:
+            st.caption("📡 Trop peu d'images Sentinel-2 sans nuages : surfaces en eau détectées par radar Sentinel-1 "
+                       f"(VV moyen {flood_stats.get('vv_mean', 0):.1f} dB).")
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("💧 WEI moyen",
@@ -313,11 +332,26 @@ class FrontApp:
         with col2:
             st.metric("🏞️ Surface d'eau",
                     f"{flood_stats.get('water_area_ha', 0):.2f} ha",
-                    help="Surface totale d'eau détectée (seuil WEI)")
+                    help=f"Surface totale d'eau détectée ({detection})")
         with col3:
             st.metric("📊 % Zone en eau",
                     f"{flood_stats.get('flood_percentage', 0):.2f}%",
-                    help="Pourcentage de la zone couverte par l'eau (seuil WEI)")
+                    help=f"Pourcentage de la zone couverte par l'eau ({detection})")
+
+        alert = get_cached_anomaly_alert(
+            self.monitoring_system.department_name,
+            self.monitoring_system.begining,
+            self.monitoring_system.end
+        )
+        if alert.get('available'):
+            text = (f"**Niveau d'alerte {alert['level']}** : {alert['message']} "
+                    f"(WEI {alert['wei_z']:+.2f} σ par rapport à la normale, {alert['date']})")
+            if alert['level'] >= 3:
+                st.error(f"🚨 {text}")
+            elif alert['level'] >= 1:
+                st.warning(f"⚠️ {text}")
+            else:
+                st.info(f"✅ {text}")
 
     def draw_forest_dashboard(self):
         """Affiche le tableau de bord forestier avec courbe d'évolution."""
@@ -388,6 +422,7 @@ class FrontApp:
         if st.sidebar.button('🗑️ Vider le cache', key="clear_cache", help="Supprime les données mises en cache pour forcer un nouveau calcul"):
             try:
                 st.cache_data.clear()
+                self.monitoring_system.clear_cache()
                 st.sidebar.success("Cache vidé ! Rechargement en cours...")
                 st.rerun()
             except Exception as e:
@@ -422,10 +457,58 @@ class FrontApp:
             except Exception as e:
                 st.sidebar.error(f"Génération impossible : {e}")
 
+    def draw_debug_panel(self):
+        """
+        Panneau optionnel : coût du dernier rendu de cette session (durée,
+        allers-retours, cache) par appel. Le span vient de session_state et
+        non du registre METRICS, partagé par toutes les sessions du processus.
+        """
+        if not DEBUG_PANEL or not st.sidebar.checkbox("🐞 Performance", key="debug_panel",
+                                                      help="Coût du dernier rendu de la page"):
+            return
+        last = st.session_state.get("debug_last_rerun")
+        if last is None:
+            st.sidebar.info("Aucun rendu mesuré pour l'instant.")
+            return
+
+        st.sidebar.markdown("### 🐞 Dernier rendu")
+        col1, col2 = st.sidebar.columns(2)
+        col1.metric("⏱️ Durée", f"{last.duration:.2f} s")
+        col2.metric("🌐 Allers-retours", last.total_round_trips)
+        col1.metric("📦 Reçu", f"{last.bytes / 1024:.1f} Ko")
+        col2.metric("💾 Cache", f"{last.cache_hits} hit / {last.cache_misses} miss")
+
+        rows = []
+        def walk(node, depth):
+            for child in node.children:
+                rows.append({
+                    'appel': "  " * depth + child.name,
+                    'durée (s)': round(child.duration, 3),
+                    'allers-retours': child.total_round_trips,
+                    'Ko': round(child.bytes / 1024, 1),
+                    'cache': child.cache or '',
+                })
+                walk(child, depth + 1)
+        walk(last, 0)
+        if rows:
+            st.sidebar.dataframe(pd.DataFrame(rows), hide_index=True)
+        with st.sidebar.expander("Compteurs cumulés (toutes sessions du processus)"):
+            st.json(METRICS.snapshot()['counters'])
+
     # -------------------------
     # Page principale
     # -------------------------
     def paint(self):
+        """Rendu de la page, mesuré dans un span 'front.rerun' gardé dans la session (voir draw_debug_panel)."""
+        with span("front.rerun",
+                  department=self.monitoring_system.department_name,
+                  begin=self.monitoring_system.begining,
+                  end=self.monitoring_system.end) as rerun:
+            st.session_state["debug_last_rerun"] = rerun
+            self.paint_page()
+        self.draw_debug_panel()
+
+    def paint_page(self):
 
         # Style + logo optionnels
         try:
@@ -460,34 +543,32 @@ class FrontApp:
         if begin_dt != pd.to_datetime(begin_date) or end_dt != pd.to_datetime(end_date):
             st.sidebar.info("ℹ️ Les dates ont été réordonnées (début ≤ fin).")
 
-        # Appliquer changements de département
+        # Appliquer changements de département et de dates en une seule transaction
+        new_dep = None
         if sel_dep != st.session_state["dpt"]:
             st.session_state["dpt"] = sel_dep
-            with st.spinner("Changement de département…"):
-                try:
-                    self.monitoring_system.setDepartment(sel_dep)
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Erreur changement département : {e}")
+            new_dep = sel_dep
 
-        # Appliquer changements de dates
-        needs_update = False
+        dates_changed = False
         if begin_dt != st.session_state["begining"]:
             st.session_state["begining"] = begin_dt
-            needs_update = True
+            dates_changed = True
 
         if end_dt != st.session_state["end"]:
             st.session_state["end"] = end_dt
-            needs_update = True
+            dates_changed = True
 
-        if needs_update:
-            with st.spinner("Mise à jour de la période…"):
+        if new_dep is not None or dates_changed:
+            with st.spinner("Mise à jour du contexte…"):
                 try:
-                    self.monitoring_system.setBeginingDate(begin_dt.strftime('%Y-%m-%d'))
-                    self.monitoring_system.setEndDate(end_dt.strftime('%Y-%m-%d'))
+                    self.monitoring_system.set_context(
+                        department_name=new_dep,
+                        begin_date=begin_dt.strftime('%Y-%m-%d') if dates_changed else None,
+                        end_date=end_dt.strftime('%Y-%m-%d') if dates_changed else None
+                    )
                     st.rerun()
                 except Exception as e:
-                    st.error(f"Erreur mise à jour dates : {e}")
+                    st.error(f"Erreur mise à jour du contexte : {e}")
 
         # -----------------
         # Exports latéraux
@@ -517,7 +598,10 @@ class FrontApp:
                 date_debut_fr = date_debut.strftime("%d-%m-%Y")
                 date_fin_fr = date_fin.strftime("%d-%m-%Y")
                 st.markdown(f"**📅 Période:** {date_debut_fr} → {date_fin_fr}")
-                
+                precomputed = self.monitoring_system.precompute_status()
+                if precomputed and precomputed['departments'].get(self.monitoring_system.department_name) == 'ok':
+                    st.caption(f"⚡ Données précalculées le {precomputed['finished_at'].replace('T', ' à ')}")
+
                 st.markdown("### 📊 Métriques")
                 try:
                     # Utiliser les statistiques complètes avec cache
@@ -540,6 +624,7 @@ class FrontApp:
                 # Bouton pour forcer le rafraîchissement du cache
                 if st.button("🔄 Actualiser données", key="refresh_cache"):
                     st.cache_data.clear()
+                    self.monitoring_system.clear_cache()
                     st.rerun()
 
         with tab2:
@@ -0,0 +1,89 @@
+# geometry_index.py
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+from ee_backend import ee
+from cache_manager import CacheManager
+from parallel_eval import get_info
+from config import (
+    DEPARTMENT_DATASET_NAME,
+    GEOMETRY_CACHE_TTL,
+    GEOMETRY_SIMPLIFY_TOLERANCE,
+    MAX_PIXELS,
+    PROCESSING_SCALE,
+)
+
+
+class DepartmentGeometryIndex:
+    """
+    Index persistant des géométries de départements (geoBoundaries ADM2).
+    Les limites administratives ne changent pas : on stocke une fois pour
+    toutes, par (country_code, shapeName) :
+      - le GeoJSON simplifié (contour affiché sur la carte)
+      - le centroïde [lon, lat] et la bbox [ouest, sud, est, nord]
+      - la surface totale en hectares (dénominateur des pourcentages)
+    Les FeatureCollection EE filtrées sont aussi mémoïsées en mémoire.
+    """
+
+    def __init__(self, cache: Optional[CacheManager] = None, ttl: int = GEOMETRY_CACHE_TTL) -> None:
+        self.cache = cache or CacheManager()
+        self.ttl = ttl
+        self._collections: Dict[Tuple[str, str], ee.FeatureCollection] = {}
+        self._infos: Dict[Tuple[str, str], dict] = {}
+
+    # -----------------------------
+    # Objets EE (sans aller-retour)
+    # -----------------------------
+    def feature_collection(self, country_code: str, name: str) -> ee.FeatureCollection:
+        """FeatureCollection geoBoundaries du département (mémoïsée)."""
+        key = (country_code, name)
+        if key not in self._collections:
+            self._collections[key] = ee.FeatureCollection(DEPARTMENT_DATASET_NAME) \
+                .filter(ee.Filter.eq('shapeGroup', country_code)) \
+                .filter(ee.Filter.eq('shapeName', name))
+        return self._collections[key]
+
+    # -----------------------------
+    # Métadonnées persistées
+    # -----------------------------
+    def make_key(self, country_code: str, name: str) -> str:
+        return self.cache.make_key("geometry", [f"cc={country_code}", f"dpt={name}"])
+
+    def get(self, country_code: str, name: str) -> dict:
+        """
+        Retourne {'geojson', 'centroid', 'bbox', 'area_ha'} pour le département.
+        Un seul getInfo au premier appel, puis lecture disque / mémoire.
+        """
+        key = (country_code, name)
+        if key not in self._infos:
+            self._infos[key] = self.cache.getset(
+                self.make_key(country_code, name),
+                lambda: self._compute(country_code, name),
+                expire=self.ttl,
+            )
+        return self._infos[key]
+
+    def _compute(self, country_code: str, name: str) -> dict:
+        geometry = self.feature_collection(country_code, name).geometry()
+        area = ee.Image.pixelArea().reduceRegion(
+            reducer=ee.Reducer.sum(),
+            geometry=geometry,
+            scale=PROCESSING_SCALE,
+            maxPixels=MAX_PIXELS
+        ).get('area')
+        info = get_info(ee.Dictionary({
+            'geojson': geometry.simplify(GEOMETRY_SIMPLIFY_TOLERANCE),
+            'centroid': geometry.centroid(1).coordinates(),
+            'bounds': geometry.bounds(1).coordinates(),
+            'area': area,
+        }))
+
+        ring = info['bounds'][0]
+        lons = [p[0] for p in ring]
+        lats = [p[1] for p in ring]
+        area_m2 = info.get('area') or 0.0
+        return {
+            'geojson': info['geojson'],
+            'centroid': info['centroid'],
+            'bbox': [min(lons), min(lats), max(lons), max(lats)],
+            'area_ha': area_m2 / 10000 if area_m2 > 0 else 1.0,
+        }
@@ -0,0 +1,220 @@
+# index_backends.py
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional, Tuple
+from ee_backend import ee
+import numpy as np
+from config import (
+    LAND_COVER_CLASSES,
+    LAND_COVER_NDVI_LOW,
+    SENTINEL2_GREEN_BAND,
+    SENTINEL2_NIR_BAND,
+    SENTINEL2_RED_BAND,
+    SENTINEL2_SWIR1_BAND,
+    WEI_RISK_BREAKS,
+)
+
+
+class IndexBackend(ABC):
+    """
+    Interface commune des moteurs de calcul scientifique :
+      - calculate_indices : NDVI, NDWI, MNDWI, NDBI, WEI
+      - classify_land_cover : 5 classes + masques
+      - flood_risk : classes de risque 1..5 à partir du WEI
+    Les seuils et bornes viennent de config.py pour que tous les moteurs
+    produisent les mêmes résultats (vérifié par tests/test_index_backends.py).
+    """
+
+    @abstractmethod
+    def calculate_indices(self, bands):
+        ...
+
+    @abstractmethod
+    def classify_land_cover(self, indices, mndwi_threshold: float, ndbi_threshold: float, ndvi_threshold: float):
+        ...
+
+    @abstractmethod
+    def flood_risk(self, wei):
+        ...
+
+
+# =============================================
+# === EARTH ENGINE ===
+# =============================================
+
+class EarthEngineIndexBackend(IndexBackend):
+    """Moteur Earth Engine : construit les graphes d'expressions côté serveur."""
+
+    @staticmethod
+    def mask_clouds(image: ee.Image) -> ee.Image:
+        """Masque nuages et cirrus d'une image Sentinel-2 (bits 10 et 11 de QA60)."""
+        qa = image.select('QA60')
+        cloud_bit_mask = 1 << 10
+        cirrus_bit_mask = 1 << 11
+        mask = qa.bitwiseAnd(cloud_bit_mask).eq(0).And(
+            qa.bitwiseAnd(cirrus_bit_mask).eq(0)
+        )
+        return image.updateMask(mask)
+
+    def calculate_indices(self, image: ee.Image) -> ee.Image:
+        ndvi = image.normalizedDifference([SENTINEL2_NIR_BAND, SENTINEL2_RED_BAND]).rename('NDVI')
+        ndwi = image.normalizedDifference([SENTINEL2_GREEN_BAND, SENTINEL2_NIR_BAND]).rename('NDWI')
+        mndwi = image.normalizedDifference([SENTINEL2_GREEN_BAND, SENTINEL2_SWIR1_BAND]).rename('MNDWI')
+        ndbi = image.normalizedDifference([SENTINEL2_SWIR1_BAND, SENTINEL2_NIR_BAND]).rename('NDBI')
+
+        # Normalisation pour WEI
+        ndwi_norm = ndwi.unitScale(-1, 1)
+        mndwi_norm = mndwi.unitScale(-1, 1)
+
+        # WEI = (1 - NDWI) × MNDWI
+        wei = (ee.Image.constant(1).subtract(ndwi_norm)).multiply(mndwi_norm).rename('WEI')
+
+        return image.addBands([ndvi, ndwi, mndwi, ndbi, wei])
+
+    def classify_land_cover(self, s2_median: ee.Image, mndwi_threshold: float, ndbi_threshold: float, ndvi_threshold: float) -> dict:
+        ndvi = s2_median.select('NDVI')
+        ndbi = s2_median.select('NDBI')
+        water_mask = s2_median.select('MNDWI').gt(mndwi_threshold).rename('water_mask')
+        urban_mask = ndbi.gt(ndbi_threshold).And(ndvi.lt(LAND_COVER_NDVI_LOW)).rename('urban_mask')
+        vegetation_mask = ndvi.gt(ndvi_threshold).rename('vegetation_mask')
+        agricultural_mask = ndvi.gt(LAND_COVER_NDVI_LOW).And(
+            ndvi.lt(ndvi_threshold)
+        ).And(
+            ndbi.lt(ndbi_threshold)
+        ).rename('agricultural_mask')
+        bare_soil_mask = ndvi.lt(LAND_COVER_NDVI_LOW).And(ndbi.lt(ndbi_threshold)).rename('bare_soil_mask')
+
+        # Carte finale (les classes suivantes écrasent les précédentes)
+        land_cover = ee.Image.constant(0).rename('land_cover') \
+            .where(bare_soil_mask, LAND_COVER_CLASSES['bare_soil']) \
+            .where(agricultural_mask, LAND_COVER_CLASSES['agricultural']) \
+            .where(vegetation_mask, LAND_COVER_CLASSES['vegetation']) \
+            .where(urban_mask, LAND_COVER_CLASSES['urban']) \
+            .where(water_mask, LAND_COVER_CLASSES['water'])
+
+        return {
+            'land_cover': land_cover,
+            'water_mask': water_mask,
+            'urban_mask': urban_mask,
+            'vegetation_mask': vegetation_mask,
+            'agricultural_mask': agricultural_mask,
+            'bare_soil_mask': bare_soil_mask
+        }
+
+    def flood_risk(self, wei: ee.Image) -> ee.Image:
+        risk = wei.where(wei.lte(WEI_RISK_BREAKS[0]), 1)
+        for level, (low, high) in enumerate(zip(WEI_RISK_BREAKS[:-1], WEI_RISK_BREAKS[1:]), start=2):
+            risk = risk.where(wei.gt(low).And(wei.lte(high)), level)
+        return risk.where(wei.gt(WEI_RISK_BREAKS[-1]), len(WEI_RISK_BREAKS) + 1).rename('flood_risk')
+
+
+# =============================================
+# === NUMPY (HORS LIGNE) ===
+# =============================================
+
+def _row_chunks(shape: Tuple[int, ...], chunk_rows: Optional[int]) -> Iterator[slice]:
+    rows = shape[0] if shape else 1
+    step = chunk_rows or rows or 1
+    for start in range(0, max(rows, 1), step):
+        yield slice(start, start + step)
+
+
+class NumpyIndexBackend(IndexBackend):
+    """
+    Moteur local sur tableaux NumPy (tuiles Sentinel-2 téléchargées).
+
+    Reproduit la sémantique Earth Engine : un pixel masqué est NaN, et
+    normalizedDifference masque les pixels dont une bande est négative.
+    Les calculs sont vectorisés et faits par blocs de 'chunk_rows' lignes
+    pour borner la mémoire sur les grandes tuiles.
+    """
+
+    def __init__(self, chunk_rows: Optional[int] = 1024, dtype=np.float32) -> None:
+        self.chunk_rows = chunk_rows
+        self.dtype = dtype
+
+    @staticmethod
+    def normalized_difference(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        first = np.asarray(first, dtype=np.float64)
+        second = np.asarray(second, dtype=np.float64)
+        total = first + second
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nd = (first - second) / total
+        invalid = (first < 0) | (second < 0) | (total == 0) | np.isnan(first) | np.isnan(second)
+        nd[invalid] = np.nan
+        return nd
+
+    @staticmethod
+    def unit_scale(values: np.ndarray, low: float, high: float) -> np.ndarray:
+        return (values - low) / (high - low)
+
+    def calculate_indices(self, bands: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        'bands' : {'B3', 'B4', 'B8', 'B11'} -> tableaux de même forme (NaN = masqué).
+        Retourne {'NDVI', 'NDWI', 'MNDWI', 'NDBI', 'WEI'}.
+        """
+        green = np.asarray(bands[SENTINEL2_GREEN_BAND])
+        shape = green.shape
+        out = {name: np.empty(shape, dtype=self.dtype) for name in ('NDVI', 'NDWI', 'MNDWI', 'NDBI', 'WEI')}
+        for rows in _row_chunks(shape, self.chunk_rows):
+            b3 = green[rows]
+            b4 = np.asarray(bands[SENTINEL2_RED_BAND])[rows]
+            b8 = np.asarray(bands[SENTINEL2_NIR_BAND])[rows]
+            b11 = np.asarray(bands[SENTINEL2_SWIR1_BAND])[rows]
+            ndwi = self.normalized_difference(b3, b8)
+            mndwi = self.normalized_difference(b3, b11)
+            out['NDVI'][rows] = self.normalized_difference(b8, b4)
+            out['NDWI'][rows] = ndwi
+            out['MNDWI'][rows] = mndwi
+            out['NDBI'][rows] = self.normalized_difference(b11, b8)
+            # WEI = (1 - NDWI) × MNDWI, après normalisation [-1, 1] -> [0, 1]
+            out['WEI'][rows] = (1 - self.unit_scale(ndwi, -1, 1)) * self.unit_scale(mndwi, -1, 1)
+        return out
+
+    def classify_land_cover(self, indices: Dict[str, np.ndarray], mndwi_threshold: float, ndbi_threshold: float, ndvi_threshold: float) -> dict:
+        """
+        Retourne la carte 'land_cover' (0 = non classé) et les masques booléens.
+        Les comparaisons sur NaN sont fausses, comme un test masqué dans ee.Image.where.
+        """
+        ndvi = np.asarray(indices['NDVI'])
+        ndbi = np.asarray(indices['NDBI'])
+        mndwi = np.asarray(indices['MNDWI'])
+        shape = ndvi.shape
+        names = ('water_mask', 'urban_mask', 'vegetation_mask', 'agricultural_mask', 'bare_soil_mask')
+        result = {name: np.zeros(shape, dtype=bool) for name in names}
+        result['land_cover'] = np.zeros(shape, dtype=np.uint8)
+        with np.errstate(invalid='ignore'):
+            for rows in _row_chunks(shape, self.chunk_rows):
+                v, b, m = ndvi[rows], ndbi[rows], mndwi[rows]
+                masks = {
+                    'water_mask': m > mndwi_threshold,
+                    'urban_mask': (b > ndbi_threshold) & (v < LAND_COVER_NDVI_LOW),
+                    'vegetation_mask': v > ndvi_threshold,
+                    'agricultural_mask': (v > LAND_COVER_NDVI_LOW) & (v < ndvi_threshold) & (b < ndbi_threshold),
+                    'bare_soil_mask': (v < LAND_COVER_NDVI_LOW) & (b < ndbi_threshold),
+                }
+                land_cover = np.zeros(v.shape, dtype=np.uint8)
+                for name in ('bare_soil', 'agricultural', 'vegetation', 'urban', 'water'):
+                    land_cover[masks[f'{name}_mask']] = LAND_COVER_CLASSES[name]
+                for name, mask in masks.items():
+                    result[name][rows] = mask
+                result['land_cover'][rows] = land_cover
+        return result
+
+    def process_tile(self, bands: Dict[str, np.ndarray], mndwi_threshold: float, ndbi_threshold: float, ndvi_threshold: float) -> dict:
+        """Chaîne complète sur une tuile : indices, occupation du sol et risque d'inondation."""
+        indices = self.calculate_indices(bands)
+        land_cover = self.classify_land_cover(indices, mndwi_threshold, ndbi_threshold, ndvi_threshold)
+        return {**indices, **land_cover, 'flood_risk': self.flood_risk(indices['WEI'])}
+
+    def flood_risk(self, wei: np.ndarray) -> np.ndarray:
+        """Classes de risque 1..5 (NaN là où le WEI est masqué)."""
+        wei = np.asarray(wei, dtype=np.float64)
+        risk = np.full(wei.shape, np.nan, dtype=self.dtype)
+        with np.errstate(invalid='ignore'):
+            for rows in _row_chunks(wei.shape, self.chunk_rows):
+                w = wei[rows]
+                # np.digitize(right=True) : classe k si breaks[k-2] < w <= breaks[k-1]
+                levels = np.digitize(w, WEI_RISK_BREAKS, right=True) + 1
+                risk[rows] = np.where(np.isnan(w), np.nan, levels)
+        return risk
@@ -0,0 +1,259 @@
+# instrumentation.py
+"""
+Mesure des chemins chauds : spans, registre de métriques et logs structurés.
+
+    @traced('get_flood_statistics')
+    def get_flood_statistics(self): ...
+
+    with span('front.rerun', department=...):
+        ...
+
+Chaque span note sa durée, le contexte (département, dates), les allers-
+retours serveur (par type, via ee_backend.get_recorder()) et les accès
+cache (hit/miss, via CacheManager.getset). Les spans imbriqués cumulent
+les coûts de leurs enfants. À la fermeture, un span est :
+  - ajouté au registre en mémoire (METRICS) ;
+  - émis en JSON sur le logger 'sekhem.instrumentation'.
+"""
+from __future__ import annotations
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import ee_backend
+
+logger = logging.getLogger("sekhem.instrumentation")
+logger.addHandler(logging.NullHandler())
+
+# Spans ouverts dans le contexte courant (du plus externe au plus interne)
+_open_spans: contextvars.ContextVar[tuple] = contextvars.ContextVar("sekhem_open_spans", default=())
+
+
+class Span:
+    """Mesure d'un appel : durée, allers-retours, octets et accès cache."""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attrs) -> None:
+        self.name = name
+        self.parent = parent
+        self.attrs = {k: v for k, v in attrs.items() if v is not None}
+        self.start = time.time()
+        self.duration = 0.0
+        self.round_trips: Dict[str, int] = {}
+        self.bytes = 0
+        self.ee_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.error: Optional[str] = None
+        self.children: List["Span"] = []
+        self._lock = threading.Lock()
+
+    @property
+    def total_round_trips(self) -> int:
+        return sum(self.round_trips.values())
+
+    @property
+    def cache(self) -> Optional[str]:
+        """'hit' si tout est venu du cache, 'miss' si au moins un calcul, None sinon."""
+        if self.cache_misses:
+            return "miss"
+        if self.cache_hits:
+            return "hit"
+        return None
+
+    def add_round_trip(self, event: dict) -> None:
+        with self._lock:
+            self.round_trips[event["kind"]] = self.round_trips.get(event["kind"], 0) + 1
+            self.bytes += event["bytes"]
+            self.ee_time += event["duration"]
+
+    def add_cache_access(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def to_dict(self, children: bool = False) -> dict:
+        record = {
+            "span": self.name,
+            **self.attrs,
+            "start": round(self.start, 3),
+            "duration_s": round(self.duration, 4),
+            "round_trips": self.total_round_trips,
+            "calls": dict(self.round_trips),
+            "bytes": self.bytes,
+            "ee_time_s": round(self.ee_time, 4),
+            "cache": self.cache,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+        if self.parent is not None:
+            record["parent"] = self.parent.name
+        if self.error:
+            record["error"] = self.error
+        if children:
+            record["children"] = [c.to_dict(children=True) for c in self.children]
+        return record
+
+
+class MetricsRegistry:
+    """
+    Registre en mémoire, thread-safe :
+      - compteurs (cache.hit, cache.miss, round_trips.getInfo…)
+      - agrégats par nom de span (count, total_s, max_s, round_trips, bytes)
+      - derniers spans racine terminés (pour le panneau de debug)
+    """
+
+    def __init__(self, keep_last: int = 200) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.timings: Dict[str, dict] = {}
+        self.recent: deque = deque(maxlen=keep_last)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, span: Span) -> None:
+        with self._lock:
+            t = self.timings.setdefault(span.name, {
+                "count": 0, "total_s": 0.0, "max_s": 0.0, "round_trips": 0, "bytes": 0, "errors": 0,
+            })
+            t["count"] += 1
+            t["total_s"] += span.duration
+            t["max_s"] = max(t["max_s"], span.duration)
+            t["round_trips"] += span.total_round_trips
+            t["bytes"] += span.bytes
+            t["errors"] += 1 if span.error else 0
+            if span.parent is None:
+                self.recent.append(span)
+
+    def last(self, name: Optional[str] = None) -> Optional[Span]:
+        """Dernier span racine terminé (de nom 'name' si précisé)."""
+        with self._lock:
+            for span in reversed(self.recent):
+                if name is None or span.name == name:
+                    return span
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timings": {k: dict(v) for k, v in self.timings.items()},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.recent.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+# =============================================
+# === COLLECTE ===
+# =============================================
+
+def _on_round_trip(event: dict) -> None:
+    """Listener RoundTripRecorder : impute l'aller-retour aux spans ouverts."""
+    METRICS.increment(f"round_trips.{event['kind']}")
+    for span in _open_spans.get():
+        span.add_round_trip(event)
+
+
+_listening = weakref.WeakSet()
+_listening_lock = threading.Lock()
+
+
+def _listen(recorder) -> None:
+    with _listening_lock:
+        if recorder not in _listening:
+            recorder.add_listener(_on_round_trip)
+            _listening.add(recorder)
+
+
+def note_cache_access(hit: bool) -> None:
+    """Signale un accès au cache persistant (appelé par CacheManager.getset)."""
+    METRICS.increment("cache.hit" if hit else "cache.miss")
+    for span in _open_spans.get():
+        span.add_cache_access(hit)
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span]:
+    """Ouvre un span ; les allers-retours et accès cache du bloc lui sont imputés."""
+    if not ee_backend.is_local_backend():
+        ee_backend.instrument_earthengine()
+    _listen(ee_backend.get_recorder())
+
+    stack = _open_spans.get()
+    current = Span(name, parent=stack[-1] if stack else None, **attrs)
+    if current.parent is not None:
+        current.parent.children.append(current)
+    token = _open_spans.set(stack + (current,))
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _open_spans.reset(token)
+        METRICS.observe(current)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(current.to_dict(), default=str, ensure_ascii=False))
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Décorateur de méthode : span nommé 'name' (nom de la méthode par défaut)
+    avec le département et la période de `self.cache_context()` si disponible.
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            attrs = {}
+            context = getattr(self, "cache_context", None)
+            if context is not None:
+                try:
+                    attrs["department"], attrs["begin"], attrs["end"], _ = context()
+                except Exception:
+                    pass
+            with span(span_name, **attrs):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    stack = _open_spans.get()
+    return stack[-1] if stack else None
+
+
+def enable_json_logging(path: Optional[str] = None, level: int = logging.INFO) -> logging.Handler:
+    """Écrit un span JSON par ligne sur stderr ou dans 'path'."""
+    handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
+
+# SEKHEM_TRACE_LOG=<fichier> (ou "-" pour stderr) active les logs JSON au démarrage
+if os.environ.get("SEKHEM_TRACE_LOG"):
+    _trace_log = os.environ["SEKHEM_TRACE_LOG"]
+    enable_json_logging(None if _trace_log == "-" else _trace_log)
@@ -0,0 +1,89 @@
+# layer_graph.py
+from __future__ import annotations
+import threading
+from typing import Callable, Optional
+
+_locks_guard = threading.Lock()
+
+
+def _same(a: tuple, b: tuple) -> bool:
+    """Compare deux signatures : identité pour les objets, égalité pour les scalaires."""
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if x is y:
+            continue
+        if isinstance(x, (str, int, float, bool)) and type(x) is type(y) and x == y:
+            continue
+        return False
+    return True
+
+
+class lazy_layer:
+    """
+    Propriété calculée à la demande et mémoïsée par instance.
+
+    Les dépendances sont des noms d'attributs (seuils, collections, ou
+    d'autres lazy_layer). La valeur est recalculée uniquement si l'une
+    d'elles a changé depuis le dernier calcul : un nouvel objet EE
+    (comparé par identité) ou un nouveau seuil (comparé par valeur).
+
+        @lazy_layer('s2_median', 'wei_threshold')
+        def flood_extent(self): ...
+    """
+
+    def __init__(self, *depends_on: str) -> None:
+        self.depends_on = depends_on
+        self.fn: Optional[Callable] = None
+        self.name: Optional[str] = None
+
+    def __call__(self, fn: Callable) -> "lazy_layer":
+        self.fn = fn
+        self.name = fn.__name__
+        self.__doc__ = fn.__doc__
+        return self
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def _lock(self, obj) -> threading.RLock:
+        # Un verrou par couche et par instance : deux threads qui demandent la
+        # même couche ne la calculent (et ne déclenchent ses getInfo) qu'une fois.
+        # Les couches forment un graphe acyclique, donc pas d'interblocage.
+        with _locks_guard:
+            locks = obj.__dict__.setdefault("_layer_locks", {})
+            return locks.setdefault(self.name, threading.RLock())
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        memo = obj.__dict__.setdefault("_layer_memo", {})
+        signature = tuple(getattr(obj, dep) for dep in self.depends_on)
+        entry = memo.get(self.name)
+        if entry is not None and _same(entry[0], signature):
+            return entry[1]
+        with self._lock(obj):
+            entry = memo.get(self.name)
+            if entry is not None and _same(entry[0], signature):
+                return entry[1]
+            value = self.fn(obj)
+            memo[self.name] = (signature, value)
+            return value
+
+    def __set__(self, obj, value) -> None:
+        raise AttributeError(f"'{self.name}' est une couche calculée (lecture seule)")
+
+
+def is_materialized(obj, name: str) -> bool:
+    """Vrai si la couche 'name' a déjà été calculée pour cette instance."""
+    return name in obj.__dict__.get("_layer_memo", {})
+
+
+def invalidate(obj, *names: str) -> None:
+    """Oublie les couches indiquées (toutes si aucun nom n'est donné)."""
+    memo = obj.__dict__.get("_layer_memo", {})
+    if not names:
+        memo.clear()
+        return
+    for name in names:
+        memo.pop(name, None)
@@ -0,0 +1,379 @@
+# offline_tiles.py
+"""
+Pyramides de tuiles hors ligne (MBTiles ou XYZ) par département et période.
+
+Pour les antennes mal connectées : les couches de la carte (WEI, risque
+d'inondation, feux, température de surface, probabilité 'trees') sont
+rendues une fois, du niveau OFFLINE_MIN_ZOOM à OFFLINE_MAX_ZOOM sur
+l'emprise du département, avec les visualisations de config.py
+(OFFLINE_TILE_LAYERS). show_map(offline=True) sert ensuite ces tuiles via
+le proxy local (tile_proxy, route /offline/…) sans aucun appel Earth Engine,
+en se repliant sur la pyramide la plus récente du département quand la
+période courante n'a pas été exportée.
+
+Un export interrompu reprend là où il s'est arrêté (tuiles déjà présentes
+ignorées).
+
+CLI :
+    python offline_tiles.py -d Bignona --begin 2024-07-01 --end 2024-09-30
+    python offline_tiles.py -d Bignona --max-zoom 13 --format xyz
+    python offline_tiles.py -d Bignona --offline   # backend fake_ee
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import ee_backend
+from config import (
+    COUNTRY_CODE,
+    FIRES_FRP_MIN,
+    OFFLINE_MAX_ZOOM,
+    OFFLINE_MIN_ZOOM,
+    OFFLINE_TILE_FORMAT,
+    OFFLINE_TILE_LAYERS,
+    OFFLINE_TILES_FOLDER,
+    TEMPERATURE_SELECTED_BAND,
+    TILE_FETCH_TIMEOUT,
+)
+from ee_backend import ee
+from parallel_eval import run_parallel, with_retry
+
+LAYER_NAMES = {
+    'wei': "🌊 WEI (zones en eau)",
+    'flood_risk': "⚠️ Risque d'inondation",
+    'fires': "🔥 Feux de brousse",
+    'temperature': "🌡️ Température surface",
+    'trees': "🌳 Couverture forestière",
+}
+EXPORT_BATCH_SIZE = 64  # tuiles téléchargées en parallèle puis écrites ensemble
+
+
+# =============================================
+# === GRILLE WEB MERCATOR ===
+# =============================================
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_range(bbox: Sequence[float], z: int) -> Iterator[Tuple[int, int]]:
+    """Tuiles (x, y) du niveau z couvrant bbox [ouest, sud, est, nord]."""
+    west, south, east, north = bbox
+    x0, y0 = lonlat_to_tile(west, north, z)
+    x1, y1 = lonlat_to_tile(east, south, z)
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield x, y
+
+
+# =============================================
+# === STOCKAGE ===
+# =============================================
+
+class TilePyramid:
+    """
+    Jeu de tuiles d'une couche : fichier MBTiles (SQLite, lignes TMS) ou
+    dossier XYZ (<racine>/<z>/<x>/<y>.png + metadata.json).
+    """
+
+    def __init__(self, path: str, fmt: str = OFFLINE_TILE_FORMAT) -> None:
+        if fmt not in ('mbtiles', 'xyz'):
+            raise ValueError(f"Format de pyramide inconnu : {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        self._db = None
+
+    @classmethod
+    def open(cls, folder: str, name: str) -> Optional["TilePyramid"]:
+        """Pyramide existante 'name' dans 'folder' (MBTiles puis XYZ), sinon None."""
+        mbtiles = os.path.join(folder, f"{name}.mbtiles")
+        if os.path.exists(mbtiles):
+            return cls(mbtiles, 'mbtiles')
+        xyz = os.path.join(folder, name)
+        if os.path.exists(os.path.join(xyz, 'metadata.json')):
+            return cls(xyz, 'xyz')
+        return None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS tiles (
+                    zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB,
+                    PRIMARY KEY (zoom_level, tile_column, tile_row)
+                );
+            """)
+        return self._db
+
+    def _tile_path(self, z: int, x: int, y: int) -> str:
+        return os.path.join(self.path, str(z), str(x), f"{y}.png")
+
+    def has(self, z: int, x: int, y: int) -> bool:
+        if self.fmt == 'xyz':
+            return os.path.exists(self._tile_path(z, x, y))
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, 2 ** z - 1 - y)).fetchone()
+        return row is not None
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        if self.fmt == 'xyz':
+            try:
+                with open(self._tile_path(z, x, y), 'rb') as f:
+                    return f.read()
+            except OSError:
+                return None
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, 2 ** z - 1 - y)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put_many(self, tiles: Dict[Tuple[int, int, int], bytes]) -> None:
+        """Écrit des tuiles {(z, x, y): png} (y en convention XYZ)."""
+        if self.fmt == 'xyz':
+            for (z, x, y), data in tiles.items():
+                path = self._tile_path(z, x, y)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            return
+        with self._lock:
+            db = self._connection()
+            db.executemany(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                [(z, x, 2 ** z - 1 - y, sqlite3.Binary(data)) for (z, x, y), data in tiles.items()])
+            db.commit()
+
+    def set_metadata(self, metadata: Dict[str, object]) -> None:
+        values = {k: str(v) for k, v in metadata.items()}
+        if self.fmt == 'xyz':
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, 'metadata.json'), 'w', encoding='utf-8') as f:
+                json.dump(values, f, ensure_ascii=False, indent=2)
+            return
+        with self._lock:
+            db = self._connection()
+            db.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?)", list(values.items()))
+            db.commit()
+
+    def metadata(self) -> Dict[str, str]:
+        if self.fmt == 'xyz':
+            try:
+                with open(os.path.join(self.path, 'metadata.json'), encoding='utf-8') as f:
+                    return json.load(f)
+            except OSError:
+                return {}
+        with self._lock:
+            return dict(self._connection().execute("SELECT name, value FROM metadata").fetchall())
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def tileset_name(country_code: str, department: str, begin: str, end: str, layer_id: str) -> str:
+    """Nom de fichier d'une pyramide : pays_département_début_fin_couche."""
+    department = re.sub(r'[^\w-]+', '_', department)
+    return f"{country_code}_{department}_{begin}_{end}_{layer_id}"
+
+
+# =============================================
+# === EXPORT ===
+# =============================================
+
+class OfflineTileExporter:
+    """Rend les couches d'un FloodMonitoringSystem (département et période courants) en pyramides."""
+
+    def __init__(
+        self,
+        monitoring_system,
+        min_zoom: int = OFFLINE_MIN_ZOOM,
+        max_zoom: int = OFFLINE_MAX_ZOOM,
+        fmt: str = OFFLINE_TILE_FORMAT,
+        folder: str = OFFLINE_TILES_FOLDER,
+    ) -> None:
+        self.monitoring_system = monitoring_system
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.fmt = fmt
+        self.folder = folder
+
+    def layers(self) -> Dict[str, ee.Image]:
+        """Images des couches exportables (celles dont la collection n'est pas vide)."""
+        ms = self.monitoring_system
+        images = {}
+        if ms.wei_map is not None:
+            images['wei'] = ms.wei_map.clip(ms.department).updateMask(ms.wei_map.gte(ms.wei_threshold))
+            images['flood_risk'] = ms.flood_risk_map.clip(ms.department)
+        if ms.collection_size('fires') > 0:
+            # Même rendu que la carte en ligne : FRP maximale, pixels faibles masqués
+            fires_frp = ms.fires_dataset.select('frp').max().clip(ms.department)
+            images['fires'] = fires_frp.updateMask(fires_frp.gt(FIRES_FRP_MIN))
+        if ms.collection_size('temperature') > 0:
+            images['temperature'] = ms.temperature_dataset.median().select(TEMPERATURE_SELECTED_BAND).clip(ms.department)
+        if ms.collection_size('forest') > 0:
+            images['trees'] = ms.forest_dataset.median().select('trees').clip(ms.department)
+        return images
+
+    def tiles(self, bbox: Sequence[float]) -> List[Tuple[int, int, int]]:
+        return [(z, x, y) for z in range(self.min_zoom, self.max_zoom + 1) for x, y in tile_range(bbox, z)]
+
+    def path(self, layer_id: str) -> str:
+        ms = self.monitoring_system
+        name = tileset_name(ms.country_code, ms.department_name, ms.begining, ms.end, layer_id)
+        return os.path.join(self.folder, f"{name}.mbtiles" if self.fmt == 'mbtiles' else name)
+
+    def export_layer(self, layer_id: str, image: ee.Image, bbox: Sequence[float]) -> Tuple[str, int]:
+        """Rend une couche ; retourne (chemin, nombre de tuiles téléchargées)."""
+        ms = self.monitoring_system
+        vis = OFFLINE_TILE_LAYERS[layer_id]
+        pyramid = TilePyramid(self.path(layer_id), self.fmt)
+        try:
+            todo = [tile for tile in self.tiles(bbox) if not pyramid.has(*tile)]
+            if todo:
+                url_format = with_retry(lambda: image.getMapId(vis))['tile_fetcher'].url_format
+                for start in range(0, len(todo), EXPORT_BATCH_SIZE):
+                    batch = todo[start:start + EXPORT_BATCH_SIZE]
+                    pyramid.put_many(run_parallel({
+                        tile: (lambda tile=tile: with_retry(
+                            lambda: ee_backend.fetch_tile(url_format, *tile, timeout=TILE_FETCH_TIMEOUT)))
+                        for tile in batch
+                    }))
+            pyramid.set_metadata({
+                'name': LAYER_NAMES[layer_id],
+                'description': f"{ms.department_name} {ms.begining} → {ms.end}",
+                'format': 'png',
+                'type': 'overlay',
+                'version': '1.1',
+                'minzoom': self.min_zoom,
+                'maxzoom': self.max_zoom,
+                'bounds': ','.join(f"{v:.6f}" for v in bbox),
+            })
+            return pyramid.path, len(todo)
+        finally:
+            pyramid.close()
+
+    def export(self, layer_ids: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Exporte les couches demandées (toutes par défaut) ; retourne {couche: chemin}."""
+        bbox = self.monitoring_system.get_department_info()['bbox']
+        images = self.layers()
+        paths = {}
+        for layer_id in layer_ids or list(OFFLINE_TILE_LAYERS):
+            if layer_id not in images:
+                print(f"⚠️ Couche {layer_id} indisponible pour la période : ignorée.")
+                continue
+            paths[layer_id], fetched = self.export_layer(layer_id, images[layer_id], bbox)
+            print(f"✅ {layer_id} : {fetched} tuiles téléchargées → {paths[layer_id]}")
+        return paths
+
+
+def latest_tileset(folder: str, country_code: str, department: str, layer_id: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Pyramide la plus récente (date de fin la plus tardive) d'une couche du
+    département, toutes périodes confondues : (nom, début, fin), sinon None.
+    """
+    pattern = re.compile(
+        re.escape(tileset_name(country_code, department, '*', '*', layer_id))
+        .replace(re.escape('*'), r'(\d{4}-\d{2}-\d{2})') + r'(?:\.mbtiles)?$')
+    candidates = []
+    for entry in os.listdir(folder) if os.path.isdir(folder) else []:
+        match = pattern.match(entry)
+        if match:
+            name = entry[:-len('.mbtiles')] if entry.endswith('.mbtiles') else entry
+            candidates.append((match.group(2), match.group(1), name))
+    for end, begin, name in sorted(candidates, reverse=True):
+        if TilePyramid.open(folder, name) is not None:
+            return name, begin, end
+    return None
+
+
+def offline_map_tiles(monitoring_system, layer_ids: Optional[Sequence[str]] = None,
+                      folder: str = OFFLINE_TILES_FOLDER) -> List[Tuple[str, str, int]]:
+    """
+    Couches hors ligne disponibles pour le contexte courant :
+    [(nom, url de tuiles du proxy local, zoom natif maximal)].
+
+    La période glissante avançant chaque jour, une pyramide de la période
+    exacte manque souvent : on sert alors la plus récente du même pays,
+    département et couche. Le nom de la couche indique la période servie.
+    """
+    from tile_proxy import get_proxy
+    ms = monitoring_system
+    layers = []
+    for layer_id in layer_ids if layer_ids is not None else list(OFFLINE_TILE_LAYERS):
+        name = tileset_name(ms.country_code, ms.department_name, ms.begining, ms.end, layer_id)
+        begin, end = ms.begining, ms.end
+        pyramid = TilePyramid.open(folder, name)
+        if pyramid is None:
+            latest = latest_tileset(folder, ms.country_code, ms.department_name, layer_id)
+            if latest is None:
+                continue
+            name, begin, end = latest
+            print(f"ℹ️ Couche hors ligne {layer_id} : période {begin} → {end} servie "
+                  f"(aucune pyramide pour {ms.begining} → {ms.end}).")
+            pyramid = TilePyramid.open(folder, name)
+        try:
+            metadata = pyramid.metadata()
+        finally:
+            pyramid.close()
+        url = f"{get_proxy().public_url}/offline/{name}/{{z}}/{{x}}/{{y}}"
+        label = f"{metadata.get('name', LAYER_NAMES[layer_id])} ({begin} → {end})"
+        layers.append((label, url, int(metadata.get('maxzoom', OFFLINE_MAX_ZOOM))))
+    return layers
+
+
+# =============================================
+# === CLI ===
+# =============================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from batch import connect
+    from sekhem_utils import FloodMonitoringSystem
+
+    parser = argparse.ArgumentParser(description="Export des couches de la carte en pyramides de tuiles hors ligne")
+    parser.add_argument('--country', default=COUNTRY_CODE)
+    parser.add_argument('-d', '--department', action='append', dest='departments', required=True,
+                        help="département à exporter (répétable)")
+    parser.add_argument('--begin', help="date de début YYYY-MM-DD (défaut : période glissante)")
+    parser.add_argument('--end', help="date de fin YYYY-MM-DD (défaut : hier)")
+    parser.add_argument('-l', '--layer', action='append', dest='layers', choices=list(OFFLINE_TILE_LAYERS),
+                        help="couche à exporter (répétable ; toutes par défaut)")
+    parser.add_argument('--min-zoom', type=int, default=OFFLINE_MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=OFFLINE_MAX_ZOOM)
+    parser.add_argument('--format', choices=['mbtiles', 'xyz'], default=OFFLINE_TILE_FORMAT)
+    parser.add_argument('--folder', default=OFFLINE_TILES_FOLDER)
+    parser.add_argument('--service-account', help="clé JSON du compte de service Earth Engine")
+    parser.add_argument('--offline', action='store_true', help="backend simulé fake_ee (sans connexion)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        from testing.fake_ee import FakeEarthEngine
+        ee_backend.set_backend(FakeEarthEngine())
+    connect(args.service_account)
+
+    ms = FloodMonitoringSystem(args.country, args.departments[0], begin_date=args.begin, end_date=args.end)
+    for department in args.departments:
+        ms.set_context(department_name=department)
+        OfflineTileExporter(ms, args.min_zoom, args.max_zoom, args.format, args.folder).export(args.layers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# parallel_eval.py
+"""
+Évaluation concurrente des requêtes Earth Engine indépendantes.
+
+Les getInfo sont des appels réseau bloquants : les lancer en parallèle
+ramène la latence d'une requête composite à celle de l'appel le plus lent.
+
+  - run_parallel({'flood': fn1, 'forest': fn2}) : exécute des tâches
+    indépendantes dans un pool borné (EE_MAX_CONCURRENT_REQUESTS) ;
+  - with_retry(fn) / get_info(obj) : relance avec backoff exponentiel
+    (et gigue) sur les erreurs de quota Earth Engine.
+
+Les tâches s'exécutent dans une copie du contexte appelant (spans
+d'instrumentation compris). Une tâche qui appelle elle-même run_parallel
+exécute ses sous-tâches séquentiellement, ce qui évite tout interblocage
+du pool.
+"""
+from __future__ import annotations
+import contextvars
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from config import EE_MAX_CONCURRENT_REQUESTS, EE_MAX_RETRIES, EE_RETRY_BASE_DELAY, EE_RETRY_MAX_DELAY
+
+# Messages des erreurs transitoires (quota, concurrence, surcharge)
+_QUOTA_MARKERS = (
+    'too many concurrent',
+    'too many requests',
+    'quota exceeded',
+    'rate limit',
+    'resource_exhausted',
+    'resource exhausted',
+    'service unavailable',
+)
+# Codes HTTP, reconnus comme mots entiers (pas dans « 50331648 bytes »)
+_QUOTA_STATUS = re.compile(r'\b(429|503)\b')
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_worker = threading.local()
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Vrai si l'erreur est transitoire (quota / surcharge) et mérite une relance."""
+    message = str(error).lower()
+    return any(marker in message for marker in _QUOTA_MARKERS) or bool(_QUOTA_STATUS.search(message))
+
+
+def with_retry(
+    fn: Callable[[], object],
+    retries: int = EE_MAX_RETRIES,
+    base_delay: float = EE_RETRY_BASE_DELAY,
+    max_delay: float = EE_RETRY_MAX_DELAY,
+):
+    """Appelle fn() ; sur erreur de quota, relance jusqu'à 'retries' fois (backoff exponentiel)."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not is_quota_error(e):
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * (0.5 + random.random() / 2)
+            print(f"⏳ Quota Earth Engine atteint, nouvelle tentative dans {delay:.1f} s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+            attempt += 1
+
+
+def get_info(obj):
+    """obj.getInfo() avec relance sur erreur de quota."""
+    return with_retry(obj.getInfo)
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=EE_MAX_CONCURRENT_REQUESTS, thread_name_prefix='sekhem-ee')
+        return _pool
+
+
+def _run_in_worker(fn: Callable[[], object]):
+    _worker.active = True
+    try:
+        return fn()
+    finally:
+        _worker.active = False
+
+
+def run_parallel(tasks: Dict[str, Callable[[], object]]) -> Dict[str, object]:
+    """
+    Exécute des tâches indépendantes (sans argument) et retourne {nom: résultat}.
+    La première exception rencontrée est relancée une fois toutes les tâches terminées.
+    """
+    if len(tasks) <= 1 or getattr(_worker, 'active', False):
+        return {name: fn() for name, fn in tasks.items()}
+
+    pool = _get_pool()
+    futures = {
+        name: pool.submit(contextvars.copy_context().run, _run_in_worker, fn)
+        for name, fn in tasks.items()
+    }
+    results, error = {}, None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return results
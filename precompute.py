@@ -0,0 +1,160 @@
+# precompute.py
+"""
+Précalcul des résultats affichés par le front (worker hors Streamlit).
+
+Pour chaque département et la période glissante par défaut (3 derniers
+mois jusqu'à hier), on calcule par les méthodes mêmes de
+FloodMonitoringSystem, donc avec des clés de cache identiques à celles
+du front :
+  - métadonnées des collections, géométrie et liste des départements ;
+  - statistiques inondations et forêts ;
+  - série temporelle Sentinel-2 et ajustement de la tendance du WEI ;
+  - URL de tuiles des couches de la carte par défaut.
+Les résultats vont dans le cache disque CacheManager (TTL PRECOMPUTE_TTL,
+MAP_TILE_TTL pour les tuiles) ; le front les lit avant tout calcul.
+Les entrées encore valides ne sont pas recalculées : relancer le worker
+toutes les PRECOMPUTE_INTERVAL_HOURS ne rafraîchit que ce qui a expiré
+(tuiles, nouvelle période au changement de jour).
+
+CLI :
+    python precompute.py                   # un passage (cron nocturne)
+    python precompute.py --loop            # passage toutes les PRECOMPUTE_INTERVAL_HOURS
+    python precompute.py -d Bignona --offline
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from batch import connect
+from cache_manager import CacheManager
+from config import COUNTRY_CODE, PRECOMPUTE_INTERVAL_HOURS, PRECOMPUTE_TTL
+from instrumentation import span
+from parallel_eval import run_parallel
+from sekhem_utils import FloodMonitoringSystem
+from time_window import default_window
+
+
+class Precomputer:
+    """Remplit le cache persistant pour une liste de départements et une période."""
+
+    def __init__(
+        self,
+        country_code: str = COUNTRY_CODE,
+        departments: Optional[Sequence[str]] = None,
+        begin_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        cache: Optional[CacheManager] = None,
+    ) -> None:
+        default_begin, default_end = default_window()
+        self.country_code = country_code
+        self.begining = begin_date or default_begin
+        self.end = end_date or default_end
+        self.cache = cache or CacheManager(default_ttl=PRECOMPUTE_TTL)
+        self.monitoring_system = FloodMonitoringSystem(
+            country_code,
+            begin_date=self.begining,
+            end_date=self.end,
+            cache=self.cache,
+        )
+        # Liste des départements du sélecteur du front (mise en cache au passage)
+        all_departments = self.monitoring_system.getAllDepartementsName()
+        self.departments = list(departments) if departments else all_departments
+
+    def products(self) -> Dict[str, Callable[[], object]]:
+        """Produits précalculés pour le département courant (tâches indépendantes)."""
+        ms = self.monitoring_system
+        return {
+            'flood_stats': ms.get_flood_statistics,
+            'forest_stats': ms.get_forest_statistics,
+            'trend': lambda: ms.flood_trend,  # construit la série partagée (ms.timeseries)
+            'map_tiles': ms.show_map,
+            'climatology': ms.climatology.build,  # années de référence déjà stockées : calcul local
+        }
+
+    def warm_department(self, department_name: str) -> str:
+        """Précalcule un département ; retourne 'ok' ou le message d'erreur."""
+        ms = self.monitoring_system
+        try:
+            with span('precompute.department', department=department_name, begin=self.begining, end=self.end):
+                ms.set_context(department_name=department_name)
+                ms.get_department_info()
+                ms.collection_metadata
+                run_parallel(self.products())
+            return 'ok'
+        except Exception as e:
+            print(f"❌ Précalcul impossible pour {department_name} : {e}")
+            return f"{type(e).__name__}: {e}"
+
+    def run(self) -> dict:
+        """Un passage sur tous les départements ; le bilan est aussi écrit dans le cache."""
+        started = time.time()
+        results = {}
+        for name in self.departments:
+            results[name] = self.warm_department(name)
+            print(f"{'✅' if results[name] == 'ok' else '❌'} {name}")
+        status = {
+            'country_code': self.country_code,
+            'begin': self.begining,
+            'end': self.end,
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'duration_s': round(time.time() - started, 1),
+            'departments': results,
+        }
+        self.cache.set(self.monitoring_system.precompute_status_key(), status)
+        return status
+
+
+# =============================================
+# === CLI ===
+# =============================================
+
+def run_once(args) -> dict:
+    precomputer = Precomputer(
+        country_code=args.country,
+        departments=args.departments,
+        begin_date=args.begin,
+        end_date=args.end,
+    )
+    status = precomputer.run()
+    done = sum(1 for result in status['departments'].values() if result == 'ok')
+    print(f"✅ {done}/{len(status['departments'])} départements précalculés "
+          f"({status['begin']} → {status['end']}, {status['duration_s']} s)")
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Précalcul du cache SEKHEM (statistiques, séries, tendances, tuiles)")
+    parser.add_argument('--country', default=COUNTRY_CODE, help="code pays geoBoundaries (défaut : %(default)s)")
+    parser.add_argument('-d', '--department', action='append', dest='departments',
+                        help="département à précalculer (répétable ; tous par défaut)")
+    parser.add_argument('--begin', help="date de début YYYY-MM-DD (défaut : période glissante)")
+    parser.add_argument('--end', help="date de fin YYYY-MM-DD (défaut : hier)")
+    parser.add_argument('--loop', action='store_true', help="relance le précalcul à intervalle régulier")
+    parser.add_argument('--interval-hours', type=float, default=PRECOMPUTE_INTERVAL_HOURS)
+    parser.add_argument('--service-account', help="clé JSON du compte de service Earth Engine")
+    parser.add_argument('--offline', action='store_true', help="backend simulé fake_ee (sans connexion)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        import ee_backend
+        from testing.fake_ee import FakeEarthEngine
+        ee_backend.set_backend(FakeEarthEngine())
+    connect(args.service_account)
+
+    if not args.loop:
+        status = run_once(args)
+        return 0 if all(result == 'ok' for result in status['departments'].values()) else 1
+
+    while True:
+        try:
+            run_once(args)
+        except Exception as e:
+            print(f"❌ Erreur lors du précalcul : {e}")
+        time.sleep(args.interval_hours * 3600)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# sar_flood.py
+"""
+Détection des inondations par radar Sentinel-1 (COPERNICUS/S1_GRD, VV en dB).
+
+Le radar traverse les nuages : en saison des pluies, quand le filtre
+nuageux ne laisse presque plus d'images Sentinel-2, l'étendue d'eau est
+estimée à partir de la rétrodiffusion VV, faible sur les surfaces en eau
+(réflexion spéculaire) :
+  - 'threshold' : VV < SAR_WATER_THRESHOLD_DB ;
+  - 'change' : idem, plus les pixels dont VV a baissé d'au moins
+    |SAR_CHANGE_THRESHOLD_DB| par rapport à une référence sèche (médiane de
+    la dernière saison sèche) ET reste sous SAR_CHANGE_MAX_VV_DB, ce qui
+    rattrape l'eau peu profonde que le seuil absolu manque sans compter
+    les changements de cultures, de sol ou de végétation.
+
+Seules les acquisitions de l'orbite SAR_ORBIT_PASS sont gardées : la
+médiane ne mélange pas les géométries ascendante et descendante.
+
+Le chatoiement (speckle) est réduit par la médiane temporelle puis par une
+médiane focale de rayon SAR_SPECKLE_RADIUS mètres. La médiane commutant
+avec la conversion dB ↔ linéaire, le filtrage se fait directement en dB.
+"""
+from __future__ import annotations
+from datetime import date
+from typing import Optional, Tuple
+
+from config import (
+    SAR_CHANGE_MAX_VV_DB,
+    SAR_CHANGE_THRESHOLD_DB,
+    SAR_DRY_SEASON_MONTHS,
+    SAR_FLOOD_METHOD,
+    SAR_ORBIT_PASS,
+    SAR_SPECKLE_RADIUS,
+    SAR_WATER_THRESHOLD_DB,
+)
+from ee_backend import ee
+
+SAR_FLOOD_METHODS = ('threshold', 'change')
+
+
+def dry_reference_window(end: str, months: Tuple[int, int] = SAR_DRY_SEASON_MONTHS) -> Tuple[str, str]:
+    """
+    Fenêtre [début, fin[ (YYYY-MM-DD) de la dernière saison sèche achevée
+    au plus tard à la date 'end'.
+    """
+    end_day = date.fromisoformat(end[:10])
+    first, last = months
+    year = end_day.year if date(end_day.year, last, 1) <= end_day else end_day.year - 1
+    return date(year, first, 1).isoformat(), date(year, last, 1).isoformat()
+
+
+def prepare_s1(collection: ee.ImageCollection, orbit_pass: str = SAR_ORBIT_PASS) -> ee.ImageCollection:
+    """Acquisitions IW d'une seule orbite ('ASCENDING' / 'DESCENDING') avec polarisation VV, bande VV seule."""
+    return collection \
+        .filter(ee.Filter.eq('instrumentMode', 'IW')) \
+        .filter(ee.Filter.eq('orbitProperties_pass', orbit_pass)) \
+        .filter(ee.Filter.listContains('transmitterReceiverPolarisation', 'VV')) \
+        .select('VV')
+
+
+class SarFloodMapper:
+    """Étendue d'eau (0/1, bande 'flood_extent') à partir de composites VV filtrés."""
+
+    def __init__(
+        self,
+        method: str = SAR_FLOOD_METHOD,
+        water_threshold: float = SAR_WATER_THRESHOLD_DB,
+        change_threshold: float = SAR_CHANGE_THRESHOLD_DB,
+        change_max_vv: float = SAR_CHANGE_MAX_VV_DB,
+        speckle_radius: float = SAR_SPECKLE_RADIUS,
+        orbit_pass: str = SAR_ORBIT_PASS,
+    ) -> None:
+        if method not in SAR_FLOOD_METHODS:
+            raise ValueError(f"Méthode SAR inconnue : {method} (attendu : {', '.join(SAR_FLOOD_METHODS)})")
+        self.method = method
+        self.water_threshold = water_threshold
+        self.change_threshold = change_threshold
+        self.change_max_vv = change_max_vv
+        self.speckle_radius = speckle_radius
+        self.orbit_pass = orbit_pass
+
+    def __repr__(self) -> str:
+        # Stable : sert d'empreinte dans les clés de cache (cached_method depends_on)
+        return (f"SarFloodMapper(method={self.method!r}, water_threshold={self.water_threshold}, "
+                f"change_threshold={self.change_threshold}, change_max_vv={self.change_max_vv}, "
+                f"speckle_radius={self.speckle_radius}, orbit_pass={self.orbit_pass!r})")
+
+    def backscatter(self, collection: ee.ImageCollection) -> ee.Image:
+        """
+        Médiane temporelle de VV (dB) filtrée du chatoiement. Une image
+        entièrement masquée est ajoutée à la collection : une collection vide
+        (référence sans acquisition) donne un composite masqué plutôt qu'une
+        image sans bande.
+        """
+        empty = ee.Image.constant(0).rename('VV').updateMask(0)
+        return prepare_s1(collection, self.orbit_pass).merge(ee.ImageCollection([empty])).median() \
+            .focal_median(self.speckle_radius, 'circle', 'meters') \
+            .rename('VV')
+
+    def flood_extent(self, current: ee.Image, reference: Optional[ee.Image] = None) -> ee.Image:
+        """
+        Pixels en eau du composite courant (1). En mode 'change', s'y ajoutent
+        les pixels assombris par rapport à la référence et restés sous le
+        seuil lâche change_max_vv.
+        """
+        water = current.lt(self.water_threshold)
+        if self.method == 'change' and reference is not None:
+            # Sans référence (pixel masqué), seul le seuil absolu s'applique
+            darkening = current.subtract(reference).lt(self.change_threshold) \
+                .And(current.lt(self.change_max_vv)).unmask(0)
+            water = water.Or(darkening)
+        return water.rename('flood_extent')
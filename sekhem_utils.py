@@ -1,5 +1,6 @@
+import copy
 import json
-import ee
+from string import Template
 import folium
 from folium import LayerControl
 import geemap
@@ -9,411 +10,44 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 from ipywidgets import interact, widgets
 from IPython.display import display
 from config import *
 import streamlit as st
 from branca.element import Element
+from statistics_engine import StatisticsBatch, adaptive_forest_threshold, fit_trend
+from cache_manager import CacheManager, cached_method
+from geometry_index import DepartmentGeometryIndex
+from timeseries_store import TimeSeriesStore
+from tile_cache import TileUrlCache
+from compositing import TemporalCompositor, group_acquisitions
+from time_window import default_window
+from sar_flood import SarFloodMapper, dry_reference_window
+from climatology import Climatology, anomaly_alert_level
+from animation import AnimationExporter
+from offline_tiles import offline_map_tiles
+from tile_proxy import proxied_url
+from layer_graph import lazy_layer
+from collection_registry import fetch_collection_metadata
+from index_backends import EarthEngineIndexBackend
+from instrumentation import traced
+from parallel_eval import get_info, run_parallel, with_retry
+import ee_backend
+from ee_backend import ee
 
-class FloodMonitoringSystem:
-    def __init__(
-        self,
-        country_code: str = COUNTRY_CODE,
-        department_name: str = DEPARTMENT_NAME,
-        begin_date: str = (datetime.now() + relativedelta(months=-3)).strftime('%Y-%m-%d'),
-        end_date: str = (datetime.now() + relativedelta(days=-1)).strftime('%Y-%m-%d')
-    ):
-        # --- Initialisation des paramètres ---
-        self.country_code = country_code
-        self.department_name = department_name
-        self.begining = begin_date
-        self.end = end_date
-        self.project_name = PROJECT_NAME
-        
-        # --- Seuils et paramètres de classification ---
-        self.wei_threshold = 0.3
-        self.mndwi_threshold = WATER_THRESHOLD_MNDWI
-        self.ndwi_threshold = WATER_THRESHOLD_NDWI
-        self.ndbi_threshold = 0.1
-        self.ndvi_threshold = 0.4
-        self.urban_weight = 3
-        
-        # --- Connexion à GEE ---
-        self.connect_gee()
-        
-        # --- Récupération du département ---
-        self.department = self.get_department(department_name)
-        
-        # --- Initialisation des datasets ---
-        self.fires_dataset = None
-        self.temperature_dataset = None
-        self.forest_dataset = None
-        self.s2_collection = None
-        self.s1_collection = None
-        
-        # --- Initialisation des couches ---
-        self.wei_map = None
-        self.mndwi_map = None
-        self.ndwi_map = None
-        self.urban_mask = None
-        self.vegetation_mask = None
-        self.water_mask = None
-        self.flood_risk_map = None
-        self.flood_trend = None
-        self.permanent_water_mask = None
-        self.flood_extent = None
-        self.land_cover_map = None
-        
-        # --- Mise à jour des datasets ---
-        self.update_datasets()
-        
-        # --- Détection des inondations ---
-        self.detect_floods()
-
-    # =============================================
-    # === CONNEXION ET RÉCUPÉRATION DES DONNÉES ===
-    # =============================================
-    
-    def connect_gee(self):
-        """Connexion à Google Earth Engine."""
-        try:
-            try:
-                ee.data.getAssetRoots()
-                return
-            except Exception:
-                pass
-            service_account_info = st.secrets["sekhem-earthengine"]
-
-            try:
-                service_account_dict = dict(service_account_info)
-            except Exception:
-                service_account_dict = {k: str(v) for k, v in service_account_info.items()}
-
-            credentials = ee.ServiceAccountCredentials(
-                email=service_account_dict["client_email"],
-                key_data=json.dumps(service_account_dict)
-            )
-            ee.Initialize(credentials)
-            print("Earth Engine initialisé avec succès!")
-        except Exception as e:
-            st.error(f"Erreur Earth Engine: {e}")
-            raise
-
-    def get_department(self, name: str):
-        """Récupère le département depuis le dataset geoBoundaries."""
-        return ee.FeatureCollection(DEPARTMENT_DATASET_NAME) \
-            .filter(ee.Filter.eq('shapeGroup', self.country_code)) \
-            .filter(ee.Filter.eq('shapeName', name))
-
-    def getAllDepartementsName(self):
-        """Retourne la liste des noms de tous les départements."""
-        try:
-            departments = ee.FeatureCollection(DEPARTMENT_DATASET_NAME).filter(
-                ee.Filter.eq('shapeGroup', self.country_code)
-            )
-            return departments.aggregate_array('shapeName').getInfo()
-        except Exception as e:
-            print(f"❌ Erreur lors de la récupération des départements : {e}")
-            return [self.department_name]
-
-    def setDepartment(self, department_name):
-        """Change le département actuel."""
-        try:
-            self.department = self.get_department(department_name)
-            self.department_name = department_name
-            self.update_datasets()
-            self.detect_floods()
-        except Exception as e:
-            print(f"❌ Erreur lors du changement de département : {e}")
-
-    def setBeginingDate(self, date_str):
-        """Change la date de début."""
-        try:
-            self.begining = date_str
-            self.update_datasets()
-            self.detect_floods()
-        except Exception as e:
-            print(f"❌ Erreur lors du changement de la date de début : {e}")
-
-    def setEndDate(self, date_str):
-        """Change la date de fin."""
-        try:
-            self.end = date_str
-            self.update_datasets()
-            self.detect_floods()
-        except Exception as e:
-            print(f"❌ Erreur lors du changement de la date de fin : {e}")
-
-    def getBeginingDate(self):
-        """Retourne la date de début actuelle."""
-        return self.begining
-
-    def getEndDate(self):
-        """Retourne la date de fin actuelle."""
-        return self.end
-
-    def getDepartmentName(self):
-        """Retourne le nom du département actuel."""
-        return self.department_name
-
-    def get_image_collection(self, beginning: str, end: str, dataset_name: str):
-        """Récupère une collection d'images pour une période donnée."""
-        return ee.ImageCollection(dataset_name) \
-            .filterBounds(self.department) \
-            .filterDate(ee.Date(beginning), ee.Date(end))
-
-    def get_sentinel2_collection(self):
-        """Récupère et filtre les images Sentinel-2."""
-        return ee.ImageCollection(SENTINEL2_DATASET_NAME) \
-            .filterBounds(self.department) \
-            .filterDate(self.begining, self.end) \
-            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', MAX_CLOUD_PERCENTAGE)) \
-            .map(self.mask_s2_clouds)
-
-    def mask_s2_clouds(self, image: ee.Image):
-        """Masque les nuages pour les images Sentinel-2 en utilisant QA60."""
-        qa = image.select('QA60')
-        cloud_bit_mask = 1 << 10
-        cirrus_bit_mask = 1 << 11
-        mask = qa.bitwiseAnd(cloud_bit_mask).eq(0).And(
-            qa.bitwiseAnd(cirrus_bit_mask).eq(0)
-        )
-        return image.updateMask(mask)
 
-    def update_datasets(self):
-        """Met à jour tous les datasets."""
-        print(STATUS_MESSAGES['processing'])
-        self.fires_dataset = self.get_image_collection(self.begining, self.end, FIRES_DATASET_NAME)
-        self.temperature_dataset = self.get_image_collection(self.begining, self.end, TEMPERATURE_DATASET_NAME)
-        self.forest_dataset = self.get_image_collection(self.begining, self.end, FOREST_DATASET_NAME)
-        self.s2_collection = self.get_sentinel2_collection()
-        self.s1_collection = self.get_image_collection(self.begining, self.end, SENTINEL1_DATASET_NAME)
-        print(STATUS_MESSAGES['completed'])
-
-    # =============================================
-    # === CALCUL DES INDICES ET CLASSIFICATION ===
-    # =============================================
-    
-    def calculate_indices(self, image: ee.Image):
-        """Calcule les indices NDVI, NDWI, MNDWI, NDBI et WEI."""
-        ndvi = image.normalizedDifference([SENTINEL2_NIR_BAND, 'B4']).rename('NDVI')
-        ndwi = image.normalizedDifference([SENTINEL2_GREEN_BAND, SENTINEL2_NIR_BAND]).rename('NDWI')
-        mndwi = image.normalizedDifference([SENTINEL2_GREEN_BAND, SENTINEL2_SWIR1_BAND]).rename('MNDWI')
-        ndbi = image.normalizedDifference([SENTINEL2_SWIR1_BAND, SENTINEL2_NIR_BAND]).rename('NDBI')
-        
-        # Normalisation pour WEI
-        ndwi_norm = ndwi.unitScale(-1, 1)
-        mndwi_norm = mndwi.unitScale(-1, 1)
-        
-        # WEI = (1 - NDWI) × MNDWI
-        wei = (ee.Image.constant(1).subtract(ndwi_norm)).multiply(mndwi_norm).rename('WEI')
-        
-        return image.addBands([ndvi, ndwi, mndwi, ndbi, wei])
-
-    def classify_land_cover(self, s2_median: ee.Image):
-        """Classifie l'occupation du sol en 5 classes : eau, urbain, végétation, agriculture, sol nu."""
-        water_mask = s2_median.select('MNDWI').gt(self.mndwi_threshold).rename('water_mask')
-        urban_mask = s2_median.select('NDBI').gt(self.ndbi_threshold).And(
-            s2_median.select('NDVI').lt(0.2)
-        ).rename('urban_mask')
-        vegetation_mask = s2_median.select('NDVI').gt(self.ndvi_threshold).rename('vegetation_mask')
-        agricultural_mask = s2_median.select('NDVI').gt(0.2).And(
-            s2_median.select('NDVI').lt(self.ndvi_threshold)
-        ).And(
-            s2_median.select('NDBI').lt(self.ndbi_threshold)
-        ).rename('agricultural_mask')
-        bare_soil_mask = s2_median.select('NDVI').lt(0.2).And(
-            s2_median.select('NDBI').lt(self.ndbi_threshold)
-        ).rename('bare_soil_mask')
-        
-        # Carte finale
-        land_cover = ee.Image.constant(0).rename('land_cover') \
-            .where(bare_soil_mask, 1) \
-            .where(agricultural_mask, 2) \
-            .where(vegetation_mask, 3) \
-            .where(urban_mask, 4) \
-            .where(water_mask, 5)
-        
-        return {
-            'land_cover': land_cover,
-            'water_mask': water_mask,
-            'urban_mask': urban_mask,
-            'vegetation_mask': vegetation_mask,
-            'agricultural_mask': agricultural_mask,
-            'bare_soil_mask': bare_soil_mask
-        }
+def _has_values(stats: dict) -> bool:
+    """Vrai si un dictionnaire de statistiques n'est pas la valeur de repli (valeurs numériques à zéro)."""
+    return any(value for value in stats.values() if not isinstance(value, str))
 
-    # =============================================
-    # === DÉTECTION ET ANALYSE DES INONDATIONS ===
-    # =============================================
-    
-    def detect_floods(self):
-        """Détecte les inondations et génère les cartes de risque."""
-        if not self.s2_collection or self.s2_collection.size().getInfo() == 0:
-            print("❌ Aucune image Sentinel-2 disponible pour la période sélectionnée.")
-            return
-        
-        if not self.department:
-            print("❌ Le département n'est pas défini.")
-            return
-        
-        try:
-            s2_with_indices = self.s2_collection.map(self.calculate_indices)
-            if s2_with_indices.size().getInfo() == 0:
-                print("❌ Aucune image valide après calcul des indices.")
-                return
-            
-            s2_median = s2_with_indices.median().clip(self.department)
-            
-            # Classification de l'occupation du sol
-            land_cover_data = self.classify_land_cover(s2_median)
-            self.land_cover_map = land_cover_data['land_cover']
-            self.water_mask = land_cover_data['water_mask']
-            self.urban_mask = land_cover_data['urban_mask']
-            self.vegetation_mask = land_cover_data['vegetation_mask']
-            
-            # Détection des inondations
-            self.wei_map = s2_median.select('WEI')
-            self.mndwi_map = s2_median.select('MNDWI')
-            self.flood_extent = self.wei_map.gt(self.wei_threshold).rename('flood_extent')
-            
-            # Carte de risque
-            self.flood_risk_map = self.wei_map \
-                .where(self.wei_map.lte(0.1), 1) \
-                .where(self.wei_map.gt(0.1).And(self.wei_map.lte(0.3)), 2) \
-                .where(self.wei_map.gt(0.3).And(self.wei_map.lte(0.5)), 3) \
-                .where(self.wei_map.gt(0.5).And(self.wei_map.lte(0.7)), 4) \
-                .where(self.wei_map.gt(0.7), 5) \
-                .rename('flood_risk')
-            
-            # Prédiction de tendance
-            self.flood_trend = self.calculate_flood_trend(s2_with_indices)
-            
-            print("✅ Détection des inondations terminée.")
-            
-        except Exception as e:
-            print(f"❌ Erreur lors de la détection des inondations : {e}")
 
-    def calculate_flood_trend(self, s2_collection: ee.ImageCollection):
-        """Calcule la tendance du WEI pour prédire l'évolution des inondations."""
-        if s2_collection.size().getInfo() == 0:
-            print("⚠️ Aucune image disponible pour calculer la tendance.")
-            return 0.0
-        
-        try:
-            collection_list = s2_collection.toList(s2_collection.size())
-            collection_size = s2_collection.size().getInfo()
-            
-            if collection_size < 3:
-                print("⚠️ Pas assez d'images pour calculer une tendance fiable.")
-                return 0.0
-            
-            # Premier tiers des images
-            first_third_size = ee.Number(collection_size).divide(3).floor()
-            first_third = ee.ImageCollection.fromImages(
-                collection_list.slice(0, first_third_size)
-            )
-            
-            # Dernier tiers des images
-            last_third_start = ee.Number(collection_size).subtract(first_third_size)
-            last_third = ee.ImageCollection.fromImages(
-                collection_list.slice(last_third_start, collection_size)
-            )
-            
-            # Calculer la moyenne WEI pour chaque période
-            first_wei_mean = first_third.mean().select('WEI').reduceRegion(
-                reducer=ee.Reducer.mean(),
-                geometry=self.department,
-                scale=100,
-                maxPixels=MAX_PIXELS
-            ).get('WEI')
-            
-            last_wei_mean = last_third.mean().select('WEI').reduceRegion(
-                reducer=ee.Reducer.mean(),
-                geometry=self.department,
-                scale=100,
-                maxPixels=MAX_PIXELS
-            ).get('WEI')
-            
-            # Calculer la tendance comme différence
-            if first_wei_mean is not None and last_wei_mean is not None:
-                first_value = ee.Number(first_wei_mean).getInfo()
-                last_value = ee.Number(last_wei_mean).getInfo()
-                trend = last_value - first_value
-                return trend
-            else:
-                return 0.0
-                
-        except Exception as e:
-            print(f"❌ Erreur lors du calcul de la tendance : {e}")
-            return 0.0
+def _has_rows(df: pd.DataFrame) -> bool:
+    """Vrai si un DataFrame contient des données."""
+    return not df.empty
 
-    # =============================================
-    # === VISUALISATION ===
-    # =============================================
-    def show_map(self, show_fires=True, show_temperature=True, show_forest=True, show_water=True):
-        # 📍 Centre sur le département
-        center = self.department.geometry().centroid().coordinates().getInfo()[::-1]
-        m = folium.Map(location=center, zoom_start=10, control_scale=True)
-    
-        # Fonction utilitaire pour convertir une image EE en couche Folium
-        def add_ee_layer(ee_image, vis_params, layer_name):
-            map_id_dict = ee.Image(ee_image).getMapId(vis_params)
-            folium.TileLayer(
-                tiles=map_id_dict['tile_fetcher'].url_format,
-                attr="Google Earth Engine",
-                name=layer_name,
-                overlay=True,
-                control=True
-            ).add_to(m)
-    
-        # =====================================
-        # 🔥 FEUX DE BROUSSE
-        # =====================================
-        if show_fires and self.fires_dataset and self.fires_dataset.size().getInfo() > 0:
-            fires_frp = self.fires_dataset.select('frp').max().clip(self.department)
-            fires_masked = fires_frp.updateMask(fires_frp.gt(5))
-            vis = {
-                'min': 5, 'max': 50,
-                'palette': ['#FFFF00','#FFA500','#FF0000','#800000','#400000']
-            }
-            add_ee_layer(fires_masked, vis, "🔥 Feux de brousse")
-    
-        # =====================================
-        # 🌡️ TEMPÉRATURE
-        # =====================================
-        if show_temperature and self.temperature_dataset and self.temperature_dataset.size().getInfo() > 0:
-            temp = self.temperature_dataset.median().select('LST_Day_1km').clip(self.department)
-            vis = {
-                'min': 13000,'max': 16500,
-                'palette': ['#0A4D8C','#4FA3D1','#A5E6A3','#FFE066','#FF8C42','#C62828']
-            }
-            add_ee_layer(temp, vis, "🌡️ Température surface")
-    
-        # =====================================
-        # 🌳 FORÊT
-        # =====================================
-        if show_forest and self.forest_dataset and self.forest_dataset.size().getInfo() > 0:
-            forest = self.forest_dataset.median().select('trees').clip(self.department)
-            vis = {
-                'min': 0.15, 'max': 0.8,
-                'palette': ['#CDEAC0','#7BD389','#2E7D32','#1B5E20','#0B3D0B']
-            }
-            add_ee_layer(forest, vis, "🌳 Couverture forestière")
-    
-        # =====================================
-        # 🌊 INONDATIONS (WEI)
-        # =====================================
-        if show_water and self.wei_map:
-            water = self.wei_map.clip(self.department).updateMask(self.wei_map.gte(self.wei_threshold))
-            vis = {
-                'min': 0.05,'max': 0.8,
-                'palette': ['#CFEFFF','#8EC9FF','#4EA3FF','#1E7AD9','#0C4A99']
-            }
-            add_ee_layer(water, vis, f"🌊 Inondations (WEI ≥ {self.wei_threshold})")
 
-        legend_html = '''
+# Légende de la carte (HTML/JS) ; $begin, $end et $department sont substitués par show_map
+MAP_LEGEND_TEMPLATE = Template('''
             <div id="legend-container" style="position: fixed;
                          bottom: -20px; right: 20px; width: 270px; height: auto;
                          background-color: white; border: 2px solid #333; z-index: 9999;
@@ -515,8 +149,8 @@ class FloodMonitoringSystem:
                             📊 Informations techniques
                         </p>
                         <div style="font-size: 9px; color: #6c757d; line-height: 1.3;">
-                            <p style="margin: 2px 0;"><strong>Période :</strong> ''' + self.begining + ''' → ''' + self.end + '''</p>
-                            <p style="margin: 2px 0;"><strong>Département :</strong> ''' + self.department_name + '''</p>
+                            <p style="margin: 2px 0;"><strong>Période :</strong> $begin → $end</p>
+                            <p style="margin: 2px 0;"><strong>Département :</strong> $department</p>
                             <p style="margin: 2px 0;"><strong>Satellites :</strong> Sentinel-2, MODIS, VIIRS</p>
                             <p style="margin: 2px 0;"><strong>Résolution :</strong> 10-1000m selon la couche</p>
                         </div>
@@ -721,57 +355,708 @@ class FloodMonitoringSystem:
             #     }
             # })();
             # </script>
-        '''
-        
-        # =====================================
-        # 📍 CONTOUR DÉPARTEMENT
-        # =====================================
-        dept_geojson = self.department.geometry().getInfo()
-        folium.GeoJson(
-            dept_geojson,
-            name=self.department_name,
-            style_function=lambda x: {"color": "black", "weight": 2, "fillOpacity": 0}
-        ).add_to(m)
-    
-        # =====================================
-        # 🎛️ CONTROLES
-        # =====================================
-        folium.LayerControl(collapsed=False).add_to(m)
-        
-        # ✅ IMPORTANT: Utiliser get_root().html au lieu de Element
-        m.get_root().html.add_child(folium.Element(legend_html))
-    
-        return m
+        ''')
 
-    # =============================================
-    # === MÉTHODES UTILITAIRES CONSERVÉES ===
-    # =============================================
+
+class FloodMonitoringSystem:
+    def __init__(
+        self,
+        country_code: str = COUNTRY_CODE,
+        department_name: str = DEPARTMENT_NAME,
+        begin_date: str = None,
+        end_date: str = None,
+        cache: CacheManager = None
+    ):
+        # --- Initialisation des paramètres ---
+        self.country_code = country_code
+        self.department_name = department_name
+        default_begin, default_end = default_window()
+        self.begining = begin_date or default_begin
+        self.end = end_date or default_end
+        self.project_name = PROJECT_NAME
+        
+        # --- Seuils et paramètres de classification ---
+        self.wei_threshold = 0.3
+        self.mndwi_threshold = WATER_THRESHOLD_MNDWI
+        self.ndwi_threshold = WATER_THRESHOLD_NDWI
+        self.ndbi_threshold = 0.1
+        self.ndvi_threshold = 0.4
+        self.urban_weight = 3
+        self.max_cloud_percentage = MAX_CLOUD_PERCENTAGE
+        
+        # --- Composites de la série temporelle (voir compositing.py) ---
+        self.composite_period = TIMESERIES_COMPOSITE_PERIOD
+        self.composite_method = TIMESERIES_COMPOSITE_METHOD
+        
+        # --- Source des statistiques d'inondation : WEI ou radar (voir sar_flood.py) ---
+        self.flood_source_mode = FLOOD_DETECTION_SOURCE
+        self.sar_mapper = SarFloodMapper()
+        
+        # --- Moteur de calcul des indices (graphes Earth Engine) ---
+        self.index_backend = EarthEngineIndexBackend()
+        
+        # --- Connexion à GEE (backend actif du processus, voir ee_backend.set_backend) ---
+        self.connect_gee()
+        
+        # --- Cache persistant et index des géométries ---
+        self.cache = cache or CacheManager()
+        self.geometry_index = DepartmentGeometryIndex(self.cache)
+        self.timeseries_store = TimeSeriesStore(self.cache)
+        self.tile_cache = TileUrlCache(self.cache)
+        self.climatology = Climatology(self)
+        
+        # --- Récupération du département ---
+        self.department = self.get_department(department_name)
+        
+        # --- Initialisation des datasets ---
+        self.fires_dataset = None
+        self.temperature_dataset = None
+        self.forest_dataset = None
+        self.s2_collection = None
+        self.s1_collection = None
+        
+        # --- Initialisation des couches ---
+        # wei_map, mndwi_map, flood_extent, flood_risk_map, land_cover_map,
+        # water/urban/vegetation_mask et flood_trend sont des lazy_layer :
+        # calculées au premier accès, recalculées quand leurs entrées changent.
+        self.ndwi_map = None
+        self.permanent_water_mask = None
+        self._map_memo = None  # (clé, carte folium) du dernier show_map
+        
+        # --- Mise à jour des datasets ---
+        self.update_datasets()
+
+    # =============================================
+    # === CONNEXION ET RÉCUPÉRATION DES DONNÉES ===
+    # =============================================
+    
+    @traced()
+    def connect_gee(self):
+        """Connexion à Google Earth Engine."""
+        try:
+            try:
+                ee.data.getAssetRoots()
+                return
+            except Exception:
+                pass
+            service_account_info = st.secrets["sekhem-earthengine"]
+
+            try:
+                service_account_dict = dict(service_account_info)
+            except Exception:
+                service_account_dict = {k: str(v) for k, v in service_account_info.items()}
+
+            credentials = ee.ServiceAccountCredentials(
+                email=service_account_dict["client_email"],
+                key_data=json.dumps(service_account_dict)
+            )
+            ee.Initialize(credentials)
+            print("Earth Engine initialisé avec succès!")
+        except Exception as e:
+            st.error(f"Erreur Earth Engine: {e}")
+            raise
+
+    def get_department(self, name: str):
+        """Récupère le département depuis le dataset geoBoundaries."""
+        return self.geometry_index.feature_collection(self.country_code, name)
+
+    @traced()
+    def get_department_info(self):
+        """Retourne GeoJSON simplifié, centroïde, bbox et surface (ha) du département courant."""
+        return self.geometry_index.get(self.country_code, self.department_name)
+
+    @traced()
+    def getAllDepartementsName(self):
+        """Retourne la liste des noms de tous les départements (persistée comme les géométries)."""
+        def compute():
+            departments = ee.FeatureCollection(DEPARTMENT_DATASET_NAME).filter(
+                ee.Filter.eq('shapeGroup', self.country_code)
+            )
+            return get_info(departments.aggregate_array('shapeName'))
+
+        try:
+            return self.cache.getset(
+                self.cache.make_key("departments", [f"cc={self.country_code}"]),
+                compute,
+                expire=GEOMETRY_CACHE_TTL,
+                cache_if=bool,
+            )
+        except Exception as e:
+            print(f"❌ Erreur lors de la récupération des départements : {e}")
+            return [self.department_name]
+
+    @traced()
+    def set_context(self, department_name: str = None, begin_date: str = None, end_date: str = None):
+        """
+        Change département et/ou période en une seule transaction.
+        Les datasets ne sont reconstruits qu'une fois, et seulement si un paramètre
+        a réellement changé ; les couches sont recalculées à la demande.
+        Retourne True si le contexte a changé.
+        """
+        dirty = False
+        if department_name is not None and department_name != self.department_name:
+            self.department = self.get_department(department_name)
+            self.department_name = department_name
+            dirty = True
+        if begin_date is not None and begin_date != self.begining:
+            self.begining = begin_date
+            dirty = True
+        if end_date is not None and end_date != self.end:
+            self.end = end_date
+            dirty = True
+
+        if dirty:
+            # Les couches dérivées seront invalidées et recalculées à la demande
+            self.update_datasets()
+        return dirty
+
+    def setDepartment(self, department_name):
+        """Change le département actuel."""
+        try:
+            self.set_context(department_name=department_name)
+        except Exception as e:
+            print(f"❌ Erreur lors du changement de département : {e}")
+
+    def setBeginingDate(self, date_str):
+        """Change la date de début."""
+        try:
+            self.set_context(begin_date=date_str)
+        except Exception as e:
+            print(f"❌ Erreur lors du changement de la date de début : {e}")
+
+    def setEndDate(self, date_str):
+        """Change la date de fin."""
+        try:
+            self.set_context(end_date=date_str)
+        except Exception as e:
+            print(f"❌ Erreur lors du changement de la date de fin : {e}")
+
+    def cache_context(self):
+        """Contexte des clés du cache persistant : (département, début, fin, paramètres)."""
+        return self.department_name, self.begining, self.end, {
+            'country_code': self.country_code,
+            'scale': PROCESSING_SCALE,
+        }
+
+    def clear_cache(self):
+        """Purge les résultats persistés pour le département et la période courants."""
+        return self.cache.clear_context(self.department_name, self.begining, self.end)
+
+    def precompute_status_key(self):
+        return self.cache.make_key("precompute", [f"cc={self.country_code}", f"b={self.begining}", f"e={self.end}"])
+
+    def precompute_status(self):
+        """Bilan du dernier passage de precompute.py sur la période courante (None si aucun)."""
+        return self.cache.get(self.precompute_status_key())
+
+    def getBeginingDate(self):
+        """Retourne la date de début actuelle."""
+        return self.begining
+
+    def getEndDate(self):
+        """Retourne la date de fin actuelle."""
+        return self.end
+
+    def getDepartmentName(self):
+        """Retourne le nom du département actuel."""
+        return self.department_name
+
+    def get_image_collection(self, beginning: str, end: str, dataset_name: str):
+        """Récupère une collection d'images pour une période donnée."""
+        return ee.ImageCollection(dataset_name) \
+            .filterBounds(self.department) \
+            .filterDate(ee.Date(beginning), ee.Date(end))
+
+    def get_sentinel2_collection(self, begin_date: str = None, end_date: str = None):
+        """Récupère et filtre les images Sentinel-2 (par défaut sur la période courante)."""
+        return ee.ImageCollection(SENTINEL2_DATASET_NAME) \
+            .filterBounds(self.department) \
+            .filterDate(begin_date or self.begining, end_date or self.end) \
+            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', self.max_cloud_percentage)) \
+            .map(self.mask_s2_clouds)
+
+    def mask_s2_clouds(self, image: ee.Image):
+        """Masque les nuages pour les images Sentinel-2 en utilisant QA60."""
+        return self.index_backend.mask_clouds(image)
+
+    @traced()
+    def update_datasets(self):
+        """Met à jour tous les datasets."""
+        print(STATUS_MESSAGES['processing'])
+        self.fires_dataset = self.get_image_collection(self.begining, self.end, FIRES_DATASET_NAME)
+        self.temperature_dataset = self.get_image_collection(self.begining, self.end, TEMPERATURE_DATASET_NAME)
+        self.forest_dataset = self.get_image_collection(self.begining, self.end, FOREST_DATASET_NAME)
+        self.s2_collection = self.get_sentinel2_collection()
+        self.s1_collection = self.get_image_collection(self.begining, self.end, SENTINEL1_DATASET_NAME)
+        print(STATUS_MESSAGES['completed'])
+
+    @lazy_layer('fires_dataset', 'temperature_dataset', 'forest_dataset', 's2_collection', 's1_collection')
+    @traced()
+    @cached_method('collection_metadata', depends_on=('max_cloud_percentage',))
+    def collection_metadata(self):
+        """Nombre d'images, dates, nuages et identifiants des 5 collections, en un seul getInfo."""
+        return fetch_collection_metadata({
+            'fires': self.fires_dataset,
+            'temperature': self.temperature_dataset,
+            'forest': self.forest_dataset,
+            's2': self.s2_collection,
+            's1': self.s1_collection,
+        })
+
+    def collection_size(self, name: str) -> int:
+        """Nombre d'images d'une collection ('fires', 'temperature', 'forest', 's2', 's1')."""
+        return self.collection_metadata[name]['count']
+
+    # =============================================
+    # === CALCUL DES INDICES ET CLASSIFICATION ===
+    # =============================================
+    
+    def calculate_indices(self, image: ee.Image):
+        """Calcule les indices NDVI, NDWI, MNDWI, NDBI et WEI."""
+        return self.index_backend.calculate_indices(image)
+
+    def classify_land_cover(self, s2_median: ee.Image):
+        """Classifie l'occupation du sol en 5 classes : eau, urbain, végétation, agriculture, sol nu."""
+        return self.index_backend.classify_land_cover(
+            s2_median,
+            mndwi_threshold=self.mndwi_threshold,
+            ndbi_threshold=self.ndbi_threshold,
+            ndvi_threshold=self.ndvi_threshold
+        )
+
+    # =============================================
+    # === DÉTECTION ET ANALYSE DES INONDATIONS ===
+    # =============================================
+    
+    @lazy_layer('s2_collection')
+    def s2_with_indices(self):
+        """Collection Sentinel-2 avec indices, ou None si aucune image n'est disponible."""
+        if self.collection_size('s2') == 0:
+            print("❌ Aucune image Sentinel-2 disponible pour la période sélectionnée.")
+            return None
+        return self.s2_collection.map(self.calculate_indices)
+
+    @lazy_layer('s2_with_indices', 'department')
+    def s2_median(self):
+        """Composite médian des indices, découpé sur le département."""
+        if self.s2_with_indices is None or self.department is None:
+            return None
+        return self.s2_with_indices.median().clip(self.department)
+
+    @lazy_layer('s2_median', 'mndwi_threshold', 'ndbi_threshold', 'ndvi_threshold')
+    def land_cover_data(self):
+        """Classification de l'occupation du sol et masques associés."""
+        if self.s2_median is None:
+            return None
+        return self.classify_land_cover(self.s2_median)
+
+    @lazy_layer('land_cover_data')
+    def land_cover_map(self):
+        return self.land_cover_data['land_cover'] if self.land_cover_data else None
+
+    @lazy_layer('land_cover_data')
+    def water_mask(self):
+        return self.land_cover_data['water_mask'] if self.land_cover_data else None
+
+    @lazy_layer('land_cover_data')
+    def urban_mask(self):
+        return self.land_cover_data['urban_mask'] if self.land_cover_data else None
+
+    @lazy_layer('land_cover_data')
+    def vegetation_mask(self):
+        return self.land_cover_data['vegetation_mask'] if self.land_cover_data else None
+
+    @lazy_layer('s2_median')
+    def wei_map(self):
+        return self.s2_median.select('WEI') if self.s2_median is not None else None
+
+    @lazy_layer('s2_median')
+    def mndwi_map(self):
+        return self.s2_median.select('MNDWI') if self.s2_median is not None else None
+
+    @lazy_layer('wei_map', 'wei_threshold')
+    def flood_extent(self):
+        if self.wei_map is None:
+            return None
+        return self.wei_map.gt(self.wei_threshold).rename('flood_extent')
+
+    @lazy_layer('s1_collection', 'sar_mapper')
+    def s1_backscatter(self):
+        """Composite VV (dB, filtré du chatoiement) de la période, ou None sans image Sentinel-1."""
+        if self.collection_size('s1') == 0:
+            print("❌ Aucune image Sentinel-1 disponible pour la période sélectionnée.")
+            return None
+        return self.sar_mapper.backscatter(self.s1_collection)
+
+    @lazy_layer('department', 'end', 'sar_mapper')
+    def s1_dry_reference(self):
+        """Composite VV de la dernière saison sèche (référence de la détection par changement)."""
+        begin, end = dry_reference_window(self.end)
+        return self.sar_mapper.backscatter(self.get_image_collection(begin, end, SENTINEL1_DATASET_NAME))
+
+    @lazy_layer('s1_backscatter', 's1_dry_reference', 'sar_mapper')
+    def sar_flood_extent(self):
+        """Étendue d'eau radar (0/1) découpée sur le département, ou None sans image Sentinel-1."""
+        if self.s1_backscatter is None or self.department is None:
+            return None
+        return self.sar_mapper.flood_extent(self.s1_backscatter, self.s1_dry_reference).clip(self.department)
+
+    @property
+    def flood_source(self) -> str:
+        """
+        'sar' ou 'optical' selon flood_source_mode ; en mode 'auto', le radar
+        prend le relais quand trop peu d'images Sentinel-2 passent le filtre
+        nuageux (saison des pluies).
+        """
+        if self.flood_source_mode != 'auto':
+            return self.flood_source_mode
+        if self.collection_size('s2') < SAR_FALLBACK_MIN_S2_IMAGES and self.collection_size('s1') > 0:
+            return 'sar'
+        return 'optical'
+
+    @lazy_layer('wei_map')
+    def flood_risk_map(self):
+        """Carte de risque en 5 classes à partir du WEI."""
+        if self.wei_map is None:
+            return None
+        return self.index_backend.flood_risk(self.wei_map)
+
+    @lazy_layer('timeseries')
+    def flood_trend(self):
+        """Tendance du WEI sur la période (0.0 si non calculable)."""
+        return self.calculate_flood_trend()
+
+    @traced()
+    def detect_floods(self):
+        """Matérialise immédiatement toutes les couches (les consommateurs peuvent aussi y accéder à la demande)."""
+        if not self.department:
+            print("❌ Le département n'est pas défini.")
+            return
+        
+        try:
+            if self.flood_source == 'sar':
+                self.sar_flood_extent
+            if self.s2_median is None:
+                return
+            self.land_cover_map
+            self.flood_extent
+            self.flood_risk_map
+            self.flood_trend
+            print("✅ Détection des inondations terminée.")
+            
+        except Exception as e:
+            print(f"❌ Erreur lors de la détection des inondations : {e}")
+
+    def trend_time_axis(self, image: ee.Image):
+        """Temps de l'image en jours depuis le début de la période (variable explicative de la tendance)."""
+        return image.date().difference(ee.Date(self.begining), 'day')
+
+    def window_days(self) -> int:
+        """Durée de la période analysée, en jours."""
+        begin = datetime.strptime(self.begining, '%Y-%m-%d')
+        end = datetime.strptime(self.end, '%Y-%m-%d')
+        return max((end - begin).days, 1)
+
+    @traced()
+    def get_flood_trend_fit(self):
+        """
+        Ajuste une droite (moindres carrés ou pente de Sen selon TREND_METHOD)
+        sur la série régionale du WEI partagée (self.timeseries), sans calcul
+        serveur supplémentaire.
+        Retourne {'slope_per_day', 'intercept', 'n', 'change'} où 'change' est
+        la variation du WEI ajustée sur toute la période.
+        """
+        df = self.timeseries.dropna(subset=['WEI'])
+        n = len(df)
+        slope, intercept = 0.0, 0.0
+        if n >= 3:
+            days = (pd.to_datetime(df['date']) - pd.Timestamp(self.begining)).dt.days.to_numpy(dtype=float)
+            slope, intercept = fit_trend(days, df['WEI'].to_numpy(dtype=float), TREND_METHOD)
+        return {
+            'slope_per_day': slope,
+            'intercept': intercept,
+            'n': n,
+            'change': slope * self.window_days(),
+        }
+
+    def calculate_flood_trend(self):
+        """Calcule la tendance du WEI (variation ajustée sur la période) pour prédire l'évolution des inondations."""
+        if self.s2_with_indices is None:
+            print("⚠️ Aucune image disponible pour calculer la tendance.")
+            return 0.0
+        
+        try:
+            fit = self.get_flood_trend_fit()
+            if fit['n'] < 3:
+                print("⚠️ Pas assez d'images valides pour calculer une tendance fiable.")
+                return 0.0
+            return fit['change']
+                
+        except Exception as e:
+            print(f"❌ Erreur lors du calcul de la tendance : {e}")
+            return 0.0
+
+    @lazy_layer('s2_with_indices', 'department')
+    def wei_trend_map(self):
+        """Variation du WEI ajustée pixel par pixel sur la période (pente × durée)."""
+        if self.s2_with_indices is None:
+            return None
+
+        def with_time(image):
+            t = ee.Image.constant(self.trend_time_axis(image)).float().rename('t')
+            return t.addBands(image.select('WEI'))
+
+        reducer = ee.Reducer.sensSlope() if TREND_METHOD == 'sens' else ee.Reducer.linearFit()
+        slope_band = 'slope' if TREND_METHOD == 'sens' else 'scale'
+        return self.s2_with_indices.map(with_time) \
+            .reduce(reducer) \
+            .select(slope_band) \
+            .multiply(self.window_days()) \
+            .rename('wei_change') \
+            .clip(self.department)
+
+    # =============================================
+    # === VISUALISATION ===
+    # =============================================
+    def map_layers(self, show_fires=True, show_temperature=True, show_forest=True, show_water=True, show_trend=False):
+        """
+        Couches Earth Engine de la carte, dans l'ordre d'affichage :
+        liste de (identifiant, image, vis_params, nom). Les visualisations
+        viennent de MAP_LAYER_VISUALIZATIONS.
+        """
+        layers = []
+
+        def add_layer(layer_id, image, name):
+            layers.append((layer_id, image, MAP_LAYER_VISUALIZATIONS[layer_id], name))
+
+        # =====================================
+        # 🔥 FEUX DE BROUSSE
+        # =====================================
+        if show_fires and self.collection_size('fires') > 0:
+            fires_frp = self.fires_dataset.select('frp').max().clip(self.department)
+            fires_masked = fires_frp.updateMask(fires_frp.gt(FIRES_FRP_MIN))
+            add_layer('fires', fires_masked, "🔥 Feux de brousse")
+    
+        # =====================================
+        # 🌡️ TEMPÉRATURE
+        # =====================================
+        if show_temperature and self.collection_size('temperature') > 0:
+            temp = self.temperature_dataset.median().select('LST_Day_1km').clip(self.department)
+            add_layer('temperature', temp, "🌡️ Température surface")
+    
+        # =====================================
+        # 🌳 FORÊT
+        # =====================================
+        if show_forest and self.collection_size('forest') > 0:
+            forest = self.forest_dataset.median().select('trees').clip(self.department)
+            add_layer('forest', forest, "🌳 Couverture forestière")
+    
+        # =====================================
+        # 🌊 INONDATIONS (WEI, ou radar Sentinel-1)
+        # =====================================
+        if show_water and self.flood_source == 'sar' and self.sar_flood_extent is not None:
+            add_layer('sar_flood', self.sar_flood_extent.selfMask(), "📡 Inondations (radar Sentinel-1)")
+        elif show_water and self.wei_map is not None:
+            water = self.wei_map.clip(self.department).updateMask(self.wei_map.gte(self.wei_threshold))
+            add_layer('water', water, f"🌊 Inondations (WEI ≥ {self.wei_threshold})")
+
+        # =====================================
+        # 📈 TENDANCE DU WEI (par pixel)
+        # =====================================
+        if show_trend and self.wei_trend_map is not None:
+            add_layer('trend', self.wei_trend_map, "📈 Tendance WEI (variation sur la période)")
+
+        return layers
+
+    @traced()
+    def get_map_tiles(self, show_fires=True, show_temperature=True, show_forest=True, show_water=True, show_trend=False):
+        """
+        Retourne [(nom, url_format)] des couches de la carte. Les URL sont lues
+        dans le cache des tuiles (clé : couche, département, période,
+        visualisation) ; seules les couches absentes ou expirées font l'objet
+        d'un getMapId, en parallèle. Si le proxy de tuiles est activé, les URL
+        retournées sont celles du proxy.
+        """
+        dpt, begin, end, params = self.cache_context()
+        params = dict(params, wei_threshold=self.wei_threshold, max_cloud_percentage=self.max_cloud_percentage)
+        layers = self.map_layers(show_fires, show_temperature, show_forest, show_water, show_trend)
+        keys = [self.tile_cache.make_key(layer_id, dpt, begin, end, vis, params) for layer_id, _, vis, _ in layers]
+
+        urls = {i: self.tile_cache.lookup(key) for i, key in enumerate(keys)}
+        missing = {
+            i: (lambda image=image, vis=vis: with_retry(lambda: ee.Image(image).getMapId(vis)))
+            for i, (_, image, vis, _) in enumerate(layers)
+            if urls[i] is None
+        }
+        for i, map_id in run_parallel(missing).items():
+            urls[i] = self.tile_cache.store(keys[i], map_id['tile_fetcher'].url_format)
+        # Proxy de tuiles local (tile_proxy) : URL stables, tuiles partagées entre sessions
+        return [(layer_name, proxied_url(keys[i], urls[i])) for i, (_, _, _, layer_name) in enumerate(layers)]
+
+    @traced()
+    def show_map(self, show_fires=True, show_temperature=True, show_forest=True, show_water=True, show_trend=False,
+                 offline=None):
+        """
+        Carte folium du contexte courant. La carte est mémoïsée : tant que le
+        contexte et les URL de tuiles sont inchangés (reruns Streamlit), on
+        retourne une copie de la carte déjà construite. Les identifiants des
+        éléments folium sont conservés, donc le HTML produit est identique et
+        le navigateur ne redessine pas la carte. Une copie, car le rendu
+        (st_folium) modifie l'objet.
+
+        offline=True (défaut : OFFLINE_MAP_MODE) : les couches viennent des
+        pyramides exportées par offline_tiles.py, servies par le proxy local,
+        sans appel Earth Engine pour les tuiles.
+        """
+        if OFFLINE_MAP_MODE if offline is None else offline:
+            layer_ids = [layer_id for layer_id, shown in (
+                ('wei', show_water), ('flood_risk', show_water), ('fires', show_fires),
+                ('temperature', show_temperature), ('trees', show_forest)) if shown]
+            tiles = offline_map_tiles(self, layer_ids)
+        else:
+            # URL de tuiles des couches EE (cache des tuiles, voir get_map_tiles)
+            tiles = [(name, url_format, None) for name, url_format in self.get_map_tiles(
+                show_fires=show_fires,
+                show_temperature=show_temperature,
+                show_forest=show_forest,
+                show_water=show_water,
+                show_trend=show_trend,
+            )]
+        memo_key = (self.cache_context(), tuple(tiles))
+        if self._map_memo is not None and self._map_memo[0] == memo_key:
+            return copy.deepcopy(self._map_memo[1])
+
+        # 📍 Centre sur le département
+        department_info = self.get_department_info()
+        center = department_info['centroid'][::-1]
+        m = folium.Map(location=center, zoom_start=10, control_scale=True)
+    
+        for layer_name, url_format, max_native_zoom in tiles:
+            folium.TileLayer(
+                tiles=url_format,
+                attr="Google Earth Engine",
+                name=layer_name,
+                overlay=True,
+                control=True,
+                max_native_zoom=max_native_zoom
+            ).add_to(m)
+
+        
+        # =====================================
+        # 📍 CONTOUR DÉPARTEMENT
+        # =====================================
+        folium.GeoJson(
+            department_info['geojson'],
+            name=self.department_name,
+            style_function=lambda x: {"color": "black", "weight": 2, "fillOpacity": 0}
+        ).add_to(m)
+    
+        # =====================================
+        # 🎛️ CONTROLES
+        # =====================================
+        folium.LayerControl(collapsed=False).add_to(m)
+        
+        # ✅ IMPORTANT: Utiliser get_root().html au lieu de Element
+        legend_html = MAP_LEGEND_TEMPLATE.substitute(begin=self.begining, end=self.end, department=self.department_name)
+        m.get_root().html.add_child(folium.Element(legend_html))
+
+        self._map_memo = (memo_key, m)
+        return copy.deepcopy(m)
+
+    # =============================================
+    # === SÉRIE TEMPORELLE PARTAGÉE ===
+    # =============================================
+
+    def extract_image_statistics(self, image: ee.Image):
+        """Moyennes régionales de tous les indices et fraction de pixels valides pour une image."""
+        valid = ee.Image.constant(1) \
+            .updateMask(image.select(SENTINEL2_GREEN_BAND).mask()) \
+            .unmask(0) \
+            .rename('valid_fraction')
+        stats = image.select(TIMESERIES_INDICES).addBands(valid).reduceRegion(
+            reducer=ee.Reducer.mean(),
+            geometry=self.department,
+            scale=PROCESSING_SCALE,
+            maxPixels=MAX_PIXELS
+        )
+        return ee.Feature(None, stats).set({
+            'date': image.date().format('YYYY-MM-dd'),
+            'image_id': image.get('system:index'),
+            'image_count': image.get('image_count')
+        })
+
+    def composite_groups(self):
+        """Acquisitions Sentinel-2 de la période regroupées par composite (voir group_acquisitions)."""
+        metadata = self.collection_metadata['s2']
+        return group_acquisitions(metadata['ids'], metadata['dates'], self.composite_period, self.composite_method)
+
+    @traced()
+    @cached_method('timeseries', depends_on=('max_cloud_percentage', 'composite_period', 'composite_method'),
+                   cache_if=_has_rows)
+    def fetch_timeseries(self):
+        """
+        Série temporelle Sentinel-2 de la période : une ligne par composite
+        (composite_period : décade, semaine, mois…) ou par acquisition
+        ('image'). Les lignes déjà réduites (stock par département, voir
+        TimeSeriesStore) sont servies localement ; seules les nouvelles sont
+        réduites, en un seul téléchargement.
+        """
+        if self.s2_with_indices is None:
+            return pd.DataFrame(columns=TIMESERIES_COLUMNS)
+
+        # Les statistiques d'une image ne dépendent que de la chaîne de calcul,
+        # pas de la période ni du filtre nuageux (qui ne font que choisir les images)
+        params = {
+            'country_code': self.country_code,
+            'scale': PROCESSING_SCALE,
+            'indices': TIMESERIES_INDICES,
+        }
+        if self.composite_period == 'image':
+            row_ids = self.collection_metadata['s2']['ids']
+
+            def images(image_ids):
+                return self.s2_with_indices.filter(ee.Filter.inList('system:index', image_ids))
+        else:
+            # Un composite est identifié par sa période et ses images membres
+            groups = {group['id']: group for group in self.composite_groups()}
+            row_ids = list(groups)
+            compositor = TemporalCompositor(self.s2_with_indices, self.composite_method)
+            params['composite'] = [self.composite_period, self.composite_method]
+
+            def images(composite_ids):
+                return compositor.composites([groups[composite_id] for composite_id in composite_ids])
+
+        def fetch(ids):
+            stats_collection = ee.FeatureCollection(images(ids).map(self.extract_image_statistics))
+            return with_retry(lambda: ee_backend.ee_to_df(stats_collection))
+
+        df = self.timeseries_store.get(self.department_name, params, row_ids, fetch)
+        df['image_count'] = df['image_count'].fillna(1).astype(int)
+        return df
+
+    @lazy_layer('s2_with_indices', 'composite_period', 'composite_method')
+    def timeseries(self):
+        """
+        Série temporelle en colonnes (date, image_id, indices, valid_fraction,
+        image_count), calculée une fois par contexte et partagée par
+        show_trends, get_temporal_data_complete, get_flood_temporal_data et
+        l'export CSV. Avec des composites, 'date' est le début de la période
+        et 'image_id' l'identifiant du composite.
+        """
+        return self.fetch_timeseries()
+
+    # =============================================
+    # === MÉTHODES UTILITAIRES CONSERVÉES ===
+    # =============================================
     
     def show_trends(self):
         """Affiche les tendances temporelles du WEI, MNDWI et couverture forestière avec Plotly."""
-        if not self.s2_collection or self.s2_collection.size().getInfo() == 0:
+        if self.collection_size('s2') == 0:
             print("❌ Aucune donnée disponible pour afficher les tendances.")
             return None
             
         try:
-            s2_with_indices = self.s2_collection.map(self.calculate_indices)
-            
-            def extract_stats(image: ee.Image):
-                stats = image.reduceRegion(
-                    reducer=ee.Reducer.mean(),
-                    geometry=self.department,
-                    scale=STATISTICS_SCALE,
-                    maxPixels=MAX_PIXELS
-                )
-                return ee.Feature(None, {
-                    'date': image.date().format('YYYY-MM-dd'),
-                    'WEI': stats.get('WEI'),
-                    'MNDWI': stats.get('MNDWI'),
-                    'NDVI': stats.get('NDVI')
-                })
-            
-            stats_collection = ee.FeatureCollection(s2_with_indices.map(extract_stats))
-            df = geemap.ee_to_df(stats_collection)
+            df = self.timeseries[['date', 'WEI', 'MNDWI', 'NDVI']].copy()
             
             if df.empty:
                 print("❌ Aucune donnée récupérée pour les tendances.")
@@ -861,31 +1146,11 @@ class FloodMonitoringSystem:
 
     def get_temporal_data_complete(self):
         """Retourne les données temporelles complètes (WEI, MNDWI, NDVI, Forest)."""
-        if not self.s2_collection or self.s2_collection.size().getInfo() == 0:
+        if self.collection_size('s2') == 0:
             return pd.DataFrame()
         
         try:
-            s2_with_indices = self.s2_collection.map(self.calculate_indices)
-            
-            def extract_stats(image):
-                stats = image.reduceRegion(
-                    reducer=ee.Reducer.mean(),
-                    geometry=self.department,
-                    scale=100,
-                    maxPixels=MAX_PIXELS
-                )
-                return ee.Feature(None, {
-                    'date': image.date().format('YYYY-MM-dd'),
-                    'WEI': stats.get('WEI'),
-                    'MNDWI': stats.get('MNDWI'),
-                    'NDVI': stats.get('NDVI')
-                })
-            
-            # Créer une FeatureCollection
-            stats_collection = ee.FeatureCollection(s2_with_indices.map(extract_stats))
-            
-            # Convertir en DataFrame
-            df = geemap.ee_to_df(stats_collection)
+            df = self.timeseries[['date', 'WEI', 'MNDWI', 'NDVI']].copy()
             
             # Ajouter simulation de données forestières basée sur NDVI
             if not df.empty and 'NDVI' in df.columns:
@@ -903,56 +1168,44 @@ class FloodMonitoringSystem:
             print(f"❌ Erreur lors de la récupération des données temporelles complètes : {e}")
             return pd.DataFrame()
 
+    @traced()
+    @cached_method('flood_stats', depends_on=('wei_threshold', 'max_cloud_percentage', 'flood_source_mode', 'sar_mapper'), cache_if=_has_values)
     def get_flood_statistics(self):
-        """Retourne les statistiques de l'eau/ inondations basées sur WEI (et non MNDWI)."""
+        """
+        Retourne les statistiques de l'eau/ inondations basées sur WEI (et non
+        MNDWI), ou sur le radar Sentinel-1 si flood_source vaut 'sar'. La clé
+        'source' indique la provenance ('optical' ou 'sar').
+        """
+        if self.flood_source == 'sar':
+            return self.get_sar_flood_statistics()
+
         if not hasattr(self, 'wei_map') or self.wei_map is None:
             return {
                 'wei_mean': 0.0,
                 'water_area_ha': 0.0,
-                'flood_percentage': 0.0
+                'flood_percentage': 0.0,
+                'source': 'optical'
             }
 
         try:
-            # Moyenne de WEI sur le département
-            wei_stats = self.wei_map.reduceRegion(
-                reducer=ee.Reducer.mean(),
-                geometry=self.department,
-                scale=100,
-                maxPixels=MAX_PIXELS
-            )
-            wei_mean = wei_stats.get('WEI')
-            wei_value = ee.Number(wei_mean).getInfo() if wei_mean is not None else 0.0
+            # Moyenne WEI et surface en eau (seuil WEI) : un seul getInfo
+            stats = StatisticsBatch(self.department) \
+                .add('wei_mean', self.wei_map, 'mean', default=0.0) \
+                .add('water_area', self.wei_map.gte(self.wei_threshold).multiply(ee.Image.pixelArea()), 'sum', default=0.0) \
+                .resolve()
+            wei_value = stats['wei_mean']
+            water_area = stats['water_area']
 
-            # Surface en eau (seuil WEI)
-            water_mask_wei = self.wei_map.gte(self.wei_threshold).rename('water_from_wei')
-            water_area_stats = water_mask_wei.multiply(ee.Image.pixelArea()).reduceRegion(
-                reducer=ee.Reducer.sum(),
-                geometry=self.department,
-                scale=100,
-                maxPixels=MAX_PIXELS
-            )
-            water_area_result = water_area_stats.get('water_from_wei')
-            water_area = ee.Number(water_area_result).getInfo() if water_area_result is not None else 0.0
-
-            # Surface totale
-            total_area_stats = ee.Image.pixelArea().reduceRegion(
-                reducer=ee.Reducer.sum(),
-                geometry=self.department,
-                scale=100,
-                maxPixels=MAX_PIXELS
-            )
-            total_area_result = total_area_stats.get('area')
-            total_area = ee.Number(total_area_result).getInfo() if total_area_result is not None else 1.0
-
-            # conversions
+            # conversions (surface totale issue de l'index des géométries)
             water_area_ha = water_area / 10000 if water_area > 0 else 0.0
-            total_area_ha = total_area / 10000 if total_area > 0 else 1.0
+            total_area_ha = self.get_department_info()['area_ha']
             flood_percentage = (water_area_ha / total_area_ha) * 100 if total_area_ha > 0 else 0.0
 
             return {
                 'wei_mean': float(wei_value),
                 'water_area_ha': water_area_ha,
-                'flood_percentage': flood_percentage
+                'flood_percentage': flood_percentage,
+                'source': 'optical'
             }
 
         except Exception as e:
@@ -960,12 +1213,59 @@ class FloodMonitoringSystem:
             return {
                 'wei_mean': 0.0,
                 'water_area_ha': 0.0,
-                'flood_percentage': 0.0
+                'flood_percentage': 0.0,
+                'source': 'optical'
+            }
+
+    def get_sar_flood_statistics(self):
+        """
+        Statistiques d'inondation radar, mêmes clés que le chemin WEI : la
+        surface en eau vient de sar_flood_extent, 'wei_mean' des quelques
+        images Sentinel-2 disponibles (0.0 sinon) ; 'vv_mean' donne la
+        rétrodiffusion moyenne (dB). Un seul getInfo.
+        """
+        if self.sar_flood_extent is None:
+            return {
+                'wei_mean': 0.0,
+                'water_area_ha': 0.0,
+                'flood_percentage': 0.0,
+                'source': 'sar'
             }
 
+        try:
+            batch = StatisticsBatch(self.department) \
+                .add('water_area', self.sar_flood_extent.multiply(ee.Image.pixelArea()), 'sum', default=0.0) \
+                .add('vv_mean', self.s1_backscatter, 'mean', default=0.0)
+            if self.wei_map is not None:
+                batch.add('wei_mean', self.wei_map, 'mean', default=0.0)
+            stats = batch.resolve()
+
+            water_area_ha = stats['water_area'] / 10000 if stats['water_area'] > 0 else 0.0
+            total_area_ha = self.get_department_info()['area_ha']
+            flood_percentage = (water_area_ha / total_area_ha) * 100 if total_area_ha > 0 else 0.0
+
+            return {
+                'wei_mean': float(stats.get('wei_mean', 0.0)),
+                'water_area_ha': water_area_ha,
+                'flood_percentage': flood_percentage,
+                'source': 'sar',
+                'vv_mean': float(stats['vv_mean'])
+            }
+
+        except Exception as e:
+            print(f"❌ Erreur lors de la récupération des statistiques (SAR) : {e}")
+            return {
+                'wei_mean': 0.0,
+                'water_area_ha': 0.0,
+                'flood_percentage': 0.0,
+                'source': 'sar'
+            }
+
+    @traced()
+    @cached_method('forest_stats', cache_if=_has_values)
     def get_forest_statistics(self):
         """Retourne les statistiques de la couverture forestière."""
-        if not self.forest_dataset or self.forest_dataset.size().getInfo() == 0:
+        if self.collection_size('forest') == 0:
             return {
                 'forest_area_ha': 0.0,
                 'forest_percentage': 0.0
@@ -974,67 +1274,36 @@ class FloodMonitoringSystem:
         try:
             forest_prob = self.forest_dataset.median().select('trees')
             
-            # Diagnostic: calculer les statistiques de probabilité forestière
-            forest_stats_diag = forest_prob.reduceRegion(
-                reducer=ee.Reducer.minMax().combine(ee.Reducer.mean(), None, True),
+            # Seuil adaptatif basé sur la moyenne régionale, évalué côté serveur
+            raw_mean = forest_prob.reduceRegion(
+                reducer=ee.Reducer.mean(),
                 geometry=self.department,
-                scale=100,
+                scale=PROCESSING_SCALE,
                 maxPixels=MAX_PIXELS
-            )
-            
-            print(f"🌳 Diagnostic forestier:")
-            trees_min = trees_max = trees_mean = 0.0
-            try:
-                trees_min_val = forest_stats_diag.get('trees_min')
-                trees_max_val = forest_stats_diag.get('trees_max') 
-                trees_mean_val = forest_stats_diag.get('trees_mean')
-                
-                if trees_min_val is not None:
-                    trees_min = ee.Number(trees_min_val).getInfo()
-                    print(f"   - Probabilité min: {trees_min:.3f}")
-                if trees_max_val is not None:
-                    trees_max = ee.Number(trees_max_val).getInfo()
-                    print(f"   - Probabilité max: {trees_max:.3f}")
-                if trees_mean_val is not None:
-                    trees_mean = ee.Number(trees_mean_val).getInfo()
-                    print(f"   - Probabilité moyenne: {trees_mean:.3f}")
-            except Exception as e:
-                print(f"   - Erreur diagnostic: {e}")
-            
-            # Seuil adaptatif basé sur la moyenne régionale
-            if trees_mean > 0.4:
-                forest_threshold = 0.5  # Zone forestière dense
-            elif trees_mean > 0.2:
-                forest_threshold = 0.3  # Zone de transition
-            else:
-                forest_threshold = 0.15  # Zone semi-aride/sahélienne
-                        
-            print(f"   - Seuil adaptatif utilisé: {forest_threshold}")
-                    
+            ).get('trees')
+            forest_threshold = adaptive_forest_threshold(raw_mean)
             forest_mask = forest_prob.gt(forest_threshold)
             
-            # Calculer la surface forestière
-            forest_area_result = forest_mask.multiply(ee.Image.pixelArea()).reduceRegion(
-                reducer=ee.Reducer.sum(),
-                geometry=self.department,
-                scale=100,
-                maxPixels=MAX_PIXELS
-            ).get('trees')
+            # Diagnostic + surface forestière : un seul getInfo
+            stats = StatisticsBatch(self.department) \
+                .add('trees_min', forest_prob, 'min') \
+                .add('trees_max', forest_prob, 'max') \
+                .add('trees_mean', forest_prob, 'mean') \
+                .add('forest_area', forest_mask.multiply(ee.Image.pixelArea()), 'sum', default=0.0) \
+                .add_value('forest_threshold', forest_threshold, default=0.15) \
+                .resolve()
             
-            # Calculer la surface totale
-            total_area_result = ee.Image.pixelArea().reduceRegion(
-                reducer=ee.Reducer.sum(),
-                geometry=self.department,
-                scale=100,
-                maxPixels=MAX_PIXELS
-            ).get('area')
+            print(f"🌳 Diagnostic forestier:")
+            print(f"   - Probabilité min: {stats['trees_min']:.3f}")
+            print(f"   - Probabilité max: {stats['trees_max']:.3f}")
+            print(f"   - Probabilité moyenne: {stats['trees_mean']:.3f}")
+            print(f"   - Seuil adaptatif utilisé: {stats['forest_threshold']}")
             
-            # Conversion en hectares et calculs
-            forest_area = ee.Number(forest_area_result).getInfo() if forest_area_result is not None else 0.0
-            total_area = ee.Number(total_area_result).getInfo() if total_area_result is not None else 1.0
+            # Conversion en hectares et calculs (surface totale issue de l'index des géométries)
+            forest_area = stats['forest_area']
             
             forest_area_ha = (forest_area / 10000) if forest_area > 0 else 0.0
-            total_area_ha = (total_area / 10000) if total_area > 0 else 1.0
+            total_area_ha = self.get_department_info()['area_ha']
             
             # Calculer le pourcentage de couverture forestière
             forest_percentage = (forest_area_ha / total_area_ha) * 100 if total_area_ha > 0 else 0.0
@@ -1058,46 +1327,87 @@ class FloodMonitoringSystem:
 
     def get_flood_temporal_data(self):
         """Retourne un DF avec MNDWI et WEI (si disponibles)."""
-        if not self.s2_collection or self.s2_collection.size().getInfo() == 0:
+        if self.collection_size('s2') == 0:
             return pd.DataFrame()
 
         try:
-            s2_with_indices = self.s2_collection.map(self.calculate_indices)
-
-            def extract_stats(image):
-                stats = image.reduceRegion(
-                    reducer=ee.Reducer.mean(),
-                    geometry=self.department,
-                    scale=100,
-                    maxPixels=MAX_PIXELS
-                )
-                return ee.Feature(None, {
-                    'date': image.date().format('YYYY-MM-dd'),
-                    'MNDWI': stats.get('MNDWI'),
-                    'WEI': stats.get('WEI')
-                })
-
-            stats_collection = ee.FeatureCollection(s2_with_indices.map(extract_stats))
-            df = geemap.ee_to_df(stats_collection)
-            return df
+            return self.timeseries[['date', 'MNDWI', 'WEI']].copy()
 
         except Exception as e:
             print(f"❌ Erreur lors de la récupération des données temporelles : {e}")
             return pd.DataFrame()
 
+    def get_anomalies(self, build: bool = False):
+        """
+        Série de la période avec, pour WEI, MNDWI et NDVI, la normale
+        pluriannuelle de la saison et l'écart normalisé '<indice>_z'
+        (voir climatology.py). La référence stockée est utilisée telle
+        quelle ; absente, elle n'est calculée que si build=True.
+        """
+        baseline = self.climatology.load()
+        if baseline is None and build:
+            baseline = self.climatology.build()
+        if baseline is None or baseline.empty:
+            print(f"⚠️ Pas de référence pluriannuelle pour {self.department_name} (python climatology.py -d {self.department_name}).")
+            return pd.DataFrame()
+        if self.collection_size('s2') == 0 or self.timeseries.empty:
+            return pd.DataFrame()
+        return self.climatology.anomalies(self.timeseries, baseline)
+
+    def get_anomaly_alert(self):
+        """
+        Niveau d'alerte inondation (clés d'ALERT_MESSAGES) d'après l'écart du
+        WEI à la normale sur la dernière période de la série.
+        """
+        anomalies = self.get_anomalies()
+        latest = anomalies.dropna(subset=['WEI_z']).tail(1) if not anomalies.empty else anomalies
+        if latest.empty:
+            return {'available': False, 'level': 0, 'message': ALERT_MESSAGES[0], 'wei_z': 0.0, 'date': None}
+        wei_z = float(latest['WEI_z'].iloc[0])
+        level = anomaly_alert_level(wei_z)
+        return {
+            'available': True,
+            'level': level,
+            'message': ALERT_MESSAGES[level],
+            'wei_z': wei_z,
+            'date': str(latest['date'].iloc[0]),
+        }
+
+    @traced()
     def generate_report(self):
-        """Génère un rapport textuel simplifié sans alertes."""
-        trend_text = '↑ Augmentation' if self.flood_trend > 0 else '↓ Diminution' if self.flood_trend < 0 else '→ Stable'
-        
-        flood_stats = self.get_flood_statistics()
-        forest_stats = self.get_forest_statistics()
+        """Génère un rapport textuel simplifié ; l'alerte vient des anomalies si une référence est stockée."""
+        # Requêtes indépendantes : évaluées en parallèle
+        results = run_parallel({
+            'flood': self.get_flood_statistics,
+            'forest': self.get_forest_statistics,
+            'trend': lambda: self.flood_trend,
+        })
+        flood_stats, forest_stats, flood_trend = results['flood'], results['forest'], results['trend']
+        trend_text = '↑ Augmentation' if flood_trend > 0 else '↓ Diminution' if flood_trend < 0 else '→ Stable'
+        alert = self.get_anomaly_alert()
+        if alert['available']:
+            years = self.climatology.reference_years()
+            anomaly_text = f"""
+**ANOMALIES (référence {years[0]}-{years[-1]})**
+- Écart du WEI à la normale ({alert['date']}) : {alert['wei_z']:+.2f} σ
+- Niveau d'alerte {alert['level']} : {alert['message']}
+"""
+            comparison_text = "- Suivi de l'écart à la normale saisonnière"
+        else:
+            anomaly_text = ""
+            comparison_text = "- Analyse comparative avec les années précédentes recommandée"
         
+        if flood_stats.get('source') == 'sar':
+            source_text = "radar Sentinel-1, couverture nuageuse"
+        else:
+            source_text = "WEI"
+
         report = f"""=== RAPPORT DE SURVEILLANCE ENVIRONNEMENTALE ===
 
 **Département** : {self.department_name}
 **Période d'analyse** : {self.begining} → {self.end}
 
-**ZONES EN EAU (WEI)**
+**ZONES EN EAU ({source_text})**
 - Indice WEI moyen : {flood_stats['wei_mean']:.3f}
 - Surface en eau : {flood_stats['water_area_ha']:.1f} hectares
 - Pourcentage du territoire : {flood_stats['flood_percentage']:.2f}%
@@ -1106,11 +1416,11 @@ class FloodMonitoringSystem:
 **COUVERTURE FORESTIÈRE**
 - Surface forestière : {forest_stats['forest_area_ha']:.1f} hectares  
 - Couverture forestière : {forest_stats['forest_percentage']:.2f}%
-
+{anomaly_text}
 **RECOMMANDATIONS**
 - Surveillance continue des zones en eau identifiées
 - Monitoring de l'évolution de la couverture forestière
-- Analyse comparative avec les années précédentes recommandée
+{comparison_text}
 """
         return report
 
@@ -1142,33 +1452,54 @@ class FloodMonitoringSystem:
 
     def update_dates(self, new_begin: str, new_end: str):
         """Met à jour les dates et recalcule les données."""
-        self.begining = new_begin
-        self.end = new_end
-        self.update_datasets()
-        self.detect_floods()
-        print(f"✅ Données mises à jour pour {new_begin} → {new_end}")
+        if self.set_context(begin_date=new_begin, end_date=new_end):
+            print(f"✅ Données mises à jour pour {new_begin} → {new_end}")
         
+    @traced()
     def export_data_to_csv(self):
-        """Exporte les données en CSV."""
+        """Exporte la série temporelle complète (tous les indices) en CSV."""
         try:
-            flood_df = self.get_flood_temporal_data()
-            if flood_df.empty:
+            if self.collection_size('s2') == 0:
+                return "No data available"
+            timeseries_df = self.timeseries
+            if timeseries_df.empty:
                 return "No data available"
-            csv_data = flood_df.to_csv(index=False)
+            csv_data = timeseries_df.to_csv(index=False)
             return csv_data
         except Exception as e:
             print(f"❌ Erreur lors de l'export des données : {e}")
             return "Error exporting data"
-            
+
+    @traced()
+    def export_animation(self, name: str, folder: str = None, workers: int = ANIMATION_WORKERS,
+                         period: str = None, server_mode: str = ANIMATION_SERVER_MODE,
+                         gif: bool = True, mp4: bool = GIF_PARAMS['mp4']):
+        """
+        Exporte l'animation 'fires', 'temperature' ou 'forest' du contexte
+        courant (images, GIF, MP4) ; voir animation.py. Retourne les
+        statistiques de l'export, ou un dict vide si la collection est vide.
+        """
+        if self.collection_size(name) == 0:
+            print(f"❌ Aucune image {name} pour la période sélectionnée.")
+            return {}
+        exporter = AnimationExporter(self, name, folder=folder, workers=workers, period=period,
+                                     server_mode=server_mode)
+        return exporter.export(gif=gif, mp4=mp4)
+
+    @traced()
     def get_comprehensive_statistics(self):
         """Retourne toutes les statistiques : inondations, forêts, etc."""
-        flood_stats = self.get_flood_statistics()
-        forest_stats = self.get_forest_statistics()
+        # Requêtes indépendantes : évaluées en parallèle
+        results = run_parallel({
+            'flood': self.get_flood_statistics,
+            'forest': self.get_forest_statistics,
+            'trend': lambda: self.flood_trend,
+        })
         
         return {
-            **flood_stats,
-            **forest_stats,
+            **results['flood'],
+            **results['forest'],
             'department_name': self.department_name,
             'period': f"{self.begining} to {self.end}",
-            'trend_value': self.flood_trend if hasattr(self, 'flood_trend') else 0.0
+            'trend_value': results['trend']
         }
@@ -0,0 +1,121 @@
+# statistics_engine.py
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+import numpy as np
+from ee_backend import ee
+from config import MAX_PIXELS, PROCESSING_SCALE
+from parallel_eval import get_info
+
+
+# Noms des réducteurs supportés (résolus sur ee.Reducer après ee.Initialize)
+_REDUCERS = ('mean', 'sum', 'min', 'max')
+
+
+class StatisticsBatch:
+    """
+    Regroupe plusieurs statistiques régionales Earth Engine et les résout
+    en un seul aller-retour serveur :
+      - une seule reduceRegion par type de réducteur (mean, sum, min, max)
+      - toutes les sorties fusionnées dans un ee.Dictionary
+      - un unique getInfo() côté client, avec valeurs par défaut si null
+    """
+
+    def __init__(
+        self,
+        geometry,
+        scale: int = PROCESSING_SCALE,
+        max_pixels: float = MAX_PIXELS,
+    ) -> None:
+        self.geometry = geometry
+        self.scale = scale
+        self.max_pixels = max_pixels
+        self._bands: Dict[str, list] = {}
+        self._values: Dict[str, object] = {}
+        self._defaults: Dict[str, object] = {}
+
+    # -----------------------------
+    # Déclaration des métriques
+    # -----------------------------
+    def add(self, name: str, image: ee.Image, reducer: str = 'mean', default=0.0) -> "StatisticsBatch":
+        """Ajoute une métrique : image mono-bande réduite sur la géométrie."""
+        if reducer not in _REDUCERS:
+            raise ValueError(f"Réducteur non supporté : {reducer}")
+        self._bands.setdefault(reducer, []).append(ee.Image(image).rename(name))
+        self._defaults[name] = default
+        return self
+
+    def add_value(self, name: str, value, default=None) -> "StatisticsBatch":
+        """Ajoute une valeur EE déjà calculée (ee.Number, ee.List…)."""
+        self._values[name] = value
+        self._defaults[name] = default
+        return self
+
+    def __len__(self) -> int:
+        return len(self._defaults)
+
+    # -----------------------------
+    # Résolution
+    # -----------------------------
+    def to_dictionary(self) -> ee.Dictionary:
+        """Construit le dictionnaire EE combiné (sans aller-retour)."""
+        result = ee.Dictionary(self._values)
+        for reducer, images in self._bands.items():
+            stacked = ee.Image.cat(images)
+            stats = stacked.reduceRegion(
+                reducer=getattr(ee.Reducer, reducer)(),
+                geometry=self.geometry,
+                scale=self.scale,
+                maxPixels=self.max_pixels
+            )
+            result = result.combine(stats, True)
+        return result
+
+    def resolve(self, info: Optional[dict] = None) -> dict:
+        """
+        Résout toutes les métriques en un seul getInfo().
+        'info' permet de fournir un résultat déjà récupéré.
+        """
+        if info is None:
+            info = get_info(self.to_dictionary()) if self._defaults else {}
+        info = info or {}
+        return {
+            name: (info.get(name) if info.get(name) is not None else default)
+            for name, default in self._defaults.items()
+        }
+
+
+def adaptive_forest_threshold(regional_mean) -> ee.Number:
+    """
+    Seuil de probabilité 'trees' (Dynamic World) adapté à la région,
+    évalué côté serveur à partir de la probabilité moyenne (null -> 0).
+    """
+    regional_mean = ee.Number(ee.Algorithms.If(regional_mean, regional_mean, 0))
+    return ee.Number(ee.Algorithms.If(
+        regional_mean.gt(0.4), 0.5,       # Zone forestière dense
+        ee.Algorithms.If(
+            regional_mean.gt(0.2), 0.3,   # Zone de transition
+            0.15                          # Zone semi-aride/sahélienne
+        )
+    ))
+
+
+def fit_trend(days: np.ndarray, values: np.ndarray, method: str = 'linear') -> Tuple[float, float]:
+    """
+    Droite ajustée localement sur une série régionale déjà téléchargée :
+    (pente par jour, ordonnée à l'origine), par moindres carrés ('linear',
+    comme ee.Reducer.linearFit) ou pente de Sen ('sens', médiane des pentes
+    deux à deux, comme ee.Reducer.sensSlope). (0.0, moyenne) si toutes les
+    dates sont identiques.
+    """
+    days = np.asarray(days, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if len(days) < 2 or np.ptp(days) == 0:
+        return 0.0, float(np.mean(values)) if len(values) else 0.0
+    if method == 'sens':
+        i, j = np.triu_indices(len(days), k=1)
+        dx = days[j] - days[i]
+        ok = dx != 0
+        slope = float(np.median((values[j] - values[i])[ok] / dx[ok]))
+        return slope, float(np.median(values - slope * days))
+    slope, intercept = np.polyfit(days, values, 1)
+    return float(slope), float(intercept)
@@ -0,0 +1,2 @@
+# testing/__init__.py
+"""Outils hors production : backend Earth Engine simulé (fake_ee) pour benchmarks, tests et modes --offline."""
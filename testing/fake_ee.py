@@ -0,0 +1,1830 @@
+# testing/fake_ee.py
+"""
+Backend Earth Engine local (hors ligne) pour benchmarks et tests de non-régression.
+
+FakeEarthEngine expose le sous-ensemble de l'API earthengine-api utilisé par
+le projet (Image, ImageCollection, FeatureCollection, Reducer, Filter…) et
+l'évalue paresseusement avec NumPy sur une grille synthétique couvrant le
+Sénégal. Les jeux de données (Sentinel-1/2, VIIRS, MODIS, Dynamic World,
+geoBoundaries ADM2) sont générés de façon déterministe.
+
+Chaque aller-retour simulé (getInfo, getMapId, ee_to_df…) est enregistré
+dans un RoundTripRecorder avec sa latence simulée et sa taille.
+
+    from testing.fake_ee import FakeEarthEngine
+    import ee_backend
+    ee_backend.set_backend(FakeEarthEngine(latency=0.3))
+    from sekhem_utils import FloodMonitoringSystem
+"""
+from __future__ import annotations
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import (
+    CLASS_NAMES,
+    COUNTRY_CODE,
+    DEPARTMENT_DATASET_NAME,
+    FIRES_DATASET_NAME,
+    FOREST_DATASET_NAME,
+    SENTINEL1_DATASET_NAME,
+    SENTINEL2_DATASET_NAME,
+    TEMPERATURE_DATASET_NAME,
+)
+from ee_backend import RoundTripRecorder
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_DAY_MS = 86400000
+
+# 45 départements du Sénégal, en 5 rangées (nord -> sud) de 9 blocs (ouest -> est)
+SYNTHETIC_DEPARTMENTS = [
+    'Saint-Louis', 'Dagana', 'Podor', 'Louga', 'Linguère', 'Ranérou', 'Matam', 'Kanel', 'Bakel',
+    'Dakar', 'Pikine', 'Guédiawaye', 'Keur Massar', 'Rufisque', 'Kébémer', 'Tivaouane', 'Mbacké', 'Koumpentoum',
+    'Thiès', 'Mbour', 'Bambey', 'Diourbel', 'Gossas', 'Kaffrine', 'Malem Hodar', 'Koungheul', 'Goudiry',
+    'Fatick', 'Foundiougne', 'Kaolack', 'Guinguinéo', 'Birkilane', 'Nioro du Rip', 'Tambacounda', 'Salémata', 'Saraya',
+    'Ziguinchor', 'Bignona', 'Goudomp', 'Sédhiou', 'Bounkiling', 'Kolda', 'Médina Yoro Foulah', 'Vélingara', 'Kédougou',
+]
+
+
+class EEException(Exception):
+    """Erreur levée par le backend local (même rôle que ee.EEException)."""
+
+
+# =============================================
+# === ÉTAT DU BACKEND ACTIF ===
+# =============================================
+
+_active: Optional["FakeEarthEngine"] = None
+
+
+def _backend() -> "FakeEarthEngine":
+    if _active is None:
+        raise EEException("Aucun FakeEarthEngine actif")
+    return _active
+
+
+def _py(value):
+    """Résout récursivement une valeur du backend en objet Python sérialisable."""
+    if isinstance(value, _Computed):
+        return _py(value._info())
+    if isinstance(value, dict):
+        return {k: _py(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_py(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _val(value):
+    """Valeur Python d'un argument (Number, String… ou scalaire)."""
+    return _py(value) if isinstance(value, _Computed) else value
+
+
+def _to_millis(value) -> int:
+    if isinstance(value, Date):
+        return value._millis()
+    value = _val(value)
+    if isinstance(value, dict) and value.get('type') == 'Date':
+        return int(value['value'])
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        dt = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        return int((dt - _EPOCH).total_seconds() * 1000)
+    text = str(value)
+    fmt = '%Y-%m-%dT%H:%M:%S' if 'T' in text else '%Y-%m-%d'
+    dt = datetime.strptime(text[:19] if 'T' in text else text[:10], fmt).replace(tzinfo=timezone.utc)
+    return int((dt - _EPOCH).total_seconds() * 1000)
+
+
+class _Computed:
+    """Objet calculé paresseusement (équivalent de ee.ComputedObject)."""
+
+    def __init__(self, thunk: Callable[[], object]) -> None:
+        self._thunk = thunk
+        self._memo = None
+        self._done = False
+        self._lock = threading.Lock()
+
+    def _value(self):
+        if not self._done:
+            with self._lock:
+                if not self._done:
+                    self._memo = self._thunk()
+                    self._done = True
+        return self._memo
+
+    def _info(self):
+        return self._value()
+
+    def getInfo(self):
+        return _backend()._round_trip('getInfo', type(self).__name__, lambda: _py(self))
+
+
+# =============================================
+# === VALEURS SIMPLES ===
+# =============================================
+
+class Number(_Computed):
+    def __init__(self, value=None) -> None:
+        if isinstance(value, _Computed):
+            super().__init__(lambda: _val(value))
+        else:
+            super().__init__(lambda: value)
+
+    def _num(self):
+        v = self._value()
+        if v is None:
+            raise EEException("Number: valeur nulle")
+        return v
+
+    def _op(self, other, fn):
+        return Number(_Computed(lambda: fn(self._num(), _val(other))))
+
+    def add(self, o): return self._op(o, lambda a, b: a + b)
+    def subtract(self, o): return self._op(o, lambda a, b: a - b)
+    def multiply(self, o): return self._op(o, lambda a, b: a * b)
+    def divide(self, o): return self._op(o, lambda a, b: a / b if b else 0)
+    def pow(self, o): return self._op(o, lambda a, b: a ** b)
+    def min(self, o): return self._op(o, min)
+    def max(self, o): return self._op(o, max)
+    def gt(self, o): return self._op(o, lambda a, b: int(a > b))
+    def gte(self, o): return self._op(o, lambda a, b: int(a >= b))
+    def lt(self, o): return self._op(o, lambda a, b: int(a < b))
+    def lte(self, o): return self._op(o, lambda a, b: int(a <= b))
+    def eq(self, o): return self._op(o, lambda a, b: int(a == b))
+    def floor(self): return Number(_Computed(lambda: math.floor(self._num())))
+    def round(self): return Number(_Computed(lambda: round(self._num())))
+    def abs(self): return Number(_Computed(lambda: abs(self._num())))
+    def sqrt(self): return Number(_Computed(lambda: math.sqrt(self._num())))
+    def int(self): return Number(_Computed(lambda: int(self._num())))
+    def toInt(self): return self.int()
+    def float(self): return Number(_Computed(lambda: float(self._num())))
+    def format(self, fmt='%s'): return String(_Computed(lambda: fmt % self._num()))
+
+
+class String(_Computed):
+    def __init__(self, value=None) -> None:
+        if isinstance(value, _Computed):
+            super().__init__(lambda: _val(value))
+        else:
+            super().__init__(lambda: value)
+
+    def cat(self, other): return String(_Computed(lambda: f"{self._value()}{_val(other)}"))
+
+
+class EEList(_Computed):
+    def __init__(self, value=None) -> None:
+        if isinstance(value, _Computed):
+            super().__init__(lambda: list(_val(value) or []))
+        else:
+            super().__init__(lambda: list(value or []))
+
+    def size(self): return Number(_Computed(lambda: len(self._value())))
+    length = size
+    def get(self, index): return _wrap(_Computed(lambda: self._value()[int(_val(index))]))
+    def slice(self, start, end=None):
+        return EEList(_Computed(lambda: self._value()[int(_val(start)):(None if end is None else int(_val(end)))]))
+    def sort(self): return EEList(_Computed(lambda: sorted(self._value(), key=_py)))
+    def distinct(self): return EEList(_Computed(lambda: list(dict.fromkeys(_py(self._value())))))
+    def map(self, fn): return EEList(_Computed(lambda: [fn(_wrap(v)) for v in self._value()]))
+    def _info(self): return [_py(v) for v in self._value()]
+
+
+class Dictionary(_Computed):
+    def __init__(self, value=None) -> None:
+        if isinstance(value, Dictionary):
+            super().__init__(lambda: dict(value._value()))
+        elif isinstance(value, _Computed):
+            super().__init__(lambda: dict(_val(value) or {}))
+        else:
+            super().__init__(lambda: dict(value or {}))
+
+    def get(self, key, defaultValue=None):
+        def thunk():
+            d = self._value()
+            k = _val(key)
+            if k in d:
+                return _val(d[k])
+            if defaultValue is not None:
+                return _val(defaultValue)
+            raise EEException(f"Dictionary.get: clé absente '{k}'")
+        return _wrap(_Computed(thunk))
+
+    def getNumber(self, key): return Number(self.get(key))
+    def contains(self, key): return Number(_Computed(lambda: int(_val(key) in self._value())))
+    def keys(self): return EEList(_Computed(lambda: list(self._value().keys())))
+    def values(self): return EEList(_Computed(lambda: list(self._value().values())))
+
+    def set(self, key, value):
+        return Dictionary(_Computed(lambda: {**self._value(), _val(key): value}))
+
+    def combine(self, other, overwrite=True):
+        def thunk():
+            a, b = self._value(), Dictionary(other)._value()
+            return {**a, **b} if overwrite else {**b, **a}
+        return Dictionary(_Computed(thunk))
+
+    def rename(self, from_keys, to_keys, overwrite=False):
+        def thunk():
+            d = dict(self._value())
+            for f, t in zip(_val(from_keys), _val(to_keys)):
+                if f in d:
+                    d[t] = d.pop(f)
+            return d
+        return Dictionary(_Computed(thunk))
+
+    def select(self, keys):
+        return Dictionary(_Computed(lambda: {k: v for k, v in self._value().items() if k in _val(keys)}))
+
+    def _info(self): return {k: _py(v) for k, v in self._value().items()}
+
+
+def _wrap(computed: _Computed):
+    """Enveloppe générique : un résultat de get() peut être un nombre, une chaîne…"""
+    return _Any(computed)
+
+
+class _Any(Number):
+    """Valeur dont le type n'est connu qu'à l'évaluation (ee.ComputedObject)."""
+
+    def _info(self):
+        return _py(self._value())
+
+
+class Date(_Computed):
+    def __init__(self, value=None) -> None:
+        super().__init__(lambda: _to_millis(value) if value is not None else int(time.time() * 1000))
+
+    def _millis(self) -> int:
+        return int(self._value())
+
+    def _datetime(self) -> datetime:
+        return _EPOCH + timedelta(milliseconds=self._millis())
+
+    def millis(self): return Number(_Computed(self._millis))
+
+    def format(self, fmt='YYYY-MM-dd'):
+        py_fmt = str(fmt).replace('YYYY', '%Y').replace('yyyy', '%Y').replace('MM', '%m') \
+            .replace('dd', '%d').replace('HH', '%H').replace('mm', '%M').replace('ss', '%S')
+        return String(_Computed(lambda: self._datetime().strftime(py_fmt)))
+
+    def difference(self, start, unit='day'):
+        factor = {'day': _DAY_MS, 'hour': 3600000, 'week': 7 * _DAY_MS, 'second': 1000,
+                  'month': 30.4375 * _DAY_MS, 'year': 365.25 * _DAY_MS}[str(unit).rstrip('s')]
+        return Number(_Computed(lambda: (self._millis() - Date(start)._millis()) / factor))
+
+    def advance(self, delta, unit='day'):
+        def thunk():
+            dt = self._datetime()
+            n = _val(delta)
+            u = str(unit).rstrip('s')
+            if u in ('month', 'year'):
+                months = int(n) * (12 if u == 'year' else 1)
+                y, m = divmod(dt.month - 1 + months, 12)
+                day = min(dt.day, 28)
+                dt = dt.replace(year=dt.year + y, month=m + 1, day=day)
+            else:
+                dt = dt + timedelta(**{u + 's': n})
+            return _to_millis(dt)
+        return Date(_Computed(thunk))
+
+    def get(self, field):
+        return Number(_Computed(lambda: getattr(self._datetime(), str(field).lower())))
+
+    def getRelative(self, unit, inUnit):
+        if unit == 'day' and inUnit == 'year':
+            return Number(_Computed(lambda: self._datetime().timetuple().tm_yday - 1))
+        raise EEException(f"getRelative({unit}, {inUnit}) non supporté")
+
+    def _info(self):
+        return {'type': 'Date', 'value': self._millis()}
+
+
+# =============================================
+# === GÉOMÉTRIES ===
+# =============================================
+
+class Geometry(_Computed):
+    """Géométrie rasterisée sur la grille synthétique (masque booléen + bbox)."""
+
+    def __init__(self, geo_json=None, _mask=None, _point=None) -> None:
+        def thunk():
+            if _mask is not None:
+                return _mask() if callable(_mask) else _mask
+            return _backend().world.mask_from_geojson(_py(geo_json))
+        super().__init__(thunk)
+        self._point = _point
+
+    @staticmethod
+    def Rectangle(coords, proj=None, geodesic=None):
+        w, s, e, n = _val(coords)
+        return Geometry({'type': 'Polygon', 'coordinates': [[[w, s], [e, s], [e, n], [w, n], [w, s]]]})
+
+    @staticmethod
+    def Point(coords, proj=None):
+        lon, lat = _val(coords)
+        return Geometry({'type': 'Point', 'coordinates': [lon, lat]}, _point=(lon, lat))
+
+    @staticmethod
+    def Polygon(coords, proj=None, geodesic=None):
+        return Geometry({'type': 'Polygon', 'coordinates': _val(coords)})
+
+    def _mask(self) -> np.ndarray:
+        return self._value()
+
+    def _bbox(self):
+        return _backend().world.bbox_of(self._mask())
+
+    def geometry(self): return self
+    def simplify(self, maxError=None): return self
+    def buffer(self, distance, maxError=None): return self
+    def dissolve(self, maxError=None): return self
+
+    def intersection(self, other, maxError=None):
+        return Geometry(_mask=lambda: self._mask() & _as_mask(other))
+
+    def union(self, other, maxError=None):
+        return Geometry(_mask=lambda: self._mask() | _as_mask(other))
+
+    def centroid(self, maxError=None):
+        def point():
+            if self._point is not None:
+                return self._point
+            return _backend().world.centroid_of(self._mask())
+        geom = Geometry(_mask=self._mask)
+        geom._point_thunk = point
+        return _PointGeometry(point, self._mask)
+
+    def bounds(self, maxError=None, proj=None):
+        return Geometry(_mask=lambda: _backend().world.mask_from_bbox(self._bbox()))
+
+    def coordinates(self):
+        def thunk():
+            w, s, e, n = self._bbox()
+            return [[[w, s], [e, s], [e, n], [w, n], [w, s]]]
+        return EEList(_Computed(thunk))
+
+    def area(self, maxError=None, proj=None):
+        return Number(_Computed(lambda: float(_backend().world.pixel_area[self._mask()].sum())))
+
+    def _info(self):
+        w, s, e, n = self._bbox()
+        return {'type': 'Polygon', 'coordinates': [[[w, s], [e, s], [e, n], [w, n], [w, s]]]}
+
+
+class _PointGeometry(Geometry):
+    def __init__(self, point_thunk, mask_thunk) -> None:
+        super().__init__(_mask=mask_thunk)
+        self._point_thunk = point_thunk
+
+    def coordinates(self):
+        return EEList(_Computed(lambda: list(self._point_thunk())))
+
+    def _info(self):
+        return {'type': 'Point', 'coordinates': list(self._point_thunk())}
+
+
+def _as_mask(obj) -> np.ndarray:
+    """Masque booléen d'une géométrie, d'une Feature ou d'une FeatureCollection."""
+    if obj is None:
+        return np.ones(_backend().world.shape, dtype=bool)
+    if isinstance(obj, (Feature, FeatureCollection)):
+        return obj.geometry()._mask()
+    if isinstance(obj, Geometry):
+        return obj._mask()
+    return Geometry(obj)._mask()
+
+
+# =============================================
+# === FILTRES ET RÉDUCTEURS ===
+# =============================================
+
+class Filter:
+    def __init__(self, predicate: Callable[[dict], bool]) -> None:
+        self._predicate = predicate
+
+    def _test(self, props: dict) -> bool:
+        return bool(self._predicate(props))
+
+    @staticmethod
+    def _cmp(name, value, op):
+        def predicate(props):
+            v = _val(props.get(name))
+            return v is not None and op(v, _val(value))
+        return Filter(predicate)
+
+    @staticmethod
+    def eq(name, value): return Filter._cmp(name, value, lambda a, b: a == b)
+    @staticmethod
+    def neq(name, value): return Filter._cmp(name, value, lambda a, b: a != b)
+    @staticmethod
+    def lt(name, value): return Filter._cmp(name, value, lambda a, b: a < b)
+    @staticmethod
+    def lte(name, value): return Filter._cmp(name, value, lambda a, b: a <= b)
+    @staticmethod
+    def gt(name, value): return Filter._cmp(name, value, lambda a, b: a > b)
+    @staticmethod
+    def gte(name, value): return Filter._cmp(name, value, lambda a, b: a >= b)
+
+    @staticmethod
+    def inList(name, values):
+        return Filter(lambda props: _val(props.get(name)) in (_val(values) or []))
+
+    @staticmethod
+    def listContains(name, value):
+        return Filter(lambda props: _val(value) in (_val(props.get(name)) or []))
+
+    @staticmethod
+    def notNull(names):
+        return Filter(lambda props: all(_val(props.get(n)) is not None for n in names))
+
+    @staticmethod
+    def date(start, end=None):
+        def predicate(props):
+            t = props.get('system:time_start')
+            if t is None:
+                return False
+            return _to_millis(start) <= t and (end is None or t < _to_millis(end))
+        return Filter(predicate)
+
+    @staticmethod
+    def And(*filters):
+        return Filter(lambda props: all(f._test(props) for f in filters))
+
+    @staticmethod
+    def Or(*filters):
+        return Filter(lambda props: any(f._test(props) for f in filters))
+
+    @staticmethod
+    def calendarRange(start, end=None, field='day_of_year'):
+        end = start if end is None else end
+
+        def predicate(props):
+            dt = _EPOCH + timedelta(milliseconds=props['system:time_start'])
+            value = {'day_of_year': dt.timetuple().tm_yday, 'month': dt.month, 'year': dt.year}[field]
+            lo, hi = _val(start), _val(end)
+            return lo <= value <= hi if lo <= hi else (value >= lo or value <= hi)
+        return Filter(predicate)
+
+
+def _sens_slope(x: np.ndarray, y: np.ndarray):
+    if len(x) < 2:
+        return {'slope': None, 'offset': None}
+    i, j = np.triu_indices(len(x), k=1)
+    dx = x[j] - x[i]
+    ok = dx != 0
+    if not ok.any():
+        return {'slope': None, 'offset': None}
+    slope = float(np.median((y[j] - y[i])[ok] / dx[ok]))
+    return {'slope': slope, 'offset': float(np.median(y - slope * x))}
+
+
+def _linear_fit(x: np.ndarray, y: np.ndarray):
+    if len(x) < 2 or np.ptp(x) == 0:
+        return {'scale': None, 'offset': None}
+    scale, offset = np.polyfit(x, y, 1)
+    return {'scale': float(scale), 'offset': float(offset)}
+
+
+class Reducer:
+    """
+    Réducteur : 'fn' prend 1 (ou 2 pour les réducteurs à deux entrées)
+    tableaux de valeurs valides et retourne {sortie: valeur}.
+    """
+
+    def __init__(self, outputs: List[str], fn, inputs: int = 1, single_output_name: bool = True) -> None:
+        self._outputs = outputs
+        self._fn = fn
+        self._inputs = inputs
+        self._single = single_output_name and len(outputs) == 1
+
+    def _apply(self, *arrays):
+        return self._fn(*arrays)
+
+    def _keys(self, band: str, results: dict) -> dict:
+        if self._single:
+            return {band: results[self._outputs[0]]}
+        return {f"{band}_{name}": value for name, value in results.items()}
+
+    @staticmethod
+    def _simple(name, fn):
+        return Reducer([name], lambda v: {name: (float(fn(v)) if len(v) else None)})
+
+    @staticmethod
+    def mean(): return Reducer._simple('mean', np.mean)
+    @staticmethod
+    def sum(): return Reducer([('sum')], lambda v: {'sum': float(np.sum(v))})
+    @staticmethod
+    def min(): return Reducer._simple('min', np.min)
+    @staticmethod
+    def max(): return Reducer._simple('max', np.max)
+    @staticmethod
+    def median(): return Reducer._simple('median', np.median)
+    @staticmethod
+    def stdDev(): return Reducer._simple('stdDev', np.std)
+    @staticmethod
+    def count(): return Reducer(['count'], lambda v: {'count': int(len(v))})
+    @staticmethod
+    def first(): return Reducer._simple('first', lambda v: v[0])
+
+    @staticmethod
+    def minMax():
+        return Reducer(['min', 'max'], lambda v: {
+            'min': float(np.min(v)) if len(v) else None,
+            'max': float(np.max(v)) if len(v) else None,
+        })
+
+    @staticmethod
+    def linearFit():
+        return Reducer(['scale', 'offset'], _linear_fit, inputs=2)
+
+    @staticmethod
+    def sensSlope():
+        return Reducer(['slope', 'offset'], _sens_slope, inputs=2)
+
+    def combine(self, reducer2, outputPrefix='', sharedInputs=False):
+        first, second = self, reducer2
+
+        def fn(*arrays):
+            out = dict(first._apply(*arrays))
+            out.update({f"{outputPrefix}{k}": v for k, v in second._apply(*arrays).items()})
+            return out
+        outputs = first._outputs + [f"{outputPrefix}{o}" for o in second._outputs]
+        return Reducer(outputs, fn, inputs=self._inputs, single_output_name=False)
+
+    def setOutputs(self, names):
+        inner = self
+
+        def fn(*arrays):
+            return dict(zip(names, inner._apply(*arrays).values()))
+        return Reducer(list(names), fn, inputs=self._inputs, single_output_name=False)
+
+
+# =============================================
+# === IMAGES ===
+# =============================================
+
+def _nan_cmp(a, b, op):
+    with np.errstate(invalid='ignore'):
+        out = op(a, b).astype(float)
+    out[np.isnan(a) | np.isnan(b)] = np.nan
+    return out
+
+
+class Image(_Computed):
+    """Image multi-bandes : {nom: tableau float64}, NaN = pixel masqué."""
+
+    def __init__(self, value=None, _bands=None, _props=None) -> None:
+        if _bands is not None:
+            super().__init__(_bands)
+            self._props = dict(_props or {})
+        elif isinstance(value, Image):
+            super().__init__(value._value)
+            self._props = value._props
+        elif value is None:
+            super().__init__(lambda: {})
+            self._props = {}
+        elif isinstance(value, (int, float, Number)):
+            super().__init__(lambda: {'constant': _backend().world.full(_val(value))})
+            self._props = {}
+        elif isinstance(value, _Computed):
+            inner = value
+            super().__init__(lambda: Image(inner._value())._value())
+            self._props = {}
+        else:
+            raise EEException(f"Image: argument non supporté {value!r}")
+
+    # -----------------------------
+    # Construction
+    # -----------------------------
+    def _derive(self, fn, props=None) -> "Image":
+        return Image(_bands=lambda: fn(self._value()), _props=self._props if props is None else props)
+
+    @staticmethod
+    def constant(value):
+        values = _val(value)
+        if isinstance(values, (list, tuple)):
+            return Image(_bands=lambda: {f'constant_{i}': _backend().world.full(v) for i, v in enumerate(values)})
+        return Image(_bands=lambda: {'constant': _backend().world.full(values)})
+
+    @staticmethod
+    def pixelArea():
+        return Image(_bands=lambda: {'area': _backend().world.pixel_area.copy()})
+
+    @staticmethod
+    def cat(*images):
+        if len(images) == 1 and isinstance(images[0], (list, tuple)):
+            images = images[0]
+        images = [Image(i) for i in images]
+
+        def thunk():
+            bands = {}
+            for img in images:
+                bands.update(img._value())
+            return bands
+        return Image(_bands=thunk, _props=images[0]._props if images else {})
+
+    def _band_list(self):
+        return list(self._value().items())
+
+    # -----------------------------
+    # Bandes
+    # -----------------------------
+    def bandNames(self):
+        return EEList(_Computed(lambda: list(self._value().keys())))
+
+    def select(self, selectors, names=None, *more):
+        if isinstance(selectors, str) and (names is None or isinstance(names, str)):
+            wanted = [selectors] + ([names] if isinstance(names, str) else []) + list(more)
+            new_names = None
+        else:
+            wanted = list(_val(selectors))
+            new_names = list(_val(names)) if names is not None else None
+
+        def fn(bands):
+            out = {}
+            for i, name in enumerate(wanted):
+                if isinstance(name, int):
+                    name = list(bands.keys())[name]
+                if name not in bands:
+                    raise EEException(f"Image.select: bande absente '{name}' (bandes : {list(bands)})")
+                out[new_names[i] if new_names else name] = bands[name]
+            return out
+        return self._derive(fn)
+
+    def rename(self, *names):
+        if len(names) == 1 and isinstance(names[0], (list, tuple)):
+            names = names[0]
+        names = list(_val(list(names)))
+
+        def fn(bands):
+            if len(names) != len(bands):
+                raise EEException(f"Image.rename: {len(names)} noms pour {len(bands)} bandes")
+            return dict(zip(names, bands.values()))
+        return self._derive(fn)
+
+    def addBands(self, srcImg, names=None, overwrite=False):
+        sources = srcImg if isinstance(srcImg, (list, tuple)) else [srcImg]
+        sources = [Image(s) for s in sources]
+
+        def fn(bands):
+            out = dict(bands)
+            for src in sources:
+                for name, arr in src._value().items():
+                    if names is None or name in names:
+                        out[name] = arr
+            return out
+        return self._derive(fn)
+
+    # -----------------------------
+    # Métadonnées
+    # -----------------------------
+    def get(self, prop):
+        return _wrap(_Computed(lambda: self._props.get(_val(prop))))
+
+    def set(self, *args):
+        props = dict(self._props)
+        if len(args) == 1 and isinstance(args[0], (dict, Dictionary)):
+            props.update(_val(args[0]) if isinstance(args[0], Dictionary) else args[0])
+        else:
+            props.update(dict(zip(args[::2], args[1::2])))
+        return Image(_bands=self._value, _props=props)
+
+    def copyProperties(self, source=None, properties=None, exclude=None):
+        props = dict(getattr(source, '_props', {}))
+        if properties:
+            props = {k: v for k, v in props.items() if k in properties}
+        return Image(_bands=self._value, _props={**props, **self._props})
+
+    def date(self):
+        return Date(self._props.get('system:time_start'))
+
+    def id(self):
+        return String(self._props.get('system:id'))
+
+    # -----------------------------
+    # Arithmétique et logique
+    # -----------------------------
+    def _binary(self, other, op, compare=False):
+        def fn(bands):
+            if isinstance(other, Image):
+                right = list(other._value().values())
+            else:
+                right = [float(_val(other))]
+            left = list(bands.items())
+            if len(right) == 1:
+                pairs = [(name, arr, right[0]) for name, arr in left]
+            elif len(left) == 1:
+                other_names = list(other._value().keys())
+                pairs = [(other_names[i], left[0][1], r) for i, r in enumerate(right)]
+            else:
+                pairs = [(name, arr, r) for (name, arr), r in zip(left, right)]
+            out = {}
+            for name, a, b in pairs:
+                b = np.broadcast_to(b, a.shape) if np.isscalar(b) else b
+                if compare:
+                    out[name] = _nan_cmp(a, b, op)
+                else:
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        out[name] = op(a, b).astype(float)
+            return out
+        return self._derive(fn)
+
+    def add(self, o): return self._binary(o, np.add)
+    def subtract(self, o): return self._binary(o, np.subtract)
+    def multiply(self, o): return self._binary(o, np.multiply)
+    def divide(self, o): return self._binary(o, np.divide)
+    def pow(self, o): return self._binary(o, np.power)
+    def min(self, o): return self._binary(o, np.fmin)
+    def max(self, o): return self._binary(o, np.fmax)
+    def gt(self, o): return self._binary(o, np.greater, True)
+    def gte(self, o): return self._binary(o, np.greater_equal, True)
+    def lt(self, o): return self._binary(o, np.less, True)
+    def lte(self, o): return self._binary(o, np.less_equal, True)
+    def eq(self, o): return self._binary(o, np.equal, True)
+    def neq(self, o): return self._binary(o, np.not_equal, True)
+    def And(self, o): return self._binary(o, lambda a, b: (a != 0) & (b != 0), True)
+    def Or(self, o): return self._binary(o, lambda a, b: (a != 0) | (b != 0), True)
+
+    def Not(self):
+        return self._derive(lambda bands: {n: np.where(np.isnan(a), np.nan, (a == 0).astype(float)) for n, a in bands.items()})
+
+    def abs(self):
+        return self._derive(lambda bands: {n: np.abs(a) for n, a in bands.items()})
+
+    def log10(self):
+        def fn(bands):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return {n: np.where(a > 0, np.log10(a), np.nan) for n, a in bands.items()}
+        return self._derive(fn)
+
+    def bitwiseAnd(self, value):
+        def fn(bands):
+            out = {}
+            for n, a in bands.items():
+                valid = ~np.isnan(a)
+                res = np.full(a.shape, np.nan)
+                res[valid] = np.bitwise_and(a[valid].astype(np.int64), int(_val(value)))
+                out[n] = res
+            return out
+        return self._derive(fn)
+
+    def float(self): return self._derive(lambda bands: bands)
+    toFloat = float
+    double = float
+    toDouble = float
+
+    def int(self):
+        return self._derive(lambda bands: {n: np.where(np.isnan(a), np.nan, np.trunc(a)) for n, a in bands.items()})
+    toInt = int
+
+    def unitScale(self, low, high):
+        lo, hi = _val(low), _val(high)
+        return self._derive(lambda bands: {n: (a - lo) / (hi - lo) for n, a in bands.items()})
+
+    def normalizedDifference(self, bandNames=None):
+        def fn(bands):
+            names = bandNames or list(bands.keys())[:2]
+            a, b = bands[names[0]], bands[names[1]]
+            total = a + b
+            with np.errstate(divide='ignore', invalid='ignore'):
+                nd = (a - b) / total
+            nd[(a < 0) | (b < 0) | (total == 0) | np.isnan(a) | np.isnan(b)] = np.nan
+            return {'nd': nd}
+        return self._derive(fn)
+
+    def where(self, test, value):
+        def fn(bands):
+            test_arr = list(Image(test)._value().values())[0]
+            if isinstance(value, Image):
+                value_arr = list(value._value().values())[0]
+            else:
+                value_arr = None
+            out = {}
+            for n, a in bands.items():
+                v = value_arr if value_arr is not None else np.full(a.shape, float(_val(value)))
+                cond = ~np.isnan(test_arr) & (np.nan_to_num(test_arr) != 0) & ~np.isnan(v) & ~np.isnan(a)
+                res = a.copy()
+                res[cond] = v[cond]
+                out[n] = res
+            return out
+        return self._derive(fn)
+
+    def paint(self, featureCollection, color=0, width=None):
+        """Peint chaque feature avec une valeur constante ou une propriété numérique."""
+        def fn(bands):
+            out = {}
+            for n, a in bands.items():
+                res = a.copy()
+                for feature in FeatureCollection(featureCollection)._elements():
+                    value = _py(feature._props.get(color)) if isinstance(color, str) else _val(color)
+                    res[feature.geometry()._mask()] = np.nan if value is None else float(value)
+                out[n] = res
+            return out
+        return self._derive(fn)
+
+    # -----------------------------
+    # Masques
+    # -----------------------------
+    def updateMask(self, mask):
+        def fn(bands):
+            m = list(Image(mask)._value().values())[0]
+            invalid = np.isnan(m) | (m == 0)
+            out = {}
+            for n, a in bands.items():
+                res = a.copy()
+                res[invalid] = np.nan
+                out[n] = res
+            return out
+        return self._derive(fn)
+
+    def mask(self):
+        return self._derive(lambda bands: {n: (~np.isnan(a)).astype(float) for n, a in bands.items()})
+
+    def unmask(self, value=0, sameFootprint=True):
+        v = float(_val(value))
+        return self._derive(lambda bands: {n: np.where(np.isnan(a), v, a) for n, a in bands.items()})
+
+    def selfMask(self):
+        return self.updateMask(self)
+
+    def clip(self, geometry):
+        def fn(bands):
+            m = _as_mask(geometry)
+            return {n: np.where(m, a, np.nan) for n, a in bands.items()}
+        return self._derive(fn)
+
+    clipToCollection = clip
+
+    # -----------------------------
+    # Voisinage (filtres focaux)
+    # -----------------------------
+    def _focal(self, radius, units, reducer):
+        def fn(bands):
+            r = _backend().world.radius_in_pixels(_val(radius), units)
+            out = {}
+            for n, a in bands.items():
+                padded = np.pad(a, r, mode='constant', constant_values=np.nan)
+                windows = np.lib.stride_tricks.sliding_window_view(padded, (2 * r + 1, 2 * r + 1))
+                with np.errstate(all='ignore'):
+                    import warnings
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore', RuntimeWarning)
+                        res = reducer(windows, axis=(-2, -1))
+                res[np.isnan(a)] = np.nan
+                out[n] = res
+            return out
+        return self._derive(fn)
+
+    def focal_mean(self, radius=1, kernelType='circle', units='pixels', iterations=1, kernel=None):
+        return self._focal(radius, units, np.nanmean)
+
+    def focal_median(self, radius=1, kernelType='circle', units='pixels', iterations=1, kernel=None):
+        return self._focal(radius, units, np.nanmedian)
+
+    # -----------------------------
+    # Réductions
+    # -----------------------------
+    def reduceRegion(self, reducer, geometry=None, scale=None, crs=None, crsTransform=None,
+                     bestEffort=False, maxPixels=None, tileScale=1):
+        def thunk():
+            region = _as_mask(geometry)
+            bands = self._value()
+            if reducer._inputs == 2:
+                (nx, x), (ny, y) = list(bands.items())[:2]
+                valid = region & ~np.isnan(x) & ~np.isnan(y)
+                return reducer._apply(x[valid], y[valid])
+            out = {}
+            for name, arr in bands.items():
+                values = arr[region & ~np.isnan(arr)]
+                out.update(reducer._keys(name, reducer._apply(values)))
+            return out
+        return Dictionary(_Computed(thunk))
+
+    def reduceRegions(self, collection, reducer, scale=None, crs=None, crsTransform=None, tileScale=1):
+        collection = FeatureCollection(collection)
+
+        def reduce_feature(feature):
+            stats = self.reduceRegion(reducer, feature)
+            return feature.set(stats)
+        return collection.map(reduce_feature)
+
+    # -----------------------------
+    # Visualisation
+    # -----------------------------
+    def visualize(self, bands=None, gain=None, bias=None, min=None, max=None, gamma=None,
+                  opacity=None, palette=None, forceRgbOutput=False):
+        def fn(source):
+            names = bands or list(source.keys())[:1]
+            if isinstance(names, str):
+                names = [names]
+            arr = source[names[0]]
+            lo = 0.0 if min is None else float(min)
+            hi = 1.0 if max is None else float(max)
+            norm = np.clip((arr - lo) / ((hi - lo) or 1.0), 0, 1)
+            grey = np.where(np.isnan(norm), np.nan, norm * 255)
+            return {'vis-red': grey, 'vis-green': grey, 'vis-blue': grey}
+        return self._derive(fn)
+
+    def getMapId(self, vis_params=None):
+        backend = _backend()
+
+        def payload():
+            map_id = hashlib.sha1(json.dumps(
+                [sorted(self._value().keys()), vis_params], sort_keys=True, default=str
+            ).encode()).hexdigest()[:20]
+            backend._maps[map_id] = (self, dict(vis_params or {}))
+            return {
+                'mapid': map_id,
+                'token': '',
+                'tile_fetcher': _TileFetcher(f"{backend.tile_url}/{map_id}/tiles/{{z}}/{{x}}/{{y}}"),
+                'image': self,
+            }
+        return backend._round_trip('getMapId', 'Image.getMapId', payload)
+
+    def getThumbURL(self, params=None):
+        backend = _backend()
+
+        def payload():
+            thumb_id = backend._register_thumbnail('thumb', self, params)
+            return f"{backend.tile_url}/thumb/{thumb_id}.png"
+        return backend._round_trip('getThumbURL', 'Image.getThumbURL', payload)
+
+    def _info(self):
+        return {
+            'type': 'Image',
+            'bands': [{'id': n, 'data_type': {'type': 'PixelType', 'precision': 'double'}} for n in self._value()],
+            'properties': _py(self._props),
+        }
+
+
+class _TileFetcher:
+    def __init__(self, url_format: str) -> None:
+        self.url_format = url_format
+
+
+# =============================================
+# === COLLECTIONS ===
+# =============================================
+
+class _Collection(_Computed):
+    """Base commune : liste paresseuse d'éléments (images ou features)."""
+
+    _element = None
+
+    def __init__(self, elements: Callable[[], list]) -> None:
+        super().__init__(elements)
+
+    def _elements(self) -> list:
+        return self._value()
+
+    def _new(self, elements: Callable[[], list]):
+        return type(self)(_elements=elements)
+
+    def filter(self, flt: Filter):
+        return self._new(lambda: [e for e in self._elements() if flt._test(e._props)])
+
+    def filterDate(self, start, end=None):
+        return self.filter(Filter.date(start, end))
+
+    def filterBounds(self, geometry):
+        return self._new(self._elements)
+
+    def map(self, fn):
+        return self._new(lambda: [fn(e) for e in self._elements()])
+
+    def size(self):
+        return Number(_Computed(lambda: len(self._elements())))
+
+    def first(self):
+        first = lambda: self._elements()[0]
+        return self._element(_Computed(lambda: first()))
+
+    def limit(self, maximum, prop=None, ascending=True):
+        col = self.sort(prop, ascending) if prop else self
+        return col._new(lambda: col._elements()[:int(_val(maximum))])
+
+    def sort(self, prop, ascending=True):
+        def thunk():
+            elements = self._elements()
+            return sorted(elements, key=lambda e: _py(e._props.get(prop)) or 0, reverse=not ascending)
+        return self._new(thunk)
+
+    def merge(self, other):
+        return self._new(lambda: self._elements() + other._elements())
+
+    def toList(self, count, offset=0):
+        return EEList(_Computed(lambda: self._elements()[int(_val(offset)):int(_val(offset)) + int(_val(count))]))
+
+    def aggregate_array(self, prop):
+        return EEList(_Computed(lambda: [
+            _py(e._props.get(prop)) for e in self._elements() if e._props.get(prop) is not None
+        ]))
+
+    def _aggregate(self, prop, fn):
+        return Number(_Computed(lambda: fn([_py(e._props.get(prop)) for e in self._elements()])))
+
+    def aggregate_mean(self, prop): return self._aggregate(prop, lambda v: float(np.mean(v)) if v else None)
+    def aggregate_sum(self, prop): return self._aggregate(prop, lambda v: float(np.sum(v)))
+    def aggregate_max(self, prop): return self._aggregate(prop, lambda v: max(v) if v else None)
+    def aggregate_min(self, prop): return self._aggregate(prop, lambda v: min(v) if v else None)
+
+    def reduceColumns(self, reducer, selectors, weightSelectors=None):
+        def thunk():
+            rows = [[_py(e._props.get(s)) for s in selectors] for e in self._elements()]
+            rows = [r for r in rows if all(v is not None for v in r)]
+            columns = np.array(rows, dtype=float).T if rows else np.empty((len(selectors), 0))
+            return reducer._apply(*columns[:max(reducer._inputs, 1)])
+        return Dictionary(_Computed(thunk))
+
+
+class ImageCollection(_Collection):
+    def __init__(self, args=None, _elements=None) -> None:
+        if _elements is not None:
+            super().__init__(_elements)
+        elif isinstance(args, str):
+            dataset = args
+            super().__init__(lambda: _backend().world.catalog(dataset))
+            self._dataset = dataset
+        elif isinstance(args, (list, tuple)):
+            super().__init__(lambda: [Image(i) for i in args])
+        elif isinstance(args, EEList):
+            super().__init__(lambda: [Image(i) for i in args._value()])
+        elif isinstance(args, Image):
+            super().__init__(lambda: [args])
+        elif isinstance(args, _Collection):
+            super().__init__(args._elements)
+        else:
+            raise EEException(f"ImageCollection: argument non supporté {args!r}")
+
+    @staticmethod
+    def fromImages(images):
+        return ImageCollection(images)
+
+    def filterDate(self, start, end=None):
+        # Les catalogues synthétiques ne génèrent que la fenêtre demandée
+        dataset = getattr(self, '_dataset', None)
+        if dataset is not None:
+            col = ImageCollection(_elements=lambda: _backend().world.catalog(dataset, start, end))
+            col._dataset = None
+            return col
+        return super().filterDate(start, end)
+
+    def select(self, selectors, names=None):
+        return self.map(lambda img: img.select(selectors, names))
+
+    def _stack(self, fn, suffix=None):
+        def thunk():
+            images = [img._value() for img in self._elements()]
+            if not images:
+                return {}
+            out = {}
+            for name in images[0]:
+                layers = np.stack([b[name] for b in images if name in b])
+                import warnings
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    out[f"{name}_{suffix}" if suffix else name] = fn(layers)
+            return out
+        return Image(_bands=thunk)
+
+    def median(self): return self._stack(lambda s: np.nanmedian(s, axis=0))
+    def mean(self): return self._stack(lambda s: np.nanmean(s, axis=0))
+    def max(self): return self._stack(lambda s: np.nanmax(s, axis=0))
+    def min(self): return self._stack(lambda s: np.nanmin(s, axis=0))
+
+    def mode(self):
+        def most_frequent(stack):
+            values = np.round(stack)
+            labels = np.unique(values[~np.isnan(values)])
+            if labels.size == 0:
+                return np.full(stack.shape[1:], np.nan)
+            counts = np.stack([(values == label).sum(axis=0) for label in labels])
+            return np.where(counts.max(axis=0) > 0, labels[counts.argmax(axis=0)], np.nan)
+        return self._stack(most_frequent)
+
+    def sum(self): return self._stack(lambda s: np.where(np.isnan(s).all(axis=0), np.nan, np.nansum(s, axis=0)))
+    def count(self): return self._stack(lambda s: (~np.isnan(s)).sum(axis=0).astype(float))
+
+    def mosaic(self):
+        def first_valid(stack):
+            out = np.full(stack.shape[1:], np.nan)
+            for layer in stack[::-1]:
+                out = np.where(np.isnan(layer), out, layer)
+            return out
+        return self._stack(first_valid)
+
+    def qualityMosaic(self, qualityBand):
+        def thunk():
+            images = [img._value() for img in self._elements()]
+            if not images:
+                return {}
+            quality = np.stack([b[qualityBand] for b in images])
+            best = np.nanargmax(np.where(np.isnan(quality), -np.inf, quality), axis=0)
+            out = {}
+            for name in images[0]:
+                stack = np.stack([b[name] for b in images])
+                out[name] = np.take_along_axis(stack, best[None], axis=0)[0]
+            return out
+        return Image(_bands=thunk)
+
+    def reduce(self, reducer, parallelScale=1):
+        def thunk():
+            images = [img._value() for img in self._elements()]
+            if not images:
+                return {}
+            world = _backend().world
+            names = list(images[0].keys())
+            stacks = [np.stack([b[n] for b in images]) for n in names]
+            out = {}
+            if reducer._inputs == 2:
+                x, y = stacks[0], stacks[1]
+                results = {o: np.full(world.shape, np.nan) for o in reducer._outputs}
+                for idx in np.ndindex(world.shape):
+                    xs, ys = x[(slice(None),) + idx], y[(slice(None),) + idx]
+                    valid = ~np.isnan(xs) & ~np.isnan(ys)
+                    if valid.sum() >= 2:
+                        for k, v in reducer._apply(xs[valid], ys[valid]).items():
+                            results[k][idx] = np.nan if v is None else v
+                return results
+            for name, stack in zip(names, stacks):
+                results = {o: np.full(world.shape, np.nan) for o in reducer._outputs}
+                for idx in np.ndindex(world.shape):
+                    values = stack[(slice(None),) + idx]
+                    values = values[~np.isnan(values)]
+                    for k, v in reducer._apply(values).items():
+                        results[k][idx] = np.nan if v is None else v
+                for k, arr in results.items():
+                    out[f"{name}_{k}"] = arr
+            return out
+        return Image(_bands=thunk)
+
+    def getVideoThumbURL(self, params=None):
+        backend = _backend()
+
+        def payload():
+            thumb_id = backend._register_thumbnail('video', self, params)
+            return f"{backend.tile_url}/video/{thumb_id}.gif"
+        return backend._round_trip('getVideoThumbURL', 'ImageCollection.getVideoThumbURL', payload)
+
+    def getFilmstripThumbURL(self, params=None):
+        backend = _backend()
+
+        def payload():
+            thumb_id = backend._register_thumbnail('filmstrip', self, params)
+            return f"{backend.tile_url}/filmstrip/{thumb_id}.png"
+        return backend._round_trip('getFilmstripThumbURL', 'ImageCollection.getFilmstripThumbURL', payload)
+
+    def _info(self):
+        return {'type': 'ImageCollection', 'features': [img._info() for img in self._elements()]}
+
+
+ImageCollection._element = Image
+
+
+class Feature(_Computed):
+    def __init__(self, geometry=None, properties=None) -> None:
+        if isinstance(geometry, Feature):
+            super().__init__(geometry._value)
+            self._props = geometry._props
+            self._geometry = geometry._geometry
+            return
+        if isinstance(geometry, _Computed) and not isinstance(geometry, Geometry):
+            # ee.Feature(computed) : élément extrait d'une collection
+            inner = geometry
+            super().__init__(lambda: inner._value())
+            self._props = _LazyProps(lambda: inner._value()._props)
+            self._geometry = None
+            self._inner = inner
+            return
+        if isinstance(properties, Dictionary):
+            props = _LazyProps(lambda: dict(properties._value()))
+        else:
+            props = dict(properties or {})
+        super().__init__(lambda: self)
+        self._props = props
+        self._geometry = geometry
+
+    def get(self, prop):
+        return _wrap(_Computed(lambda: _val(self._props.get(_val(prop)))))
+
+    def set(self, *args):
+        if len(args) == 1 and isinstance(args[0], Dictionary):
+            extra = args[0]
+            new = Feature(self._geometry, _LazyProps(lambda: {**dict(self._props), **extra._value()}))
+        elif len(args) == 1:
+            new = Feature(self._geometry, {**dict(self._props), **args[0]})
+        else:
+            new = Feature(self._geometry, {**dict(self._props), **dict(zip(args[::2], args[1::2]))})
+        return new
+
+    def geometry(self, maxError=None, proj=None):
+        if getattr(self, '_inner', None) is not None:
+            return self._inner._value().geometry()
+        if self._geometry is None:
+            return Geometry(_mask=lambda: np.zeros(_backend().world.shape, dtype=bool))
+        return self._geometry if isinstance(self._geometry, Geometry) else Geometry(self._geometry)
+
+    def _info(self):
+        geom = self._geometry
+        return {
+            'type': 'Feature',
+            'geometry': None if geom is None else _py(self.geometry()),
+            'properties': {k: _py(v) for k, v in dict(self._props).items()},
+        }
+
+
+class _LazyProps(dict):
+    """Dictionnaire de propriétés évalué au premier accès."""
+
+    def __init__(self, thunk) -> None:
+        super().__init__()
+        self._thunk = thunk
+        self._loaded = False
+
+    def _load(self):
+        if not self._loaded:
+            self.update(self._thunk())
+            self._loaded = True
+
+    def get(self, key, default=None):
+        self._load()
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self._load()
+        return super().__getitem__(key)
+
+    def __iter__(self):
+        self._load()
+        return super().__iter__()
+
+    def keys(self):
+        self._load()
+        return super().keys()
+
+    def items(self):
+        self._load()
+        return super().items()
+
+    def __len__(self):
+        self._load()
+        return super().__len__()
+
+
+class FeatureCollection(_Collection):
+    def __init__(self, args=None, _elements=None) -> None:
+        if _elements is not None:
+            super().__init__(_elements)
+        elif isinstance(args, str):
+            if args != DEPARTMENT_DATASET_NAME:
+                raise EEException(f"FeatureCollection inconnue : {args}")
+            super().__init__(lambda: _backend().world.departments())
+        elif isinstance(args, (list, tuple)):
+            super().__init__(lambda: [Feature(f) if not isinstance(f, Feature) else f for f in args])
+        elif isinstance(args, Feature):
+            super().__init__(lambda: [args])
+        elif isinstance(args, Geometry):
+            super().__init__(lambda: [Feature(args)])
+        elif isinstance(args, _Collection):
+            super().__init__(args._elements)
+        else:
+            raise EEException(f"FeatureCollection: argument non supporté {args!r}")
+
+    def geometry(self, maxError=None):
+        def thunk():
+            mask = np.zeros(_backend().world.shape, dtype=bool)
+            for f in self._elements():
+                mask |= f.geometry()._mask()
+            return mask
+        return Geometry(_mask=thunk)
+
+    def union(self, maxError=None):
+        return FeatureCollection([Feature(self.geometry())])
+
+    def _info(self):
+        return {'type': 'FeatureCollection', 'features': [f._info() for f in self._elements()]}
+
+
+FeatureCollection._element = Feature
+
+
+class Algorithms:
+    @staticmethod
+    def If(condition, trueCase, falseCase):
+        def thunk():
+            cond = _val(condition)
+            return _val(trueCase) if cond else _val(falseCase)
+        return _wrap(_Computed(thunk))
+
+    @staticmethod
+    def IsEqual(left, right):
+        return Number(_Computed(lambda: int(_val(left) == _val(right))))
+
+
+# =============================================
+# === MONDE SYNTHÉTIQUE ===
+# =============================================
+
+_DATASET_CADENCE = {
+    SENTINEL2_DATASET_NAME: 5,
+    SENTINEL1_DATASET_NAME: 6,
+    FIRES_DATASET_NAME: 1,
+    TEMPERATURE_DATASET_NAME: 8,
+    FOREST_DATASET_NAME: 5,
+}
+
+
+TILE_SIZE = 256
+
+
+def _palette_rgb(palette) -> np.ndarray:
+    from PIL import ImageColor
+    colors = []
+    for color in palette or ['000000', 'ffffff']:
+        color = str(color)
+        if re.fullmatch(r'[0-9a-fA-F]{6}', color):
+            color = '#' + color
+        colors.append(ImageColor.getrgb(color)[:3])
+    return np.array(colors, dtype=np.float64)
+
+
+def _band_values(world: "SyntheticWorld", image: Image, vis: dict) -> np.ndarray:
+    """Grille de la bande visualisée (vis['bands'][0], sinon la première bande)."""
+    bands = image._value()
+    names = vis.get('bands') or list(bands)[:1]
+    if isinstance(names, str):
+        names = [names]
+    values = bands.get(names[0]) if names and names[0] in bands else next(iter(bands.values()), None)
+    if values is None:
+        values = world.full(np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+def _sample(world: "SyntheticWorld", grid: np.ndarray, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+    """Échantillonnage au plus proche de la grille aux centres de pixels (lats × lons) ; NaN hors grille."""
+    west, _, _, north = world.bbox
+    cols = np.floor((lons - west) / world.dlon).astype(int)
+    rows = np.floor((north - lats) / world.dlat).astype(int)
+    col_ok = (cols >= 0) & (cols < world.width)
+    row_ok = (rows >= 0) & (rows < world.height)
+    sampled = np.full((len(lats), len(lons)), np.nan)
+    sampled[np.ix_(row_ok, col_ok)] = grid[np.ix_(rows[row_ok], cols[col_ok])]
+    return sampled
+
+
+def _colorize(sampled: np.ndarray, vis: dict) -> np.ndarray:
+    """Palette de vis (interpolation linéaire entre min et max) ; pixels NaN transparents. Retourne RGBA uint8."""
+    lo = float(vis.get('min', 0.0))
+    hi = float(vis.get('max', 1.0))
+    palette = _palette_rgb(vis.get('palette'))
+    with np.errstate(invalid='ignore'):
+        t = np.clip((sampled - lo) / ((hi - lo) or 1.0), 0, 1)
+    position = np.nan_to_num(t) * (len(palette) - 1)
+    low = np.floor(position).astype(int)
+    high = np.minimum(low + 1, len(palette) - 1)
+    frac = (position - low)[..., None]
+    rgb = palette[low] * (1 - frac) + palette[high] * frac
+    alpha = np.where(np.isnan(sampled), 0, 255)[..., None]
+    return np.concatenate([rgb, alpha], axis=-1).astype(np.uint8)
+
+
+# Limite Earth Engine de la taille d'une requête de vignette (octets RGBA de toutes les images)
+THUMBNAIL_MAX_BYTES = 50331648
+
+
+def _render_thumbnail(world: "SyntheticWorld", kind: str, source, params: dict) -> bytes:
+    """Vignette PNG ('thumb'), bande verticale d'images PNG ('filmstrip') ou GIF animé ('video')."""
+    if kind == 'thumb':
+        return _png(_thumbnail_frame(world, source, params))
+    frames = [_thumbnail_frame(world, image, params) for image in source._elements()]
+    if not frames:
+        raise EEException("ImageCollection is empty.")
+    total = sum(frame.size for frame in frames)
+    if total > THUMBNAIL_MAX_BYTES:
+        raise EEException(f"Total request size ({total} bytes) must be less than or equal to {THUMBNAIL_MAX_BYTES} bytes.")
+    if kind == 'filmstrip':
+        return _png(np.concatenate(frames, axis=0))
+    import io
+    from PIL import Image as PILImage
+    images = [PILImage.fromarray(frame, 'RGBA').convert('RGB') for frame in frames]
+    buffer = io.BytesIO()
+    fps = float(params.get('framesPerSecond', 10))
+    images[0].save(buffer, format='GIF', save_all=True, append_images=images[1:],
+                   duration=int(1000 / fps), loop=0, optimize=False)
+    return buffer.getvalue()
+
+
+def _png(rgba: np.ndarray) -> bytes:
+    import io
+    from PIL import Image as PILImage
+    buffer = io.BytesIO()
+    PILImage.fromarray(rgba, 'RGBA').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _render_tile(world: "SyntheticWorld", image: Image, vis: dict, z: int, x: int, y: int) -> bytes:
+    """Rendu PNG (RGBA) d'une tuile z/x/y : pixels masqués ou hors grille transparents."""
+    # Coordonnées des centres de pixels de la tuile (Web Mercator -> lon/lat)
+    n = TILE_SIZE * 2 ** z
+    px = (x * TILE_SIZE + np.arange(TILE_SIZE) + 0.5) / n
+    py = (y * TILE_SIZE + np.arange(TILE_SIZE) + 0.5) / n
+    lons = px * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py))))
+    return _png(_colorize(_sample(world, _band_values(world, image, vis), lons, lats), vis))
+
+
+def _thumbnail_frame(world: "SyntheticWorld", image: Image, params: dict) -> np.ndarray:
+    """Vignette RGBA d'une image sur params['region'] (bbox), plus grand côté = params['dimensions']."""
+    region = params.get('region')
+    west, south, east, north = world.bbox_of(_as_mask(region)) if region is not None else world.bbox
+    dimensions = params.get('dimensions', 256)
+    if isinstance(dimensions, str) and 'x' in dimensions:
+        width, height = (int(v) for v in dimensions.split('x'))
+    else:
+        longest = int(dimensions)
+        ratio = (north - south) / ((east - west) or 1.0)
+        width, height = (longest, max(1, round(longest * ratio))) if ratio <= 1 else (max(1, round(longest / ratio)), longest)
+    lons = west + (np.arange(width) + 0.5) * (east - west) / width
+    lats = north - (np.arange(height) + 0.5) * (north - south) / height
+    sampled = _sample(world, _band_values(world, image, params), lons, lats)
+    if region is not None:
+        # Pixels hors de la région (image découpée) : transparents
+        inside = _sample(world, _as_mask(region).astype(np.float64), lons, lats)
+        sampled[~(inside > 0)] = np.nan
+    return _colorize(sampled, params)
+
+
+class SyntheticWorld:
+    """
+    Grille raster couvrant le Sénégal, découpée en 45 départements (blocs
+    9 × 5), avec des champs statiques (plaines inondables, forêt, zone urbaine)
+    et une saisonnalité (saison des pluies juillet-octobre).
+    """
+
+    def __init__(self, width: int = 72, height: int = 40, bbox=(-17.6, 12.3, -11.3, 16.7), seed: int = 7) -> None:
+        self.width, self.height = width, height
+        self.shape = (height, width)
+        self.bbox = bbox
+        self.seed = seed
+        w, s, e, n = bbox
+        self.dlon = (e - w) / width
+        self.dlat = (n - s) / height
+        self.lons = w + (np.arange(width) + 0.5) * self.dlon
+        self.lats = n - (np.arange(height) + 0.5) * self.dlat
+        self.lon_grid, self.lat_grid = np.meshgrid(self.lons, self.lats)
+
+        # Surface des pixels (m²) sur l'ellipsoïde sphérique
+        r = 6371008.8
+        lat_top = np.radians(self.lat_grid + self.dlat / 2)
+        lat_bottom = np.radians(self.lat_grid - self.dlat / 2)
+        self.pixel_area = (r ** 2) * np.radians(self.dlon) * np.abs(np.sin(lat_top) - np.sin(lat_bottom))
+
+        # Champs statiques
+        lat, lon = self.lat_grid, self.lon_grid
+        self.floodplain = np.clip(
+            np.exp(-((lat - 12.6) / 0.18) ** 2) * (lon < -14.5)
+            + np.exp(-((lat - 16.45) / 0.15) ** 2) * (lon < -12.0)
+            + np.exp(-((lon - w) / 0.25) ** 2),
+            0, 1)
+        self.permanent_water = (self.floodplain > 0.85).astype(float)
+        self.forest = np.clip((14.2 - lat) / 1.9, 0, 1) ** 1.3
+        self.urban = np.exp(-(((lon + 17.35) / 0.25) ** 2 + ((lat - 14.72) / 0.2) ** 2))
+
+        self._departments = self._build_departments()
+        self._cache: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Utilitaires de grille
+    # -----------------------------
+    def full(self, value) -> np.ndarray:
+        return np.full(self.shape, np.nan if value is None else float(value))
+
+    def radius_in_pixels(self, radius, units='pixels') -> int:
+        if units == 'meters':
+            # Noyau plus petit qu'un pixel de la grille : sans effet
+            return max(0, int(round(radius / (self.dlat * 111320))))
+        return max(1, int(round(radius)))
+
+    def mask_from_bbox(self, bbox) -> np.ndarray:
+        w, s, e, n = bbox
+        return (self.lon_grid >= w) & (self.lon_grid <= e) & (self.lat_grid >= s) & (self.lat_grid <= n)
+
+    def mask_from_geojson(self, geojson) -> np.ndarray:
+        if geojson is None:
+            return np.ones(self.shape, dtype=bool)
+        if geojson.get('type') == 'Point':
+            lon, lat = geojson['coordinates']
+            mask = np.zeros(self.shape, dtype=bool)
+            col = int(np.clip((lon - self.bbox[0]) / self.dlon, 0, self.width - 1))
+            row = int(np.clip((self.bbox[3] - lat) / self.dlat, 0, self.height - 1))
+            mask[row, col] = True
+            return mask
+        ring = geojson['coordinates'][0]
+        lons = [p[0] for p in ring]
+        lats = [p[1] for p in ring]
+        return self.mask_from_bbox((min(lons), min(lats), max(lons), max(lats)))
+
+    def bbox_of(self, mask: np.ndarray):
+        if not mask.any():
+            return (0.0, 0.0, 0.0, 0.0)
+        rows, cols = np.where(mask)
+        return (
+            float(self.lons[cols.min()] - self.dlon / 2),
+            float(self.lats[rows.max()] - self.dlat / 2),
+            float(self.lons[cols.max()] + self.dlon / 2),
+            float(self.lats[rows.min()] + self.dlat / 2),
+        )
+
+    def centroid_of(self, mask: np.ndarray):
+        if not mask.any():
+            return (0.0, 0.0)
+        return (float(self.lon_grid[mask].mean()), float(self.lat_grid[mask].mean()))
+
+    # -----------------------------
+    # Départements
+    # -----------------------------
+    def _build_departments(self):
+        cols, rows = 9, 5
+        features = []
+        for i, name in enumerate(SYNTHETIC_DEPARTMENTS):
+            r, c = divmod(i, cols)
+            r0, r1 = r * self.height // rows, (r + 1) * self.height // rows
+            c0, c1 = c * self.width // cols, (c + 1) * self.width // cols
+            mask = np.zeros(self.shape, dtype=bool)
+            mask[r0:r1, c0:c1] = True
+            features.append((name, mask))
+        return features
+
+    def departments(self) -> list:
+        return [
+            Feature(Geometry(_mask=mask), {'shapeName': name, 'shapeGroup': COUNTRY_CODE, 'shapeType': 'ADM2'})
+            for name, mask in self._departments
+        ]
+
+    # -----------------------------
+    # Catalogue de collections
+    # -----------------------------
+    def catalog(self, dataset: str, start=None, end=None) -> list:
+        if dataset not in _DATASET_CADENCE:
+            raise EEException(f"ImageCollection inconnue : {dataset}")
+        start_ms = _to_millis(start) if start is not None else _to_millis('2017-01-01')
+        end_ms = _to_millis(end) if end is not None else int(time.time() * 1000)
+        key = (dataset, start_ms, end_ms)
+        with self._lock:
+            if key in self._cache:
+                return list(self._cache[key])
+        cadence = _DATASET_CADENCE[dataset] * _DAY_MS
+        first = -(-start_ms // cadence) * cadence
+        images = [self._image(dataset, t) for t in range(first, end_ms, cadence)]
+        with self._lock:
+            self._cache[key] = images
+        return list(images)
+
+    def _rng(self, dataset: str, t: int):
+        digest = hashlib.sha1(f"{self.seed}|{dataset}|{t}".encode()).digest()
+        return np.random.default_rng(int.from_bytes(digest[:8], 'little'))
+
+    @staticmethod
+    def _rain(t: int) -> float:
+        doy = (_EPOCH + timedelta(milliseconds=t)).timetuple().tm_yday
+        return max(0.0, math.sin(math.pi * (doy - 180) / 120)) if 180 <= doy <= 300 else 0.0
+
+    def _image(self, dataset: str, t: int) -> Image:
+        dt = _EPOCH + timedelta(milliseconds=t)
+        stamp = dt.strftime('%Y%m%dT%H%M%S')
+        rain = self._rain(t)
+        rng = self._rng(dataset, t)
+        props = {'system:time_start': t, 'system:index': f"{stamp}_{stamp}_T28PCU"}
+        if dataset == SENTINEL2_DATASET_NAME:
+            props['CLOUDY_PIXEL_PERCENTAGE'] = float(np.clip(4 + 30 * rain + rng.normal(0, 8), 0, 100))
+            props['SPACECRAFT_NAME'] = 'Sentinel-2A'
+        elif dataset == SENTINEL1_DATASET_NAME:
+            props.update({'instrumentMode': 'IW', 'orbitProperties_pass': 'DESCENDING',
+                          'transmitterReceiverPolarisation': ['VV', 'VH']})
+        seed_props = dict(props)
+        return Image(_bands=lambda: self._bands(dataset, t, seed_props), _props=props)
+
+    def water_fraction(self, t: int) -> np.ndarray:
+        return np.clip(self.permanent_water + self.floodplain * 0.7 * self._rain(t), 0, 1)
+
+    def _bands(self, dataset: str, t: int, props: dict) -> dict:
+        rng = self._rng(dataset + '|bands', t)
+        rain = self._rain(t)
+        water = self.water_fraction(t)
+        noise = lambda scale: rng.normal(0, scale, self.shape)
+        if dataset == SENTINEL2_DATASET_NAME:
+            veg = np.clip(self.forest * 0.7 + 0.3 * rain * (1 - self.urban), 0, 1)
+            land = {
+                'B2': 0.06 + 0.01 * (1 - veg), 'B3': 0.07 + 0.02 * (1 - veg), 'B4': 0.03 + 0.09 * (1 - 0.6 * veg),
+                'B8': 0.20 + 0.22 * veg, 'B8A': 0.21 + 0.21 * veg,
+                'B11': 0.25 - 0.08 * veg + 0.10 * self.urban, 'B12': 0.18 - 0.05 * veg + 0.08 * self.urban,
+            }
+            # Eau de crue turbide : MNDWI élevé, WEI > 0.3
+            wet = {'B2': 0.09, 'B3': 0.10, 'B4': 0.09, 'B8': 0.08, 'B8A': 0.07, 'B11': 0.01, 'B12': 0.005}
+            bands = {
+                name: np.clip((land[name] * (1 - water) + wet[name] * water + noise(0.004)) * 10000, 0, None)
+                for name in land
+            }
+            cloud = rng.random(self.shape) < props['CLOUDY_PIXEL_PERCENTAGE'] / 100
+            bands['QA60'] = np.where(cloud, float(1 << 10), 0.0)
+            return bands
+        if dataset == SENTINEL1_DATASET_NAME:
+            vv = -9.0 - 12.0 * water + noise(1.5)
+            vh = vv - 7.0 + noise(1.0)
+            return {'VV': vv, 'VH': vh, 'angle': self.full(38.0)}
+        if dataset == FIRES_DATASET_NAME:
+            dry = 1.0 - rain
+            fire = rng.random(self.shape) < 0.02 * dry * (1 - self.urban)
+            frp = np.where(fire, rng.gamma(2.0, 12.0, self.shape), np.nan)
+            bright = np.where(fire, 330 + rng.normal(0, 15, self.shape), np.nan)
+            return {'Bright_ti4': bright, 'frp': frp}
+        if dataset == TEMPERATURE_DATASET_NAME:
+            kelvin = 305 + 8 * (1 - rain) - 4 * self.forest + noise(1.0)
+            return {'LST_Day_1km': kelvin * 50}
+        if dataset == FOREST_DATASET_NAME:
+            probs = {
+                'water': water, 'trees': np.clip(self.forest + noise(0.03), 0, 1),
+                'grass': np.clip(0.3 * (1 - self.forest), 0, 1), 'flooded_vegetation': 0.2 * water * self.forest,
+                'crops': np.clip(0.25 * (1 - self.forest) * (1 - self.urban), 0, 1), 'shrub_and_scrub': 0.2 * (1 - self.forest),
+                'built': self.urban, 'bare': np.clip(0.15 * (1 - self.forest) - water, 0, 1), 'snow_and_ice': self.full(0.0),
+            }
+            total = sum(probs.values()) + 1e-9
+            bands = {name: np.asarray(p / total, dtype=float) for name, p in probs.items()}
+            names = [c.replace('probability_', '') for c in CLASS_NAMES]
+            bands['label'] = np.argmax(np.stack([bands[n] for n in names]), axis=0).astype(float)
+            return bands
+        raise EEException(f"Dataset inconnu : {dataset}")
+
+
+# =============================================
+# === BACKEND ===
+# =============================================
+
+class _Data:
+    def __init__(self, backend: "FakeEarthEngine") -> None:
+        self._backend = backend
+
+    def getAssetRoots(self):
+        return self._backend._round_trip('getAssetRoots', 'data.getAssetRoots', lambda: [])
+
+
+class ServiceAccountCredentials:
+    def __init__(self, email=None, key_file=None, key_data=None) -> None:
+        self.email = email
+
+
+class FakeEarthEngine:
+    """
+    Backend local compatible avec `ee_backend.set_backend(...)`.
+
+    latency      : latence simulée (s) enregistrée pour chaque aller-retour
+    sleep        : si True, la latence est réellement attendue (time.sleep)
+    recorder     : RoundTripRecorder partagé (créé si absent)
+    world        : SyntheticWorld (grille et jeux de données synthétiques)
+    max_concurrent : au-delà de ce nombre de requêtes simultanées, lève
+                   « Too many concurrent aggregations » (quota Earth Engine)
+    """
+
+    __name__ = 'fake_ee'
+
+    EEException = EEException
+    Number = Number
+    String = String
+    List = EEList
+    Dictionary = Dictionary
+    Date = Date
+    Geometry = Geometry
+    Filter = Filter
+    Reducer = Reducer
+    Image = Image
+    ImageCollection = ImageCollection
+    Feature = Feature
+    FeatureCollection = FeatureCollection
+    Algorithms = Algorithms
+    ServiceAccountCredentials = ServiceAccountCredentials
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        sleep: bool = False,
+        recorder: Optional[RoundTripRecorder] = None,
+        world: Optional[SyntheticWorld] = None,
+        tile_url: str = 'https://fake-earthengine.local/v1/maps',
+        max_concurrent: Optional[int] = None,
+    ) -> None:
+        global _active
+        self.latency = latency
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.quota_errors = 0
+        self._flight_lock = threading.Lock()
+        self.sleep = sleep
+        self.recorder = recorder or RoundTripRecorder()
+        self.world = world or SyntheticWorld()
+        self.tile_url = tile_url
+        self._maps: Dict[str, tuple] = {}  # map_id -> (image, vis_params), pour fetch_tile
+        self._thumbnails: Dict[str, tuple] = {}  # thumb_id -> (type, image(s), params), pour fetch_thumbnail
+        self.data = _Data(self)
+        _active = self
+
+    def activate(self) -> "FakeEarthEngine":
+        """Rend ce backend actif pour l'évaluation des objets du module."""
+        global _active
+        _active = self
+        return self
+
+    # -----------------------------
+    # API module ee
+    # -----------------------------
+    def Initialize(self, credentials=None, project=None, **kwargs) -> None:
+        return None
+
+    def Authenticate(self, **kwargs) -> None:
+        return None
+
+    # -----------------------------
+    # Allers-retours simulés
+    # -----------------------------
+    def _round_trip(self, kind: str, label: str, payload: Callable[[], object]):
+        with self._flight_lock:
+            if self.max_concurrent is not None and self.in_flight >= self.max_concurrent:
+                self.quota_errors += 1
+                raise EEException("Too many concurrent aggregations.")
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            start = time.perf_counter()
+            result = payload()
+            if self.sleep and self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self._flight_lock:
+                self.in_flight -= 1
+        elapsed = time.perf_counter() - start + (0.0 if self.sleep else self.latency)
+        try:
+            if isinstance(result, bytes):
+                nbytes = len(result)
+            else:
+                nbytes = len(json.dumps(_py(result) if not isinstance(result, dict) or 'tile_fetcher' not in result
+                                        else {'mapid': result['mapid']}, default=str))
+        except (TypeError, ValueError):
+            nbytes = 0
+        self.recorder.record(kind, label, elapsed, nbytes)
+        return result
+
+    def fetch_tile(self, url_format: str, z: int, x: int, y: int) -> bytes:
+        """
+        Tuile PNG 256×256 (Web Mercator) d'une couche getMapId : échantillonnage
+        au plus proche de la grille synthétique, palette de vis_params.
+        """
+        match = re.search(r'/([0-9a-f]{20})/tiles/', url_format)
+        if not match or match.group(1) not in self._maps:
+            raise EEException("Map not found or expired.")
+        image, vis = self._maps[match.group(1)]
+
+        def payload():
+            return _render_tile(self.world, image, vis, z, x, y)
+        return self._round_trip('getTile', f"{z}/{x}/{y}", payload)
+
+    def _register_thumbnail(self, kind: str, source, params) -> str:
+        with self._flight_lock:
+            thumb_id = f"{len(self._thumbnails):08x}{id(source) & 0xffffffffffff:012x}"
+            self._thumbnails[thumb_id] = (kind, source, dict(params or {}))
+        return thumb_id
+
+    def fetch_thumbnail(self, url: str) -> bytes:
+        """Contenu d'une URL getThumbURL, getFilmstripThumbURL ou getVideoThumbURL."""
+        match = re.search(r'/([0-9a-f]{20})\.\w+$', url)
+        if not match or match.group(1) not in self._thumbnails:
+            raise EEException("Thumbnail not found or expired.")
+        kind, source, params = self._thumbnails[match.group(1)]
+
+        def payload():
+            return _render_thumbnail(self.world, kind, source, params)
+        return self._round_trip('getThumbnail', kind, payload)
+
+    def ee_to_df(self, collection):
+        """Équivalent local de geemap.ee_to_df : propriétés des features en DataFrame."""
+        import pandas as pd
+
+        def payload():
+            return [
+                {k: _py(v) for k, v in dict(f._props).items()}
+                for f in FeatureCollection(collection)._elements()
+            ]
+        rows = self._round_trip('ee_to_df', 'ee_to_df', payload)
+        return pd.DataFrame(rows)
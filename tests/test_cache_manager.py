@@ -0,0 +1,156 @@
+# tests/test_cache_manager.py
+"""
+CacheManager et cached_method sur un répertoire de cache temporaire
+(SEKHEM_CACHE_DIR) : la clé suit les attributs 'depends_on' et les
+arguments de l'appel, 'cache_if' empêche l'écriture, clear_context ne purge
+que le département + période demandés, et un calcul concurrent n'a lieu
+qu'une fois par clé.
+
+    python -m unittest tests.test_cache_manager
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from cache_manager import CacheManager, cached_method
+
+
+class Analyzer:
+    """Objet minimal exposant 'cache' et 'cache_context()' comme FloodMonitoringSystem."""
+
+    def __init__(self, cache, department='Bignona', begin='2024-01-01', end='2024-03-31'):
+        self.cache = cache
+        self.department = department
+        self.begin = begin
+        self.end = end
+        self.threshold = 0.3
+        self.calls = 0
+
+    def cache_context(self):
+        return self.department, self.begin, self.end, {'scale': 100}
+
+    @cached_method('stats', depends_on=('threshold',))
+    def stats(self, band='WEI'):
+        self.calls += 1
+        return {'band': band, 'threshold': self.threshold, 'call': self.calls}
+
+    @cached_method('fallback', cache_if=lambda value: value.get('source') != 'fallback')
+    def fallback(self):
+        self.calls += 1
+        return {'source': 'fallback', 'call': self.calls}
+
+
+class CacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = mock.patch.dict(os.environ, {'SEKHEM_CACHE_DIR': tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.cache = CacheManager()
+        self.addCleanup(self.cache.close)
+
+    def keys(self):
+        return sorted(self.cache._cache.iterkeys())
+
+
+class CachedMethodKeyTest(CacheTestCase):
+
+    def test_cache_dir_comes_from_environment(self):
+        self.assertEqual(self.cache.dir, os.environ['SEKHEM_CACHE_DIR'])
+
+    def test_same_attributes_and_arguments_reuse_the_entry(self):
+        analyzer = Analyzer(self.cache)
+        first = analyzer.stats('WEI')
+        self.assertEqual(analyzer.stats('WEI'), first)
+        self.assertEqual(analyzer.calls, 1)
+        self.assertEqual(len(self.keys()), 1)
+
+    def test_depends_on_attribute_changes_the_key(self):
+        analyzer = Analyzer(self.cache)
+        analyzer.stats()
+        analyzer.threshold = 0.5
+        self.assertEqual(analyzer.stats()['threshold'], 0.5)
+        self.assertEqual(analyzer.calls, 2)
+        self.assertEqual(len(self.keys()), 2)
+
+        # Retour au seuil initial : l'entrée d'origine est relue
+        analyzer.threshold = 0.3
+        self.assertEqual(analyzer.stats()['call'], 1)
+        self.assertEqual(analyzer.calls, 2)
+
+    def test_argument_changes_the_key(self):
+        analyzer = Analyzer(self.cache)
+        analyzer.stats('WEI')
+        self.assertEqual(analyzer.stats('NDVI')['band'], 'NDVI')
+        self.assertEqual(analyzer.stats(band='NDVI')['band'], 'NDVI')
+        self.assertEqual(analyzer.calls, 3)
+        self.assertEqual(len(self.keys()), 3)
+
+    def test_context_is_part_of_the_key(self):
+        analyzer = Analyzer(self.cache)
+        analyzer.stats()
+        analyzer.department = 'Ziguinchor'
+        analyzer.stats()
+        self.assertEqual(analyzer.calls, 2)
+        self.assertTrue(any('|dpt=Ziguinchor|' in key for key in self.keys()))
+
+    def test_cache_if_blocks_the_write(self):
+        analyzer = Analyzer(self.cache)
+        self.assertEqual(analyzer.fallback()['call'], 1)
+        self.assertEqual(analyzer.fallback()['call'], 2)
+        self.assertEqual(self.keys(), [])
+
+    def test_concurrent_calls_compute_once(self):
+        computed = []
+
+        def compute():
+            computed.append(threading.get_ident())
+            time.sleep(0.05)
+            return 'value'
+
+        key = self.cache.make_key('slow')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.getset(key, compute)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(len(computed), 1)
+
+
+class ClearContextTest(CacheTestCase):
+
+    def test_clears_only_the_matching_scope(self):
+        scopes = [
+            ('Bignona', '2024-01-01', '2024-03-31'),
+            ('Bignona', '2024-01-01', '2024-04-30'),
+            ('Bignona', '2023-01-01', '2024-03-31'),
+            ('Ziguinchor', '2024-01-01', '2024-03-31'),
+            ('Bignona2', '2024-01-01', '2024-03-31'),
+        ]
+        for dpt, begin, end in scopes:
+            self.cache.set(self.cache.key_context('stats', dpt, begin, end), 1)
+            self.cache.set(self.cache.key_context('tiles', dpt, begin, end, extra='abc'), 1)
+        self.cache.set(self.cache.make_key('stats', ['dpt=Bignona']), 1)
+        foreign = CacheManager(dir=self.cache.dir, namespace='OTHER')
+        self.addCleanup(foreign.close)
+        foreign.set(foreign.key_context('stats', 'Bignona', '2024-01-01', '2024-03-31'), 1)
+
+        self.assertEqual(self.cache.clear_context('Bignona', '2024-01-01', '2024-03-31'), 2)
+
+        remaining = self.keys()
+        self.assertEqual(len(remaining), 10)
+        self.assertFalse(any('|dpt=Bignona|b=2024-01-01|e=2024-03-31' in key
+                             for key in remaining if key.startswith('SEKHEM|')))
+        self.assertIn('OTHER|stats|dpt=Bignona|b=2024-01-01|e=2024-03-31', remaining)
+
+
+if __name__ == '__main__':
+    unittest.main()
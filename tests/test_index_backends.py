@@ -0,0 +1,138 @@
+# tests/test_index_backends.py
+"""
+Parité NumpyIndexBackend / EarthEngineIndexBackend : mêmes indices, mêmes
+classes d'occupation du sol et mêmes classes de risque sur des tableaux
+fixes, cas limites compris (somme nulle, valeurs négatives, NaN, valeurs
+exactement sur les seuils et sur les bornes WEI_RISK_BREAKS).
+
+Le graphe Earth Engine est évalué par le backend simulé testing.fake_ee.
+
+    python -m unittest tests.test_index_backends
+"""
+import itertools
+import unittest
+
+import numpy as np
+
+import ee_backend
+from config import (
+    LAND_COVER_NDVI_LOW,
+    SENTINEL2_GREEN_BAND,
+    SENTINEL2_NIR_BAND,
+    SENTINEL2_RED_BAND,
+    SENTINEL2_SWIR1_BAND,
+    WATER_THRESHOLD_MNDWI,
+    WEI_RISK_BREAKS,
+)
+from index_backends import EarthEngineIndexBackend, IndexBackend, NumpyIndexBackend
+from testing import fake_ee
+
+NAN = np.nan
+NDBI_THRESHOLD = 0.1
+NDVI_THRESHOLD = 0.4
+INDEX_NAMES = ('NDVI', 'NDWI', 'MNDWI', 'NDBI', 'WEI')
+MASK_NAMES = ('water_mask', 'urban_mask', 'vegetation_mask', 'agricultural_mask', 'bare_soil_mask')
+
+# (B3, B4, B8, B11) par pixel
+BAND_CASES = [
+    (800, 600, 3000, 2000),     # végétation
+    (1000, 900, 700, 100),      # eau
+    (1500, 1800, 2200, 3000),   # bâti / sol nu
+    (0, 500, 0, 400),           # NDWI : somme nulle
+    (0, 0, 0, 0),               # toutes les sommes nulles
+    (900, 900, 900, 900),       # différences nulles
+    (-1, 500, 800, 300),        # B3 négatif
+    (700, -5, 800, 300),        # B4 négatif
+    (700, 500, 800, -300),      # B11 négatif
+    (NAN, 500, 800, 300),       # B3 masqué
+    (700, NAN, 800, 300),       # B4 masqué
+    (700, 500, NAN, 300),       # B8 masqué
+    (700, 500, 800, NAN),       # B11 masqué
+    (1, 10000, 1, 10000),       # extrêmes
+]
+
+
+def _fake_image(bands):
+    return fake_ee.Image(_bands=lambda: {name: np.asarray(a, dtype=np.float64) for name, a in bands.items()})
+
+
+def _arrays(image, names):
+    values = image.select(list(names))._value()
+    return {name: values[name] for name in names}
+
+
+class IndexBackendParityTest(unittest.TestCase):
+
+    def run_on_world(self, width, fn):
+        """Exécute fn sur un backend simulé dont la grille fait 2 × width pixels."""
+        backend = fake_ee.FakeEarthEngine(world=fake_ee.SyntheticWorld(width=width, height=2))
+        with ee_backend.use_backend(backend):
+            return fn()
+
+    @staticmethod
+    def grid(values):
+        """Deux lignes : les valeurs, puis les mêmes en ordre inverse."""
+        row = np.asarray(values, dtype=np.float64)
+        return np.stack([row, row[::-1]])
+
+    def test_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            IndexBackend()
+
+    def test_indices_match(self):
+        names = (SENTINEL2_GREEN_BAND, SENTINEL2_RED_BAND, SENTINEL2_NIR_BAND, SENTINEL2_SWIR1_BAND)
+        bands = {name: self.grid([case[i] for case in BAND_CASES]) for i, name in enumerate(names)}
+
+        expected = self.run_on_world(len(BAND_CASES), lambda: _arrays(
+            EarthEngineIndexBackend().calculate_indices(_fake_image(bands)), INDEX_NAMES))
+
+        for backend, rtol in ((NumpyIndexBackend(chunk_rows=1, dtype=np.float64), 1e-12),
+                              (NumpyIndexBackend(), 1e-6)):
+            result = backend.calculate_indices(bands)
+            for name in INDEX_NAMES:
+                with self.subTest(backend=backend.dtype.__name__, index=name):
+                    np.testing.assert_allclose(result[name], expected[name], rtol=rtol, atol=1e-7, equal_nan=True)
+
+        # Somme nulle et bande négative : pixel masqué des deux côtés
+        self.assertTrue(np.isnan(expected['NDWI'][0, 3]))
+        self.assertTrue(np.isnan(expected['NDVI'][0, 7]))
+
+    def test_land_cover_matches(self):
+        ndvi_values = [LAND_COVER_NDVI_LOW, NDVI_THRESHOLD, 0.1, 0.3, 0.6, -0.2, NAN]
+        ndbi_values = [NDBI_THRESHOLD, 0.0, 0.3, NAN]
+        mndwi_values = [WATER_THRESHOLD_MNDWI, -0.5, 0.4, NAN]
+        cases = list(itertools.product(ndvi_values, ndbi_values, mndwi_values))
+        indices = {name: self.grid([case[i] for case in cases]) for i, name in enumerate(('NDVI', 'NDBI', 'MNDWI'))}
+
+        def evaluate():
+            result = EarthEngineIndexBackend().classify_land_cover(
+                _fake_image(indices), WATER_THRESHOLD_MNDWI, NDBI_THRESHOLD, NDVI_THRESHOLD)
+            return {name: list(image._value().values())[0] for name, image in result.items()}
+        expected = self.run_on_world(len(cases), evaluate)
+
+        result = NumpyIndexBackend(chunk_rows=1).classify_land_cover(
+            indices, WATER_THRESHOLD_MNDWI, NDBI_THRESHOLD, NDVI_THRESHOLD)
+        np.testing.assert_array_equal(result['land_cover'], expected['land_cover'])
+        for name in MASK_NAMES:
+            with self.subTest(mask=name):
+                # Masque Earth Engine masqué (NaN) = condition fausse
+                np.testing.assert_array_equal(result[name], np.nan_to_num(expected[name]).astype(bool))
+
+    def test_flood_risk_matches(self):
+        values = [-0.5, 0.0, 1.0, NAN]
+        for edge in WEI_RISK_BREAKS:
+            values += [edge, np.nextafter(edge, -np.inf), np.nextafter(edge, np.inf)]
+        wei = self.grid(values)
+
+        expected = self.run_on_world(len(values), lambda: list(
+            EarthEngineIndexBackend().flood_risk(_fake_image({'WEI': wei}))._value().values())[0])
+
+        result = NumpyIndexBackend(chunk_rows=1).flood_risk(wei)
+        np.testing.assert_array_equal(result, expected)
+        # Une borne appartient à la classe inférieure : WEI = 0.1 -> 1, 0.7 -> 4
+        self.assertEqual(result[0, values.index(WEI_RISK_BREAKS[0])], 1)
+        self.assertEqual(result[0, values.index(WEI_RISK_BREAKS[-1])], len(WEI_RISK_BREAKS))
+
+
+if __name__ == '__main__':
+    unittest.main()
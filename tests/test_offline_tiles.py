@@ -0,0 +1,50 @@
+# tests/test_offline_tiles.py
+"""
+Repli des pyramides hors ligne : sans pyramide de la période exacte, la
+plus récente du même pays, département et couche est choisie
+(latest_tileset), quel que soit son format.
+
+    python -m unittest tests.test_offline_tiles
+"""
+import os
+import tempfile
+import unittest
+
+from offline_tiles import TilePyramid, latest_tileset, tileset_name
+
+
+class LatestTilesetTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.folder = tmp.name
+
+    def export(self, department, begin, end, layer_id='wei', fmt='mbtiles'):
+        name = tileset_name('SEN', department, begin, end, layer_id)
+        path = os.path.join(self.folder, f"{name}.mbtiles" if fmt == 'mbtiles' else name)
+        pyramid = TilePyramid(path, fmt)
+        pyramid.set_metadata({'name': layer_id, 'maxzoom': 12})
+        pyramid.close()
+
+    def test_latest_end_wins_across_formats(self):
+        self.export('Bignona', '2024-01-01', '2024-03-31')
+        self.export('Bignona', '2024-03-01', '2024-05-31', fmt='xyz')
+        self.export('Bignona', '2024-02-01', '2024-04-30')
+        self.assertEqual(latest_tileset(self.folder, 'SEN', 'Bignona', 'wei'),
+                         ('SEN_Bignona_2024-03-01_2024-05-31_wei', '2024-03-01', '2024-05-31'))
+
+    def test_other_departments_layers_and_partial_exports_are_ignored(self):
+        self.export('Bignona', '2024-01-01', '2024-03-31')
+        self.export('Bignona Sud', '2024-06-01', '2024-08-31')
+        self.export('Bignona', '2024-06-01', '2024-08-31', layer_id='fires')
+        # Dossier XYZ sans metadata.json : export interrompu avant la fin
+        os.makedirs(os.path.join(self.folder, tileset_name('SEN', 'Bignona', '2024-07-01', '2024-09-30', 'wei')))
+        self.assertEqual(latest_tileset(self.folder, 'SEN', 'Bignona', 'wei')[0],
+                         'SEN_Bignona_2024-01-01_2024-03-31_wei')
+        self.assertIsNone(latest_tileset(self.folder, 'SEN', 'Ziguinchor', 'wei'))
+        self.assertIsNone(latest_tileset(os.path.join(self.folder, 'absent'), 'SEN', 'Bignona', 'wei'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# tests/test_tile_proxy.py
+"""
+Éviction LRU de TileStore sur un dossier temporaire et un petit plafond :
+les tuiles les moins récemment servies partent en premier, jusqu'à
+target_ratio × taille maximale ; la taille suivie (_size) correspond aux
+octets réellement présents sur le disque ; l'ordre survit à un redémarrage
+(dates de modification) et les tuiles servies pendant le chargement de
+l'index restent les plus récentes.
+
+    python -m unittest tests.test_tile_proxy
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from tile_proxy import TileStore
+
+TILE_BYTES = 1000
+LAYER = '0123456789abcdef'
+
+
+def max_mb(tiles):
+    """Plafond (en Mo) correspondant à 'tiles' tuiles de TILE_BYTES octets."""
+    return tiles * TILE_BYTES / 1024 ** 2
+
+
+def tile_data(i):
+    return bytes([i % 256]) * TILE_BYTES
+
+
+class TileStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+
+    def open_store(self, tiles=10):
+        store = TileStore(self.root, max_mb=max_mb(tiles))
+        self.assertTrue(store.loaded.wait(5))
+        return store
+
+    def on_disk(self):
+        """{y: octets} des tuiles présentes sur le disque (z=0, x=0)."""
+        folder = os.path.join(self.root, LAYER, '0', '0')
+        if not os.path.isdir(folder):
+            return {}
+        return {int(name[:-4]): os.path.getsize(os.path.join(folder, name))
+                for name in os.listdir(folder) if name.endswith('.png')}
+
+    def seed(self, count, store=None):
+        """Écrit 'count' tuiles aux dates de modification croissantes (0 la plus ancienne)."""
+        store = store or TileStore(self.root, max_mb=max_mb(1000))
+        now = time.time()
+        for y in range(count):
+            store.put(LAYER, 0, 0, y, tile_data(y))
+            os.utime(store.path(LAYER, 0, 0, y), (now - 100 + y, now - 100 + y))
+        return store
+
+    def index_order(self, store):
+        return [int(os.path.basename(path)[:-4]) for path in store._index]
+
+    def test_least_recently_served_tiles_are_evicted_first(self):
+        store = self.open_store(tiles=10)
+        for y in range(10):
+            store.put(LAYER, 0, 0, y, tile_data(y))
+        self.assertEqual(store.get(LAYER, 0, 0, 0), tile_data(0))
+        self.assertEqual(store.get(LAYER, 0, 0, 1), tile_data(1))
+
+        store.put(LAYER, 0, 0, 10, tile_data(10))
+
+        # 11 000 octets > 10 000 : éviction jusqu'à 9 000 (target_ratio 0.9)
+        self.assertEqual(sorted(self.on_disk()), [0, 1] + list(range(4, 11)))
+        self.assertEqual(store._size, 9 * TILE_BYTES)
+        self.assertIsNone(store.get(LAYER, 0, 0, 2))
+
+    def test_tracked_size_matches_disk(self):
+        store = self.open_store(tiles=10)
+        for y in range(25):
+            store.put(LAYER, 0, 0, y % 15, tile_data(y))
+            if y % 3 == 0:
+                store.get(LAYER, 0, 0, (y * 7) % 15)
+            self.assertEqual(store._size, sum(self.on_disk().values()))
+            self.assertLessEqual(store._size, store.max_bytes)
+        # Réécriture d'une tuile existante : taille remplacée, pas ajoutée
+        y = self.index_order(store)[-1]
+        store.put(LAYER, 0, 0, y, b'x' * 10)
+        self.assertEqual(store._size, sum(self.on_disk().values()))
+
+    def test_evict_down_to_target_ratio(self):
+        store = self.open_store(tiles=10)
+        for y in range(10):
+            store.put(LAYER, 0, 0, y, tile_data(y))
+        self.assertEqual(store.evict(target_ratio=0.5), 5)
+        self.assertEqual(sorted(self.on_disk()), list(range(5, 10)))
+        self.assertEqual(store._size, 5 * TILE_BYTES)
+        self.assertEqual(store.evict(target_ratio=0.5), 0)
+
+    def test_access_order_survives_restart(self):
+        first = self.seed(5)
+        self.assertTrue(first.loaded.wait(5))
+        first.get(LAYER, 0, 0, 1)  # os.utime : devient la plus récente
+
+        restarted = self.open_store(tiles=1000)
+        self.assertEqual(self.index_order(restarted), [0, 2, 3, 4, 1])
+        self.assertEqual(restarted._size, 5 * TILE_BYTES)
+
+    def test_restart_over_the_cap_evicts_oldest(self):
+        first = self.seed(12)
+        self.assertTrue(first.loaded.wait(5))
+
+        restarted = self.open_store(tiles=10)
+        self.assertEqual(sorted(self.on_disk()), list(range(3, 12)))
+        self.assertEqual(restarted._size, sum(self.on_disk().values()))
+
+    def test_tiles_served_while_loading_stay_most_recent(self):
+        first = self.seed(5)
+        self.assertTrue(first.loaded.wait(5))
+
+        release = threading.Event()
+        real_walk = os.walk
+
+        def blocked_walk(root):
+            release.wait(5)
+            return real_walk(root)
+
+        # os.utime neutralisé : l'ordre ne peut venir que de la fusion avec l'index en mémoire
+        with mock.patch('tile_proxy.os.walk', blocked_walk), mock.patch('tile_proxy.os.utime'):
+            store = TileStore(self.root, max_mb=max_mb(1000))
+            self.assertEqual(store.get(LAYER, 0, 0, 0), tile_data(0))
+            self.assertFalse(store.loaded.is_set())
+            release.set()
+            self.assertTrue(store.loaded.wait(5))
+
+        self.assertEqual(self.index_order(store), [1, 2, 3, 4, 0])
+        self.assertEqual(store._size, 5 * TILE_BYTES)
+
+
+if __name__ == '__main__':
+    unittest.main()
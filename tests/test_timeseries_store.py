@@ -0,0 +1,126 @@
+# tests/test_timeseries_store.py
+"""
+TimeSeriesStore et identifiants de composites : quand la période glisse,
+seules les images jamais vues sont réduites (fetch_fn espion), la série
+revient triée par date, et l'identifiant d'un composite (group_acquisitions)
+ne change que si une nouvelle acquisition rejoint sa période.
+
+    python -m unittest tests.test_timeseries_store
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from cache_manager import CacheManager
+from compositing import group_acquisitions
+from config import TIMESERIES_COLUMNS
+from timeseries_store import TimeSeriesStore
+
+PARAMS = {'country': 'SEN', 'scale': 100}
+
+# image_id -> date (volontairement dans le désordre)
+ACQUISITIONS = {
+    'S2_20240121': '2024-01-21',
+    'S2_20240103': '2024-01-03',
+    'S2_20240111': '2024-01-11',
+    'S2_20240131': '2024-01-31',
+    'S2_20240210': '2024-02-10',
+}
+
+
+class SpyFetch:
+    """fetch_fn enregistrant les identifiants demandés à chaque appel."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, image_ids):
+        self.calls.append(list(image_ids))
+        return pd.DataFrame([{'date': ACQUISITIONS[image_id], 'image_id': image_id, 'WEI': 0.1}
+                             for image_id in image_ids])
+
+
+class TimeSeriesStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = mock.patch.dict(os.environ, {'SEKHEM_CACHE_DIR': tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        cache = CacheManager()
+        self.addCleanup(cache.close)
+        self.store = TimeSeriesStore(cache)
+        self.fetch = SpyFetch()
+
+    def test_overlapping_window_fetches_only_new_ids(self):
+        first = ['S2_20240121', 'S2_20240103', 'S2_20240111']
+        self.store.get('Bignona', PARAMS, first, self.fetch)
+        second = ['S2_20240111', 'S2_20240121', 'S2_20240131', 'S2_20240210']
+        df = self.store.get('Bignona', PARAMS, second, self.fetch)
+
+        self.assertEqual(self.fetch.calls, [first, ['S2_20240131', 'S2_20240210']])
+        self.assertEqual(list(df['image_id']), sorted(second, key=ACQUISITIONS.get))
+
+    def test_result_is_sorted_by_date_with_store_columns(self):
+        df = self.store.get('Bignona', PARAMS, list(ACQUISITIONS), self.fetch)
+        self.assertEqual(list(df.columns), TIMESERIES_COLUMNS)
+        self.assertEqual(list(df['date']), sorted(ACQUISITIONS.values()))
+        self.assertEqual(list(df.index), list(range(len(ACQUISITIONS))))
+
+    def test_known_ids_are_served_without_fetch(self):
+        self.store.get('Bignona', PARAMS, list(ACQUISITIONS), self.fetch)
+        df = self.store.get('Bignona', PARAMS, ['S2_20240103', 'S2_20240210'], self.fetch)
+        self.assertEqual(len(self.fetch.calls), 1)
+        self.assertEqual(list(df['image_id']), ['S2_20240103', 'S2_20240210'])
+
+    def test_department_and_params_are_separate_stores(self):
+        ids = ['S2_20240103']
+        self.store.get('Bignona', PARAMS, ids, self.fetch)
+        self.store.get('Ziguinchor', PARAMS, ids, self.fetch)
+        self.store.get('Bignona', dict(PARAMS, scale=30), ids, self.fetch)
+        self.assertEqual(self.fetch.calls, [ids, ids, ids])
+
+    def test_empty_fetch_returns_empty_frame(self):
+        df = self.store.get('Bignona', PARAMS, ['S2_20240103'], lambda ids: pd.DataFrame())
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), TIMESERIES_COLUMNS)
+
+
+class GroupAcquisitionsIdTest(unittest.TestCase):
+
+    def groups(self, acquisitions, period='dekad'):
+        return {group['start']: group for group in group_acquisitions(
+            list(acquisitions), list(acquisitions.values()), period, 'median')}
+
+    def test_id_changes_when_an_acquisition_joins_the_period(self):
+        before = self.groups({'S2_20240103': '2024-01-03', 'S2_20240111': '2024-01-11'})
+        after = self.groups({'S2_20240103': '2024-01-03', 'S2_20240111': '2024-01-11',
+                             'S2_20240106': '2024-01-06'})
+        self.assertNotEqual(before['2024-01-01']['id'], after['2024-01-01']['id'])
+        self.assertEqual(after['2024-01-01']['image_ids'], ['S2_20240103', 'S2_20240106'])
+        # La décade suivante n'a pas reçu d'image : même identifiant
+        self.assertEqual(before['2024-01-11']['id'], after['2024-01-11']['id'])
+
+    def test_id_is_stable_otherwise(self):
+        acquisitions = {'S2_20240111': '2024-01-11', 'S2_20240103': '2024-01-03',
+                        'S2_20240105': '2024-01-05'}
+        reordered = dict(reversed(list(acquisitions.items())))
+        self.assertEqual(
+            [group['id'] for group in self.groups(acquisitions).values()],
+            [group['id'] for group in self.groups(reordered).values()],
+        )
+
+    def test_groups_are_chronological_with_period_bounds(self):
+        groups = group_acquisitions(list(ACQUISITIONS), list(ACQUISITIONS.values()), 'dekad', 'median')
+        self.assertEqual([group['start'] for group in groups],
+                         ['2024-01-01', '2024-01-11', '2024-01-21', '2024-02-01'])
+        self.assertEqual(groups[2]['end'], '2024-02-01')
+        self.assertEqual(groups[2]['image_ids'], ['S2_20240121', 'S2_20240131'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# tile_cache.py
+from __future__ import annotations
+import threading
+import time
+from typing import Callable, Dict, Optional
+from cache_manager import CacheManager
+from config import MAP_TILE_REFRESH_MARGIN, MAP_TILE_TTL
+
+
+class TileUrlCache:
+    """
+    Cache des URL de tuiles Earth Engine (tile_fetcher.url_format) des
+    couches de la carte, par (couche, département, période, visualisation).
+    Un getMapId n'est valable que quelques heures (jeton) : chaque entrée
+    porte son heure d'expiration et est renouvelée MAP_TILE_REFRESH_MARGIN
+    secondes avant. Deux niveaux :
+      - mémoire (reruns Streamlit : aucun accès disque ni serveur) ;
+      - disque (CacheManager), partagé avec precompute.py.
+    """
+
+    def __init__(self, cache: Optional[CacheManager] = None, ttl: int = MAP_TILE_TTL,
+                 margin: int = MAP_TILE_REFRESH_MARGIN) -> None:
+        self.cache = cache or CacheManager()
+        self.ttl = ttl
+        self.margin = margin
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def make_key(self, layer: str, dpt: str, begin: str, end: str, vis_params: dict, params: Optional[dict] = None) -> str:
+        extra = self.cache.fingerprint({'layer': layer, 'vis': vis_params, **(params or {})})
+        return self.cache.key_context("tiles", dpt, begin, end, extra=extra)
+
+    def _valid(self, entry: Optional[dict]) -> bool:
+        return bool(entry) and entry['expires_at'] - self.margin > time.time()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """URL encore valide pour 'key' (mémoire puis disque), sinon None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not self._valid(entry):
+            entry = self.cache.get(key)
+            if not self._valid(entry):
+                return None
+            with self._lock:
+                self._entries[key] = entry
+        return entry['url_format']
+
+    def store(self, key: str, url_format: str) -> str:
+        entry = {'url_format': url_format, 'expires_at': time.time() + self.ttl}
+        with self._lock:
+            self._entries[key] = entry
+        self.cache.set(key, entry, expire=self.ttl)
+        return url_format
+
+    def get(self, key: str, compute_fn: Callable[[], str]) -> str:
+        """URL de tuiles de 'key' ; compute_fn() (un getMapId) seulement si absente ou bientôt expirée."""
+        url_format = self.lookup(key)
+        if url_format is not None:
+            return url_format
+        return self.store(key, compute_fn())
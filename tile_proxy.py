@@ -0,0 +1,353 @@
+# tile_proxy.py
+"""
+Proxy local des tuiles Earth Engine, avec cache disque z/x/y.
+
+show_map ne donne plus au navigateur les URL Earth Engine mais celles du
+proxy : /tiles/<couche>/<z>/<x>/<y>. Le proxy sert la tuile depuis le
+disque, ou la télécharge une seule fois (même si plusieurs utilisateurs la
+demandent en même temps) puis la conserve. L'identifiant de couche dérive
+de la clé du cache des tuiles (couche, département, période,
+visualisation) et non de l'URL Earth Engine : les tuiles restent valides
+quand le jeton de la carte est renouvelé. Au-delà de TILE_CACHE_MAX_MB,
+les tuiles les moins récemment servies sont supprimées (LRU).
+
+Le registre couche → URL Earth Engine est partagé par le cache disque
+CacheManager : le proxy peut tourner dans le processus Streamlit
+(TILE_PROXY_AUTOSTART) ou à part :
+    python tile_proxy.py --port 8765
+Activation : TILE_PROXY_ENABLED = True dans config.py, ou variable
+d'environnement SEKHEM_TILE_PROXY_URL (URL du proxy vue par le navigateur).
+
+Le proxy sert aussi les pyramides hors ligne d'offline_tiles.py
+(/offline/<jeu de tuiles>/<z>/<x>/<y>), lues dans OFFLINE_TILES_FOLDER.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import ee_backend
+from cache_manager import CacheManager
+from config import (
+    MAP_TILE_TTL,
+    OFFLINE_TILES_FOLDER,
+    TILE_CACHE_DIR,
+    TILE_CACHE_MAX_MB,
+    TILE_FETCH_TIMEOUT,
+    TILE_PROXY_AUTOSTART,
+    TILE_PROXY_ENABLED,
+    TILE_PROXY_HOST,
+    TILE_PROXY_PORT,
+    TILE_PROXY_PUBLIC_URL,
+)
+from offline_tiles import TilePyramid
+from parallel_eval import with_retry
+
+_TILE_PATH = re.compile(r'^/tiles/([0-9a-f]{16})/(\d+)/(\d+)/(\d+)(?:\.png)?$')
+_OFFLINE_PATH = re.compile(r'^/offline/([\w-]+)/(\d+)/(\d+)/(\d+)(?:\.png)?$')
+
+
+class TileStore:
+    """
+    Tuiles sur disque (<racine>/<couche>/<z>/<x>/<y>.png) avec éviction LRU
+    sur la taille totale. Un index en mémoire (chemin → taille, du moins au
+    plus récemment servi) évite de parcourir le disque : il est chargé une
+    fois, en arrière-plan, dans l'ordre des dates de modification (os.utime
+    à chaque accès conserve l'ordre d'un redémarrage à l'autre).
+    """
+
+    def __init__(self, root: Optional[str] = None, max_mb: float = TILE_CACHE_MAX_MB) -> None:
+        self.root = root or os.environ.get("SEKHEM_TILE_CACHE_DIR", TILE_CACHE_DIR)
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self.loaded = threading.Event()
+        os.makedirs(self.root, exist_ok=True)
+        threading.Thread(target=self._load_index, name='sekhem-tile-index', daemon=True).start()
+
+    def path(self, layer_id: str, z: int, x: int, y: int) -> str:
+        return os.path.join(self.root, layer_id, str(z), str(x), f"{y}.png")
+
+    def get(self, layer_id: str, z: int, x: int, y: int) -> Optional[bytes]:
+        path = self.path(layer_id, z, x, y)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # dernier accès : ordre d'éviction après redémarrage
+        except OSError:
+            pass
+        with self._lock:
+            self._touch(path, len(data))
+        return data
+
+    def put(self, layer_id: str, z: int, x: int, y: int, data: bytes) -> None:
+        path = self.path(layer_id, z, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._touch(path, len(data))
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _touch(self, path: str, size: int) -> None:
+        """Place 'path' en fin d'index (le plus récent) ; appelé sous self._lock."""
+        self._size += size - self._index.pop(path, 0)
+        self._index[path] = size
+
+    def _load_index(self) -> None:
+        files = []
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith('.png'):
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, path, stat.st_size))
+        files.sort()
+        with self._lock:
+            # Les tuiles servies pendant le chargement restent les plus récentes
+            recent = self._index
+            self._index = OrderedDict((path, size) for _, path, size in files if path not in recent)
+            self._index.update(recent)
+            self._size = sum(self._index.values())
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+        self.loaded.set()
+
+    def evict(self, target_ratio: float = 0.9) -> int:
+        """Supprime les tuiles les plus anciennement servies jusqu'à target_ratio × taille maximale."""
+        removed = 0
+        with self._lock:
+            while self._index and self._size > self.max_bytes * target_ratio:
+                path, size = self._index.popitem(last=False)
+                self._size -= size
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+class TileProxy:
+    """Registre des couches et service des tuiles (disque, sinon Earth Engine)."""
+
+    def __init__(self, cache: Optional[CacheManager] = None, store: Optional[TileStore] = None,
+                 public_url: Optional[str] = None, offline_folder: str = OFFLINE_TILES_FOLDER) -> None:
+        self.cache = cache or CacheManager()
+        self.store = store or TileStore()
+        self.public_url = (public_url or default_public_url()).rstrip('/')
+        self.offline_folder = offline_folder
+        self._pyramids: Dict[str, TilePyramid] = {}
+        self._upstreams: Dict[str, str] = {}
+        self._registered: Dict[str, str] = {}
+        self._inflight: Dict[Tuple[str, int, int, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Registre (côté application)
+    # -----------------------------
+    @staticmethod
+    def layer_id(key: str) -> str:
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def registry_key(self, layer_id: str) -> str:
+        return self.cache.make_key("tile_proxy", [layer_id])
+
+    def register(self, key: str, url_format: str) -> str:
+        """Associe la couche 'key' à son URL Earth Engine et retourne l'URL de tuiles du proxy."""
+        layer_id = self.layer_id(key)
+        if self._registered.get(layer_id) != url_format:
+            self.cache.set(self.registry_key(layer_id), url_format, expire=MAP_TILE_TTL)
+            self._registered[layer_id] = url_format
+        return f"{self.public_url}/tiles/{layer_id}/{{z}}/{{x}}/{{y}}"
+
+    def upstream(self, layer_id: str, refresh: bool = False) -> Optional[str]:
+        if refresh or layer_id not in self._upstreams:
+            url_format = self.cache.get(self.registry_key(layer_id))
+            if url_format is None:
+                return None
+            self._upstreams[layer_id] = url_format
+        return self._upstreams[layer_id]
+
+    # -----------------------------
+    # Tuiles (côté serveur)
+    # -----------------------------
+    def _fetch(self, url_format: str, z: int, x: int, y: int) -> bytes:
+        return ee_backend.fetch_tile(url_format, z, x, y, timeout=TILE_FETCH_TIMEOUT)
+
+    def tile(self, layer_id: str, z: int, x: int, y: int) -> Tuple[Optional[bytes], bool]:
+        """Retourne (octets, servi_depuis_le_disque) ; (None, False) si la couche est inconnue."""
+        data = self.store.get(layer_id, z, x, y)
+        if data is not None:
+            return data, True
+
+        # Un seul téléchargement par tuile, même pour des requêtes simultanées
+        with self._lock:
+            lock = self._inflight.setdefault((layer_id, z, x, y), threading.Lock())
+        with lock:
+            try:
+                data = self.store.get(layer_id, z, x, y)
+                if data is not None:
+                    return data, True
+                url_format = self.upstream(layer_id)
+                if url_format is None:
+                    return None, False
+                try:
+                    data = with_retry(lambda: self._fetch(url_format, z, x, y))
+                except Exception:
+                    # URL expirée : l'application a pu enregistrer une nouvelle URL entre-temps
+                    renewed = self.upstream(layer_id, refresh=True)
+                    if renewed is None or renewed == url_format:
+                        raise
+                    data = with_retry(lambda: self._fetch(renewed, z, x, y))
+                self.store.put(layer_id, z, x, y, data)
+                return data, False
+            finally:
+                with self._lock:
+                    self._inflight.pop((layer_id, z, x, y), None)
+
+    def offline_tile(self, tileset: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """Tuile d'une pyramide hors ligne ; None si le jeu de tuiles ou la tuile n'existe pas."""
+        with self._lock:
+            pyramid = self._pyramids.get(tileset)
+            if pyramid is None:
+                pyramid = TilePyramid.open(self.offline_folder, tileset)
+                if pyramid is None:
+                    return None
+                self._pyramids[tileset] = pyramid
+        return pyramid.get(z, x, y)
+
+
+class _TileHandler(BaseHTTPRequestHandler):
+    proxy: TileProxy = None
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        offline = _OFFLINE_PATH.match(path)
+        if offline:
+            tileset, z, x, y = offline.group(1), *map(int, offline.groups()[1:])
+            data, hit = self.proxy.offline_tile(tileset, z, x, y), True
+            if data is None:
+                self.send_error(404, "Tuile absente de la pyramide hors ligne")
+                return
+            self._send_tile(data, hit)
+            return
+        match = _TILE_PATH.match(path)
+        if not match:
+            self.send_error(404, "Chemin attendu : /tiles/<couche>/<z>/<x>/<y>")
+            return
+        layer_id, z, x, y = match.group(1), *map(int, match.groups()[1:])
+        try:
+            data, hit = self.proxy.tile(layer_id, z, x, y)
+        except Exception as e:
+            self.send_error(502, f"Tuile Earth Engine indisponible : {e}")
+            return
+        if data is None:
+            self.send_error(404, "Couche inconnue ou expirée")
+            return
+        self._send_tile(data, hit)
+
+    def _send_tile(self, data: bytes, hit: bool) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Tile-Cache', 'HIT' if hit else 'MISS')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# =============================================
+# === SERVEUR ===
+# =============================================
+
+def default_public_url() -> str:
+    return os.environ.get("SEKHEM_TILE_PROXY_URL") or TILE_PROXY_PUBLIC_URL \
+        or f"http://{TILE_PROXY_HOST}:{TILE_PROXY_PORT}"
+
+
+def proxy_enabled() -> bool:
+    return TILE_PROXY_ENABLED or bool(os.environ.get("SEKHEM_TILE_PROXY_URL"))
+
+
+def serve(proxy: TileProxy, host: str = TILE_PROXY_HOST, port: int = TILE_PROXY_PORT) -> ThreadingHTTPServer:
+    handler = type('TileHandler', (_TileHandler,), {'proxy': proxy})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+_proxy: Optional[TileProxy] = None
+_server: Optional[ThreadingHTTPServer] = None
+_proxy_lock = threading.Lock()
+
+
+def get_proxy() -> TileProxy:
+    """Proxy du processus ; démarre le serveur en arrière-plan si TILE_PROXY_AUTOSTART."""
+    global _proxy, _server
+    with _proxy_lock:
+        if _proxy is None:
+            _proxy = TileProxy()
+            if TILE_PROXY_AUTOSTART:
+                try:
+                    _server = serve(_proxy)
+                    threading.Thread(target=_server.serve_forever, name='sekhem-tile-proxy', daemon=True).start()
+                except OSError:
+                    # Port occupé : un proxy tourne déjà (autre session ou processus dédié)
+                    _server = None
+        return _proxy
+
+
+def proxied_url(key: str, url_format: str) -> str:
+    """URL de tuiles à donner au navigateur : celle du proxy s'il est activé, sinon celle d'Earth Engine."""
+    if not proxy_enabled():
+        return url_format
+    return get_proxy().register(key, url_format)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Proxy local des tuiles Earth Engine (cache disque z/x/y)")
+    parser.add_argument('--host', default=TILE_PROXY_HOST)
+    parser.add_argument('--port', type=int, default=TILE_PROXY_PORT)
+    parser.add_argument('--cache-dir', help="dossier des tuiles (défaut : %s)" % TILE_CACHE_DIR)
+    parser.add_argument('--max-mb', type=float, default=TILE_CACHE_MAX_MB)
+    parser.add_argument('--offline-folder', default=OFFLINE_TILES_FOLDER,
+                        help="dossier des pyramides hors ligne (offline_tiles.py)")
+    args = parser.parse_args(argv)
+
+    proxy = TileProxy(store=TileStore(args.cache_dir, args.max_mb), offline_folder=args.offline_folder)
+    server = serve(proxy, args.host, args.port)
+    print(f"✅ Proxy de tuiles sur http://{args.host}:{args.port} (cache : {proxy.store.root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
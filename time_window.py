@@ -0,0 +1,25 @@
+# time_window.py
+"""
+Période d'analyse par défaut, partagée par le front, precompute.py et
+batch.py : tous doivent produire la même paire de dates, donc les mêmes
+clés de cache.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+from config import DEFAULT_WINDOW_MONTHS
+
+
+def default_window(today: Optional[datetime] = None) -> Tuple[str, str]:
+    """
+    Période glissante par défaut (début, fin) : les DEFAULT_WINDOW_MONTHS
+    derniers mois jusqu'à hier. Calculée à l'appel (et non à l'import) pour
+    qu'un processus long ne garde pas la fenêtre de son démarrage.
+    """
+    today = today or datetime.now()
+    begin = today + relativedelta(months=-DEFAULT_WINDOW_MONTHS)
+    end = today + relativedelta(days=-1)
+    return begin.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
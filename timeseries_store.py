@@ -0,0 +1,64 @@
+# timeseries_store.py
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Sequence
+import pandas as pd
+from cache_manager import CacheManager
+from config import TIMESERIES_COLUMNS, TIMESERIES_STORE_TTL
+
+
+class TimeSeriesStore:
+    """
+    Série temporelle persistante, en ajout seul, d'un département.
+    Les statistiques régionales d'une acquisition Sentinel-2 ne changent
+    pas : on les stocke par identifiant d'image (system:index), pour tous
+    les contextes qui partagent la même chaîne de calcul (pays, échelle,
+    indices). Quand la période glisse, seules les images jamais vues sont
+    réduites côté serveur ; les autres sont servies localement.
+    """
+
+    def __init__(self, cache: Optional[CacheManager] = None, ttl: int = TIMESERIES_STORE_TTL) -> None:
+        self.cache = cache or CacheManager()
+        self.ttl = ttl
+
+    def make_key(self, department: str, params: dict) -> str:
+        return self.cache.make_key("timeseries_store", [f"dpt={department}", f"x={self.cache.fingerprint(params)}"])
+
+    def load(self, key: str) -> Dict[str, dict]:
+        """Lignes déjà réduites : {image_id: {colonne: valeur}}."""
+        return self.cache.get(key) or {}
+
+    def append(self, key: str, df: pd.DataFrame) -> Dict[str, dict]:
+        """Ajoute les lignes de df (par image_id) au stock persistant et retourne le stock complet."""
+        rows = self.load(key)  # relu juste avant l'écriture : fusion avec un autre processus
+        for record in df.to_dict('records'):
+            if record.get('image_id'):
+                rows[record['image_id']] = record
+        self.cache.set(key, rows, expire=self.ttl)
+        return rows
+
+    def get(
+        self,
+        department: str,
+        params: dict,
+        image_ids: Sequence[str],
+        fetch_fn: Callable[[List[str]], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """
+        Série des images 'image_ids' triée par date. fetch_fn(ids) n'est
+        appelé que pour les identifiants absents du stock, et par un seul
+        thread à la fois : les autres attendent puis relisent le stock.
+        """
+        key = self.make_key(department, params)
+        with self.cache.key_lock(key):
+            rows = self.load(key)
+            missing = [image_id for image_id in image_ids if image_id not in rows]
+            if missing:
+                fetched = fetch_fn(missing)
+                if not fetched.empty:
+                    rows = self.append(key, fetched)
+
+        records = [rows[image_id] for image_id in image_ids if image_id in rows]
+        if not records:
+            return pd.DataFrame(columns=TIMESERIES_COLUMNS)
+        df = pd.DataFrame.from_records(records).reindex(columns=TIMESERIES_COLUMNS)
+        return df.sort_values('date').reset_index(drop=True)